@@ -1,14 +1,47 @@
-from flask import Flask, jsonify, request , render_template
+from flask import Flask, Response, jsonify, request , render_template
 
-from graphql_schema import schema  # Import your Query class from graphql_schema.py
+from graphql_schema import schema, build_context, add_stale_extension, operation_label, plot_renderer  # Import your Query class from graphql_schema.py
 from ariadne import graphql_sync
-from ariadne.asgi import GraphQL
 #from ariadne.flask import GraphQLView
+import os
 import time
 import pandas as pd
+from common.metrics import CONTENT_TYPE, GRAPHQL_OPERATION_DURATION, instrument_flask, render_metrics
+from common.refresher import refresher_status, start_refresher
+from common.resilience import begin_stale_tracking, stale_keys
+from common.settings import settings
+from persisted_queries import DocumentCache, PersistedQueryError, PersistedQueryStore
+from query_cost import QueryCostError, add_cost_extension, analyze_request
+from tracing import tracing_extensions
 
 # Initialize Flask app
 app = Flask(__name__)
+app.config.from_object('config.Config')
+settings.configure(app.config)
+# Request latency, in-flight requests and template render times for `/metrics`.
+instrument_flask(app)
+
+# With the debug reloader, `python app.py` runs this module both in a watcher
+# process and in the serving process; only the serving one refreshes.
+if __name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+    start_refresher()
+
+
+# Responses built from OMDb data served stale (past its cache TTL, while it
+# is fetched again in the background) carry an `X-Data-Stale` header.
+@app.before_request
+def start_stale_tracking():
+    begin_stale_tracking()
+
+
+@app.after_request
+def flag_stale_response(response):
+    if stale_keys():
+        response.headers["X-Data-Stale"] = "true"
+    return response
+
+document_cache = DocumentCache(app.config["GRAPHQL_DOCUMENT_CACHE_SIZE"])
+persisted_queries = PersistedQueryStore(app.config["GRAPHQL_APQ_CACHE_SIZE"])
 
 
 ###########################################################################
@@ -22,14 +55,28 @@ app = Flask(__name__)
 #
 # Process:
 #   - Extracts the JSON data from the incoming POST request.
+#   - Resolves Automatic Persisted Queries: a request may carry only the
+#     SHA-256 hash of a query registered earlier (see persisted_queries.py).
+#   - Estimates the cost of the query and rejects it with a 400 status when
+#     it is over `GRAPHQL_MAX_COST` or `GRAPHQL_MAX_DEPTH` (see query_cost.py).
 #   - Passes the JSON data to the `graphql_sync` function, along with:
 #       - The GraphQL schema to validate and resolve the query.
-#       - The request context (`request`) to be passed to the resolvers.
+#       - The request context (the `request` and its per-request loaders)
+#         to be passed to the resolvers.
 #       - The `debug` flag to help with debugging during development.
+#       - The document cache, so repeated query texts are parsed and
+#         validated only once.
 #   - Based on the success of the GraphQL query execution, determines the 
 #     appropriate HTTP status code (200 for success, 400 for failure).
+#   - With `GRAPHQL_TRACING` on, or asked for by the request, traces every
+#     resolver and the OMDb calls under it into `extensions.tracing`
+#     (see tracing.py).
+#   - Records the execution time of the operation, by operation name, for
+#     `/metrics`.
 #   - Returns the result of the GraphQL query execution as a JSON response 
-#     with the corresponding HTTP status code.
+#     with the corresponding HTTP status code, and the computed query cost
+#     in its `extensions` (plus `stale: true` when OMDb data past its cache
+#     TTL was served).
 #
 # Returns:
 #   tuple:
@@ -39,14 +86,31 @@ app = Flask(__name__)
 @app.route("/graphql", methods=["POST"])
 def graphql_server():
     data = request.get_json()
-    print(data)
+    try:
+        data = persisted_queries.resolve(data)
+        cost = analyze_request(schema, data, document_cache.parse_query,
+                               app.config["GRAPHQL_MAX_COST"], app.config["GRAPHQL_MAX_DEPTH"])
+    except PersistedQueryError as error:
+        return jsonify(error.to_result()), 200
+    except QueryCostError as error:
+        return jsonify(error.to_result()), 400
+
+    start = time.perf_counter()
     success, result = graphql_sync(
         schema,
         data,
-        context_value=request,
-        debug=app.debug
+        context_value=build_context(request),
+        query_parser=document_cache.parse_query,
+        query_validator=document_cache.validate_query,
+        debug=app.debug,
+        extensions=tracing_extensions(request.headers, app.config["GRAPHQL_TRACING"],
+                                      app.config["GRAPHQL_TRACE_EXPORT_PATH"])
     )
+    GRAPHQL_OPERATION_DURATION.labels(operation_label(data, document_cache.parse_query),
+                                      "success" if success and not result.get("errors") else "error"
+                                      ).observe(time.perf_counter() - start)
     status_code = 200 if success else 400
+    result = add_stale_extension(add_cost_extension(result, cost), stale_keys())
     return jsonify(result), status_code
 
 
@@ -89,7 +153,8 @@ def graphql_playground():
 #   None (the function handles GET requests to the `/showmovies` route).
 #
 # Process:
-#   - Constructs a GraphQL query to fetch movie data from the server.
+#   - Constructs a GraphQL query for the summary fields of the movies, which
+#     the OMDb search results already hold (no detail lookup per movie).
 #   - Executes the GraphQL query using `graphql_sync` to fetch the movie data.
 #   - If the query is successful:
 #       - Extracts the movie data from the query result.
@@ -109,15 +174,16 @@ def showmovies():
     data = {
         'operationName': 'allMovies',
         'variables': {},
-        'query': 'query allMovies { allMovies(num_years: 5) { \
-            id title year genre director actors plot language country awards poster } }'
+        # summary fields only: a detail field costs one OMDb lookup per movie,
+        # the template shows N/A for the columns left out
+        'query': 'query allMovies { allMovies(num_years: 5) { id title year poster } }'
     }
     
     # Execute the GraphQL query to fetch data
     success, result = graphql_sync(
         schema,
         data,
-        context_value=request,
+        context_value=build_context(request),
         debug=app.debug
     )
     
@@ -135,6 +201,49 @@ def showmovies():
     return jsonify({"error": "Failed to fetch movies"}), 400
 
 
+###########################################################################
+# Purpose:
+#   Show the schedule of the background refresher that keeps the most recent
+#   years' OMDb search pages in the cache (see common/refresher.py).
+#
+# Returns:
+#   JSON: The refreshed years with their page count, last and next refresh
+#   times and last error.
+###########################################################################
+@app.route('/refresher', methods=['GET'])
+def refresher():
+    return jsonify(refresher_status())
+
+
+###########################################################################
+# Purpose:
+#   Expose the metrics of the service in the Prometheus text format: request
+#   latency by route and GraphQL operation, OMDb request latency by endpoint,
+#   cache hit ratio, in-flight requests, connection pool saturation and
+#   template render times (see common/metrics.py).
+###########################################################################
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_metrics(), content_type=CONTENT_TYPE)
+
+
+###########################################################################
+# Purpose:
+#   Report the status of a performance plot render job, whose id is
+#   returned by the `performancePlot` query.
+#
+# Returns:
+#   JSON: The job id, its status ("pending", "done" or "failed") and the
+#   plot url, or a 404 for an unknown job.
+###########################################################################
+@app.route('/plots/<job_id>', methods=['GET'])
+def plot_job(job_id):
+    job = plot_renderer.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown plot job"}), 404
+    return jsonify(job.to_dict())
+
+
 PLAYGROUND_HTML = """
 <!DOCTYPE html>
 <html>
@@ -169,15 +278,7 @@ if __name__ == "__main__":
 # Create the schema
 #schema = make_executable_schema(type_defs, query)
 
-# Add GraphQL endpoint with Ariadne
-app.add_url_rule(
-    '/graphql',
-    view_func=GraphQL.as_view(
-        'graphql',
-        schema=schema,
-        graphiql=True  # Enables the GraphiQL interface
-    )
-)
+# The ASGI version of the GraphQL endpoint (async resolvers) lives in asgi.py
 
 
 # Route to display movie data in tabular form, filtered by year
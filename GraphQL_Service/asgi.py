@@ -0,0 +1,169 @@
+import os
+import time
+from contextlib import asynccontextmanager
+
+from ariadne.asgi import GraphQL
+from ariadne.asgi.handlers import GraphQLHTTPHandler
+from ariadne.exceptions import HttpError
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+
+from incremental import MULTIPART_CONTENT_TYPE, accepts_incremental, incremental_payloads, multipart_body
+from graphql_schema import (add_stale_extension, async_schema, build_async_context, incremental_schema, operation_label,
+                            plot_renderer)
+from common.metrics import CONTENT_TYPE, GRAPHQL_OPERATION_DURATION, MetricsMiddleware, render_metrics
+from common.omdb_async import close_async_client
+from common.refresher import refresher_status, start_refresher, stop_refresher
+from common.resilience import track_stale
+from common.settings import settings
+from config import Config
+from persisted_queries import DocumentCache, PersistedQueryError, PersistedQueryStore
+from query_cost import QueryCostError, add_cost_extension, analyze_request
+from tracing import tracing_extensions
+
+
+###########################################################################
+# Purpose:
+#   asyncio deployment of the GraphQL service. Run it with an ASGI server
+#   from the GraphQL_Service folder:
+#
+#       uvicorn asgi:app --port 5000
+#
+# Process:
+#   - Serves the same schema as `app.py` on `/graphql`, but with the async
+#     resolvers, so every OMDb wait is a suspended coroutine on one event
+#     loop instead of a blocked worker thread.
+#   - GET `/graphql` serves the GraphQL explorer.
+#   - Like `app.py`, it accepts Automatic Persisted Queries, parses and
+#     validates each distinct query text only once, and rejects queries
+#     over the cost budget before running them.
+#   - Serves the rendered performance plots from `/static`, and the status
+#     of their render jobs from `/plots/<job_id>`.
+#   - The background refresher of the recent years (common/refresher.py)
+#     runs while the server is up; `/refresher` shows its schedule.
+#   - Requests accepting `multipart/mixed` get incremental delivery: fields
+#     under `@defer` and the items of `allMovies @stream` are sent as they
+#     resolve, year by year (see incremental.py).
+#   - Resolvers are traced into `extensions.tracing` as configured by
+#     `GRAPHQL_TRACING` (see tracing.py); an incremental response carries
+#     the trace in its last payload.
+#   - `/metrics` exposes request and GraphQL operation latency, OMDb
+#     latency, cache and pool metrics in the Prometheus text format.
+#   - The shared async OMDb client is closed when the server shuts down.
+###########################################################################
+settings.configure(vars(Config))
+
+document_cache = DocumentCache(Config.GRAPHQL_DOCUMENT_CACHE_SIZE)
+persisted_queries = PersistedQueryStore(Config.GRAPHQL_APQ_CACHE_SIZE)
+
+
+# HTTP handler resolving persisted query hashes and checking the query cost
+# before execution, flagging results built from stale OMDb data, timing
+# each operation and streaming incremental results.
+class ServiceHTTPHandler(GraphQLHTTPHandler):
+    async def execute_graphql_query(self, request, data, **kwargs):
+        try:
+            data = persisted_queries.resolve(data)
+            cost = analyze_request(async_schema, data, document_cache.parse_query,
+                                   Config.GRAPHQL_MAX_COST, Config.GRAPHQL_MAX_DEPTH)
+        except PersistedQueryError as error:
+            return True, error.to_result()
+        except QueryCostError as error:
+            return False, error.to_result()
+        start = time.perf_counter()
+        with track_stale() as stale_keys:
+            success, result = await super().execute_graphql_query(request, data, **kwargs)
+        GRAPHQL_OPERATION_DURATION.labels(operation_label(data, document_cache.parse_query),
+                                          "success" if success and not result.get("errors") else "error"
+                                          ).observe(time.perf_counter() - start)
+        return success, add_stale_extension(add_cost_extension(result, cost), stale_keys)
+
+    async def handle_request_override(self, request):
+        if request.method != "POST" or not accepts_incremental(request.headers.get("accept")):
+            return None
+        try:
+            data = persisted_queries.resolve(await self.extract_data_from_request(request))
+            cost = analyze_request(async_schema, data, document_cache.parse_query,
+                                   Config.GRAPHQL_MAX_COST, Config.GRAPHQL_MAX_DEPTH)
+        except HttpError as error:
+            return PlainTextResponse(error.message or error.status, status_code=400)
+        except PersistedQueryError as error:
+            return JSONResponse(error.to_result())
+        except QueryCostError as error:
+            return JSONResponse(error.to_result(), status_code=400)
+        context_value = await self.get_context_for_request(request, data)
+        extensions = await self.get_extensions_for_request(request, context_value)
+        return StreamingResponse(multipart_body(self.stream_payloads(data, context_value, cost, extensions)),
+                                 media_type=MULTIPART_CONTENT_TYPE)
+
+    # The incremental payloads of a request; the first carries the query cost,
+    # the last the trace (when traced), and every payload sent after stale
+    # OMDb data was used is flagged.
+    async def stream_payloads(self, data, context_value, cost, extensions=None):
+        start = time.perf_counter()
+        outcome = "success"
+        with track_stale() as stale_keys:
+            payloads = incremental_payloads(incremental_schema, data, context_value,
+                                            document_cache.parse_query, document_cache.validate_query,
+                                            extensions)
+            first = True
+            async for payload in payloads:
+                if first:
+                    payload, first = add_cost_extension(payload, cost), False
+                if payload.get("errors") or payload.get("completed") and any(
+                        "errors" in completed for completed in payload["completed"]):
+                    outcome = "error"
+                yield add_stale_extension(payload, stale_keys)
+        GRAPHQL_OPERATION_DURATION.labels(operation_label(data, document_cache.parse_query),
+                                          outcome).observe(time.perf_counter() - start)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    start_refresher()
+    yield
+    stop_refresher()
+    await close_async_client()
+
+
+def get_extensions(request, context):
+    return tracing_extensions(request.headers, Config.GRAPHQL_TRACING, Config.GRAPHQL_TRACE_EXPORT_PATH)
+
+
+async def refresher(request):
+    return JSONResponse(refresher_status())
+
+
+async def metrics(request):
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+
+async def plot_job(request):
+    job = plot_renderer.get_job(request.path_params["job_id"])
+    if job is None:
+        return JSONResponse({"error": "Unknown plot job"}, status_code=404)
+    return JSONResponse(job.to_dict())
+
+
+graphql_app = GraphQL(
+    async_schema,
+    context_value=build_async_context,
+    query_parser=document_cache.parse_query,
+    query_validator=document_cache.validate_query,
+    http_handler=ServiceHTTPHandler(extensions=get_extensions),
+    debug=Config.DEBUG
+)
+
+app = Starlette(
+    routes=[Route("/graphql", graphql_app, methods=["GET", "POST"]),
+            Route("/refresher", refresher, methods=["GET"]),
+            Route("/plots/{job_id}", plot_job, methods=["GET"]),
+            Route("/metrics", metrics, methods=["GET"]),
+            Mount("/static", StaticFiles(directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), "static"),
+                                         check_dir=False))],
+    middleware=[Middleware(MetricsMiddleware)],
+    lifespan=lifespan
+)
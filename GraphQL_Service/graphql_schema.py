@@ -1,8 +1,21 @@
 from flask import Flask,render_template
 from ariadne import gql, make_executable_schema, QueryType
 from ariadne.asgi import GraphQL
+from graphql import FieldNode, GraphQLError, GraphQLStreamDirective, get_directive_values, get_operation_ast
 
-from utils import fetch_all_movies, plot_movies_performance, fetch_movies_by_years  # Import your shared functions
+import asyncio
+import os
+
+from utils import fetch_all_movies, fetch_movies_by_years  # Import your shared functions
+from common.omdb import fetch_movies_page, movie_detail_loader, year_range
+from common.omdb_async import (fetch_all_movies_async, fetch_movies_by_years_async, fetch_movies_page_async,
+                               iter_movies_by_years_async, movie_detail_loader_async)
+from common.plots import PlotRenderer, recorded_performance
+from selection import selected_fields
+
+# Performance plots are rendered off the request thread and cached in static/plots.
+plot_renderer = PlotRenderer("graphql", os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "plots"),
+                             "/static/plots")
 
 # Define the GraphQL schema (type definitions)
 type_defs = gql("""
@@ -29,14 +42,35 @@ type_defs = gql("""
     type MovieFetchPerformance {
         movie_count: Int
         time_taken: String
+        samples: Int
+        cache_hit_ratio: Float
+        last_fetched: String
+    }
+
+    type MovieEdge {
+        cursor: String!
+        node: Movie
+    }
+
+    type PageInfo {
+        hasNextPage: Boolean!
+        endCursor: String
+    }
+
+    type MovieConnection {
+        edges: [MovieEdge]
+        pageInfo: PageInfo!
     }
 
     type PlotPerformance {
         plot_url: String
+        job_id: String
+        status: String
     }
 
     type Query {
         allMovies(num_years: Int): [Movie]
+        allMoviesConnection(num_years: Int, first: Int, after: String): MovieConnection
         fetchPerformance(year: Int): MovieFetchPerformance
         performancePlot(numYear: Int): PlotPerformance
     }
@@ -44,37 +78,160 @@ type_defs = gql("""
 
 query = QueryType()
 
+
+###########################################################################
+# Purpose:
+#   Build the context of one GraphQL execution: the incoming request plus
+#   the per-request loaders, so movie details are fetched once per request
+#   however many fields and years ask for them.
+###########################################################################
+def build_context(request):
+    return {"request": request, "movie_details": movie_detail_loader()}
+
+
+def build_async_context(request, data=None):
+    return {"request": request, "movie_details": movie_detail_loader_async()}
+
+
+# Flag a GraphQL result built from cached OMDb responses past their TTL.
+def add_stale_extension(result, stale_keys):
+    if stale_keys and isinstance(result, dict):
+        result["extensions"] = dict(result.get("extensions") or {}, stale=True)
+    return result
+
+
+# Name of a GraphQL operation in the metrics: its own name, else its type and
+# root fields (e.g. "query allMovies"); "invalid" when there is none to run
+# or it asks for fields the schema doesn't have.
+def operation_label(data, parse_query):
+    if not isinstance(data, dict) or not isinstance(data.get("query"), str):
+        return "invalid"
+    try:
+        operation = get_operation_ast(parse_query(None, data), data.get("operationName"))
+    except GraphQLError:
+        return "invalid"
+    if operation is None:
+        return "invalid"
+    if operation.name is not None:
+        return operation.name.value
+    fields = sorted({selection.name.value for selection in operation.selection_set.selections
+                     if isinstance(selection, FieldNode)})
+    root_type = schema.get_root_type(operation.operation)
+    if root_type is None or not all(field in root_type.fields or field.startswith("__") for field in fields):
+        return "invalid"
+    return f"{operation.operation.value} {','.join(fields)}"
+
+
+def _detail_loader(info):
+    if isinstance(info.context, dict):
+        return info.context.get("movie_details")
+    return None
+
+
 # Define resolvers (functions that return data for each field)
 #returns: All the movies in the given number of years
+# Only the selected Movie fields are built, and the per-movie detail lookups
+# run only when a detail field (genre, plot, ratings, ...) is selected.
 
 @query.field("allMovies")
 def resolve_all_movies(obj, info, num_years=None):
     # Fetch movies by year
-    all_movies  = fetch_movies_by_years(num_years)
+    all_movies  = fetch_movies_by_years(num_years, fields=selected_fields(info),
+                                        detail_loader=_detail_loader(info))
     return all_movies
     #return render_template("movies.html", movies=all_movies, movie_count=len(all_movies), time_taken="N/A")
 
-#returns:   All movie for a specific year
-@query.field("fetchPerformance")
-def resolve_fetch_performance(obj, info, year):
-    # Fetch movies and measure performance
-    movies, time_taken = fetch_all_movies(year)
+#returns: One page of the movies of the given number of years, as a Relay
+#connection: `first` movies after the `after` cursor (20 by default, 100 at
+#most). Only the OMDb pages holding the page are fetched.
+@query.field("allMoviesConnection")
+def resolve_all_movies_connection(obj, info, num_years=None, first=None, after=None):
+    return fetch_movies_page(year_range(num_years or 0), first, after,
+                             fields=selected_fields(info, ("edges", "node")),
+                             detail_loader=_detail_loader(info))
+
+# Shape the recorded (or, without a history, live) performance of a year.
+def _fetch_performance(performance):
     return {
-        "movie_count": len(movies),
-        "time_taken": f"{time_taken:.2f} seconds"
+        "movie_count": performance["count"],
+        "time_taken": f"{performance['time_taken']:.2f} seconds",
+        "samples": performance.get("samples", 1),
+        "cache_hit_ratio": performance.get("cache_hit_ratio"),
+        "last_fetched": performance.get("last_fetched")
     }
 
-#return the performance graph for data fetched for number of years
+#returns:   Fetch performance of a specific year, from the fetch timings
+#history; a year never fetched is fetched (and recorded) first
+@query.field("fetchPerformance")
+def resolve_fetch_performance(obj, info, year):
+    performance = recorded_performance(year)
+    if performance is None:
+        movies, time_taken = fetch_all_movies(year)
+        performance = recorded_performance(year) or {"count": len(movies), "time_taken": time_taken}
+    return _fetch_performance(performance)
+
+#return the performance graph for data fetched for number of years; the
+#plot is rendered in the background, `status` tells when `plot_url` is ready
 @query.field("performancePlot")
 def resolve_performance_plot(obj, info, numYear):
-    # Generate the performance plot URL
-    plot_filename = plot_movies_performance(numYear, service_call='graphql')
-    return {"plot_url": f"/{plot_filename}"}
+    job = plot_renderer.request_plot(numYear)
+    return {"plot_url": job.url, "job_id": job.id, "status": job.status}
 
 
 
 schema = make_executable_schema(type_defs, query)
 
+
+# Async resolvers for the ASGI deployment (asgi.py). Root fields of one query
+# and the years inside `allMovies` are awaited concurrently on the event loop.
+async_query = QueryType()
+
+# With `@stream` (incremental delivery, see incremental.py) the movies are
+# returned as an async generator, so each year goes out as soon as it is
+# fetched instead of once the whole list is built.
+@async_query.field("allMovies")
+async def resolve_all_movies_async(obj, info, num_years=None):
+    stream = get_directive_values(GraphQLStreamDirective, info.field_nodes[0], info.variable_values)
+    if stream is not None and stream["if"]:
+        return iter_movies_by_years_async(num_years, fields=selected_fields(info),
+                                          detail_loader=_detail_loader(info))
+    return await fetch_movies_by_years_async(num_years, fields=selected_fields(info),
+                                             detail_loader=_detail_loader(info))
+
+@async_query.field("allMoviesConnection")
+async def resolve_all_movies_connection_async(obj, info, num_years=None, first=None, after=None):
+    return await fetch_movies_page_async(year_range(num_years or 0), first, after,
+                                         fields=selected_fields(info, ("edges", "node")),
+                                         detail_loader=_detail_loader(info))
+
+@async_query.field("fetchPerformance")
+async def resolve_fetch_performance_async(obj, info, year):
+    performance = await asyncio.to_thread(recorded_performance, year)
+    if performance is None:
+        movies, time_taken = await fetch_all_movies_async(year)
+        performance = (await asyncio.to_thread(recorded_performance, year)
+                       or {"count": len(movies), "time_taken": time_taken})
+    return _fetch_performance(performance)
+
+# Plotting runs on the renderer's worker thread; this only queues the job.
+@async_query.field("performancePlot")
+async def resolve_performance_plot_async(obj, info, numYear):
+    job = plot_renderer.request_plot(numYear)
+    return {"plot_url": job.url, "job_id": job.id, "status": job.status}
+
+
+async_schema = make_executable_schema(type_defs, async_query)
+
+# The incremental delivery directives. graphql-core only executes a schema
+# declaring them through its experimental incremental executor, so they are
+# only part of the schema used for multipart requests (see incremental.py).
+incremental_type_defs = gql("""
+    directive @defer(if: Boolean! = true, label: String) on FRAGMENT_SPREAD | INLINE_FRAGMENT
+    directive @stream(if: Boolean! = true, label: String, initialCount: Int = 0) on FIELD
+""")
+
+incremental_schema = make_executable_schema([type_defs, incremental_type_defs], async_query)
+
 # Create the executable schema
 #schema = make_executable_schema(type_defs, {
 #    "Query": {
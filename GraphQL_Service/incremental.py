@@ -0,0 +1,92 @@
+import json
+from inspect import isawaitable
+
+from ariadne.extensions import ExtensionManager
+from graphql import ExperimentalIncrementalExecutionResults, GraphQLError, experimental_execute_incrementally
+
+
+# Content type of an incremental delivery response: one JSON payload per
+# part of a multipart/mixed body, as sent by Apollo and graphql-helix servers.
+MULTIPART_CONTENT_TYPE = 'multipart/mixed; boundary="-"; deferSpec=20220824'
+
+
+# True when the client accepts an incremental (multipart) response.
+def accepts_incremental(accept_header):
+    return "multipart/mixed" in (accept_header or "")
+
+
+###########################################################################
+# Purpose:
+#   Execute a GraphQL request with `@defer` and `@stream` support and yield
+#   its result as incremental payloads.
+#
+# Parameters:
+#   schema: The async executable schema (the streamed `allMovies` resolver
+#       returns an async generator).
+#   data (dict): The request data, with `query`, `variables` and
+#       `operationName`.
+#   context_value: The context passed to the resolvers.
+#   parse_query, validate_query: The document cache functions, so the
+#       query is parsed and validated like on the non-streamed path.
+#   extensions (list): Ariadne extension factories run around the execution
+#       (e.g. tracing); None for none.
+#
+# Process:
+#   - Yields the initial payload (`data`, `hasNext: true`) as soon as every
+#     field that isn't deferred or streamed is resolved, then one payload per
+#     completed `@defer` fragment or `@stream` item, the last one with
+#     `hasNext: false`.
+#   - A query without those directives, or failing to parse or validate,
+#     yields one ordinary result.
+#   - The extensions see every resolver, the deferred and streamed ones
+#     included; what they report (`extensions.tracing`, ...) is added to the
+#     last payload, once the whole request is resolved.
+#
+# Returns:
+#   async generator: The formatted payloads, as dicts.
+###########################################################################
+async def incremental_payloads(schema, data, context_value, parse_query, validate_query, extensions=None):
+    try:
+        document = parse_query(context_value, data)
+    except GraphQLError as error:
+        yield {"errors": [error.formatted]}
+        return
+    errors = validate_query(schema, document)
+    if errors:
+        yield {"errors": [error.formatted for error in errors]}
+        return
+
+    extension_manager = ExtensionManager(extensions, context_value)
+    with extension_manager.request():
+        result = experimental_execute_incrementally(
+            schema, document, context_value=context_value,
+            variable_values=data.get("variables"), operation_name=data.get("operationName"),
+            middleware=extension_manager.as_middleware_manager())
+        if isawaitable(result):
+            result = await result
+
+        if not isinstance(result, ExperimentalIncrementalExecutionResults):
+            yield _add_extensions(result.formatted, extension_manager)
+            return
+        yield result.initial_result.formatted
+        async for payload in result.subsequent_results:
+            if payload.has_next:
+                yield payload.formatted
+            else:
+                yield _add_extensions(payload.formatted, extension_manager)
+
+
+# Add what the extensions report to the `extensions` of a payload.
+def _add_extensions(payload, extension_manager):
+    reported = extension_manager.format()
+    if reported:
+        payload["extensions"] = dict(payload.get("extensions") or {}, **reported)
+    return payload
+
+
+# Encode payloads as the parts of a multipart/mixed body (boundary "-").
+async def multipart_body(payloads):
+    async for payload in payloads:
+        yield ("\r\n---\r\nContent-Type: application/json; charset=utf-8\r\n\r\n"
+               + json.dumps(payload)).encode("utf-8")
+    yield b"\r\n-----\r\n"
@@ -1,42 +1,18 @@
-from locust import HttpUser, TaskSet, task, between
+import os
+import sys
 
-class GraphQLApiUser(HttpUser):
-    wait_time = between(1, 5)
+# The Locust scenarios are shared with the REST service and live in the
+# top-level `benchmark` folder.
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmark")
+if BENCHMARK_DIR not in sys.path:
+    sys.path.append(BENCHMARK_DIR)
 
-    @task(1)
-    def query_all_movies(self):
-        query = """
-        query allMovies($num_years: Int) {
-          allMovies(num_years: $num_years) {
-            title
-            year
-            genre
-            director
-            actors
-            plot
-            language
-            country
-            awards
-            poster
-          }
-        }
-        """
-        variables = {
-            "num_years": 3
-        }
-        
-        payload = {
-            "query": query,
-            "variables": variables
-        }
+from load_scenarios import GraphQLUser
 
 
-        response = self.client.post("/graphql", json={"query": query})
+class GraphQLApiUser(GraphQLUser):
+    host = "http://localhost:5000"
 
-        # Check the response status code and the content
-        if response.status_code == 200:
-            print("Response: ", response.json())
-        else:
-            print(f"Error: {response.status_code} - {response.text}")
 
- 
+# python3 -m locust --host=http://127.0.0.1:5000
+# python3 -m locust --headless -u 20 -r 5 -t 2m --slo-p95-ms 2000
@@ -0,0 +1,138 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from graphql import parse, validate
+
+from common.cache import MemoryCache
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+class _CachedDocument:
+    def __init__(self, document):
+        self.document = document
+        self.validation_errors = {}
+
+
+###########################################################################
+# Purpose:
+#   LRU cache of parsed and validated GraphQL documents, keyed by the
+#   SHA-256 hash of the query text.
+#
+# Parameters:
+#   max_entries (int): Number of documents kept.
+#
+# Process:
+#   - `parse_query` is used as Ariadne's `query_parser`: it returns the
+#     cached DocumentNode of a query text it has seen before, and only
+#     parses new texts.
+#   - `validate_query` is used as Ariadne's `query_validator`: because the
+#     same query text always yields the same DocumentNode object, the
+#     validation result is remembered on the cache entry per schema and set
+#     of validation rules.
+#   - Documents that fail to parse are not cached.
+###########################################################################
+class DocumentCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._by_document = {}
+        self._lock = threading.Lock()
+
+    def parse_query(self, context_value, data):
+        key = query_hash(data["query"])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.document
+            self.misses += 1
+
+        document = parse(data["query"])
+        with self._lock:
+            entry = self._entries[key] = _CachedDocument(document)
+            self._by_document[id(document)] = entry
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._by_document.pop(id(evicted.document), None)
+        return document
+
+    def validate_query(self, schema, document_ast, rules=None, max_errors=None, **kwargs):
+        with self._lock:
+            entry = self._by_document.get(id(document_ast))
+        if entry is None or entry.document is not document_ast:
+            return validate(schema, document_ast, rules=rules, max_errors=max_errors, **kwargs)
+
+        key = (id(schema), tuple(rules) if rules else None, max_errors)
+        errors = entry.validation_errors.get(key)
+        if errors is None:
+            errors = validate(schema, document_ast, rules=rules, max_errors=max_errors, **kwargs)
+            entry.validation_errors[key] = errors
+        return errors
+
+
+###########################################################################
+# Purpose:
+#   Error answered to an Automatic Persisted Queries request that can't be
+#   served, in the shape Apollo clients expect.
+###########################################################################
+class PersistedQueryError(Exception):
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+    def to_result(self):
+        return {"errors": [{"message": self.message, "extensions": {"code": self.code}}]}
+
+
+###########################################################################
+# Purpose:
+#   Store of Automatic Persisted Queries (APQ): the query texts registered
+#   by clients, keyed by their SHA-256 hash.
+#
+# Parameters:
+#   max_entries (int): Number of query texts kept (least recently used
+#       ones are dropped; clients then simply register them again).
+#
+# Process (`resolve(data)`):
+#   - Requests without `extensions.persistedQuery` are returned unchanged.
+#   - A hash without a query is looked up in the store; an unknown hash
+#     raises PERSISTED_QUERY_NOT_FOUND so the client resends the text.
+#   - A hash with a query registers the query after checking the hash.
+#   - Returns the request data with its `query` filled in.
+###########################################################################
+class PersistedQueryStore:
+    def __init__(self, max_entries):
+        self._queries = MemoryCache(max_entries, ttl=float("inf"))
+
+    def resolve(self, data):
+        if not isinstance(data, dict):
+            return data
+        persisted_query = (data.get("extensions") or {}).get("persistedQuery")
+        if not isinstance(persisted_query, dict):
+            return data
+
+        if persisted_query.get("version") != 1:
+            raise PersistedQueryError("Unsupported persisted query version", "PERSISTED_QUERY_NOT_SUPPORTED")
+        sha256_hash = persisted_query.get("sha256Hash")
+        if not isinstance(sha256_hash, str):
+            raise PersistedQueryError("Missing sha256Hash of the persisted query", "BAD_REQUEST")
+
+        query = data.get("query")
+        if query is None:
+            query = self._queries.get(sha256_hash)
+            if query is None:
+                raise PersistedQueryError("PersistedQueryNotFound", "PERSISTED_QUERY_NOT_FOUND")
+            return dict(data, query=query)
+
+        if not isinstance(query, str) or query_hash(query) != sha256_hash:
+            raise PersistedQueryError("provided sha does not match query", "BAD_REQUEST")
+        self._queries.set(sha256_hash, query)
+        return data
@@ -0,0 +1,235 @@
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    Undefined,
+    get_named_type,
+    get_nullable_type,
+    get_operation_ast,
+    is_list_type,
+    value_from_ast_untyped,
+)
+
+from common.omdb import DETAIL_FIELDS, PAGE_SIZE
+from common.pagination import page_size
+from common.settings import settings
+
+
+# Cost unit: one request to OMDb. These are static estimates: the real page
+# count of a year is only known once its first page was fetched, so every
+# year is counted at `OMDB_MAX_PAGES`, the most pages a year fetch reads.
+
+# Rendering one performance plot, expressed in OMDb requests.
+PLOT_RENDER_COST = 10
+# One `i=` lookup per movie when any detail field of `Movie` is selected.
+DETAIL_LOOKUP_COST = 1
+
+
+# `allMovies(num_years: n)` and `performancePlot(numYear: n)` cover n + 1
+# years, of up to `OMDB_MAX_PAGES` search pages each. Without `argument`,
+# the field fetches a single year.
+def _year_pages(argument=None):
+    def multiplier(args):
+        years = 1
+        if argument is not None:
+            try:
+                years = max(1, int(args.get(argument) or 0) + 1)
+            except (TypeError, ValueError):
+                pass
+        return years * settings.OMDB_MAX_PAGES
+    return multiplier
+
+
+# Movies of one `allMoviesConnection(first: n)` page.
+def _page_items(args):
+    try:
+        return page_size(args.get("first"))
+    except (TypeError, ValueError):
+        return page_size(None)
+
+
+# OMDb pages read for one connection page: its movies plus the one telling if
+# there is a next page, which may start on the page after.
+def _window_pages(args):
+    return -(-(_page_items(args) + 1) // PAGE_SIZE) + 1
+
+
+###########################################################################
+# Cost of the fields of the schema in graphql_schema.py:
+#   cost:       cost of resolving the field once
+#   multiplier: function of the field arguments scaling the cost and the
+#               list size (e.g. the search pages of the years fetched)
+#   list_size:  estimated number of items per unit of the multiplier (the
+#               movies of one search page)
+#   items:      function of the field arguments giving the number of items
+#               an object field (a connection) resolves its selection for
+# Fields missing here (plain scalars) cost nothing.
+###########################################################################
+COST_MAP = {
+    "Query": {
+        "allMovies": {"cost": 1, "multiplier": _year_pages("num_years"), "list_size": PAGE_SIZE},
+        "allMoviesConnection": {"cost": 1, "multiplier": _window_pages, "items": _page_items},
+        "fetchPerformance": {"cost": 1, "multiplier": _year_pages()},
+        "performancePlot": {"cost": 1, "multiplier": _year_pages("numYear"), "extra_cost": PLOT_RENDER_COST},
+    },
+}
+
+
+###########################################################################
+# Purpose:
+#   Error answered when a query is over the cost or depth budget. The query
+#   is rejected before any resolver runs.
+###########################################################################
+class QueryCostError(Exception):
+    def __init__(self, message, report):
+        super().__init__(message)
+        self.message = message
+        self.report = report
+
+    def to_result(self):
+        return {
+            "errors": [{"message": self.message, "extensions": {"code": "QUERY_TOO_EXPENSIVE"}}],
+            "extensions": {"cost": self.report}
+        }
+
+
+# Argument values of a field node, with variables substituted and defaults applied.
+def _argument_values(field, field_node, variables):
+    args = {name: argument.default_value for name, argument in field.args.items()
+            if argument.default_value is not Undefined}
+    for argument_node in field_node.arguments or ():
+        args[argument_node.name.value] = value_from_ast_untyped(argument_node.value, variables)
+    return args
+
+
+def _collect_fields(selection_set, fragments, visited=None):
+    visited = set() if visited is None else visited
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            yield selection
+        elif isinstance(selection, InlineFragmentNode):
+            yield from _collect_fields(selection.selection_set, fragments, visited)
+        elif isinstance(selection, FragmentSpreadNode):
+            name = selection.name.value
+            if name in fragments and name not in visited:
+                visited.add(name)
+                yield from _collect_fields(fragments[name].selection_set, fragments, visited)
+
+
+###########################################################################
+# Purpose:
+#   Estimate the cost and depth of a selection set of `parent_type`.
+#
+# Process:
+#   - Adds the cost of every selected field from COST_MAP, scaled by its
+#     multiplier.
+#   - For list fields, adds the cost of the sub-selection once per
+#     estimated item; for connections, once per movie of the page; for
+#     other object fields, once.
+#   - A `Movie` selection costs one detail lookup when it selects any
+#     field that OMDb search results do not contain.
+#
+# Returns:
+#   tuple: (cost, depth) of the selection set.
+###########################################################################
+def _selection_cost(parent_type, selection_set, variables, fragments):
+    cost = 0
+    depth = 0
+    selected = set()
+    for field_node in _collect_fields(selection_set, fragments):
+        name = field_node.name.value
+        field = parent_type.fields.get(name) if hasattr(parent_type, "fields") else None
+        if field is None:
+            continue  # introspection or unknown field, reported by validation
+        selected.add(name)
+
+        args = _argument_values(field, field_node, variables)
+        rule = COST_MAP.get(parent_type.name, {}).get(name, {})
+        multiplier = rule.get("multiplier", lambda args: 1)(args)
+        field_cost = rule.get("cost", 0) * multiplier + rule.get("extra_cost", 0)
+
+        field_depth = 1
+        if field_node.selection_set is not None:
+            child_cost, child_depth = _selection_cost(
+                get_named_type(field.type), field_node.selection_set, variables, fragments)
+            items = rule["items"](args) if "items" in rule else 1
+            if is_list_type(get_nullable_type(field.type)):
+                items = rule.get("list_size", 1) * multiplier
+            field_cost += items * child_cost
+            field_depth += child_depth
+
+        cost += field_cost
+        depth = max(depth, field_depth)
+
+    if parent_type.name == "Movie" and not DETAIL_FIELDS.isdisjoint(selected):
+        cost += DETAIL_LOOKUP_COST
+    return cost, depth
+
+
+###########################################################################
+# Purpose:
+#   Statically estimate the cost of a GraphQL request and enforce the
+#   configured budgets.
+#
+# Parameters:
+#   schema (GraphQLSchema): The executable schema.
+#   document (DocumentNode): The parsed query.
+#   data (dict): The request data (for `variables` and `operationName`).
+#   max_cost (int): Cost budget of one request.
+#   max_depth (int): Maximum nesting depth of one request.
+#
+# Returns:
+#   dict: The cost report added to the response `extensions`.
+#
+# Raises:
+#   QueryCostError: The query is over one of the budgets.
+###########################################################################
+def check_query_cost(schema, document, data, max_cost, max_depth):
+    operation = get_operation_ast(document, data.get("operationName"))
+    if operation is None:
+        return None  # reported by Ariadne when it executes the request
+
+    fragments = {definition.name.value: definition for definition in document.definitions
+                 if isinstance(definition, FragmentDefinitionNode)}
+    root_type = schema.get_root_type(operation.operation)
+    cost, depth = _selection_cost(root_type, operation.selection_set,
+                                  data.get("variables") or {}, fragments)
+
+    report = {"requestedQueryCost": cost, "maximumAvailable": max_cost, "depth": depth}
+    if depth > max_depth:
+        raise QueryCostError(f"Query depth {depth} exceeds the maximum of {max_depth}", report)
+    if cost > max_cost:
+        raise QueryCostError(f"Query cost {cost} exceeds the maximum of {max_cost}", report)
+    return report
+
+
+###########################################################################
+# Purpose:
+#   Run `check_query_cost` on raw request data before it is executed.
+#
+# Process:
+#   - Requests without a query text, and queries that don't parse, are left
+#     for Ariadne to reject with its usual errors.
+#   - The query is parsed with `parse_query` (the document cache), so the
+#     execution that follows reuses the same parsed document.
+#
+# Returns:
+#   dict | None: The cost report, if the query could be analyzed.
+###########################################################################
+def analyze_request(schema, data, parse_query, max_cost, max_depth):
+    if not isinstance(data, dict) or not isinstance(data.get("query"), str):
+        return None
+    try:
+        document = parse_query(None, data)
+    except GraphQLError:
+        return None
+    return check_query_cost(schema, document, data, max_cost, max_depth)
+
+
+# Add the cost report to the `extensions` of a GraphQL result.
+def add_cost_extension(result, report):
+    if report is not None and isinstance(result, dict):
+        result["extensions"] = dict(result.get("extensions") or {}, cost=report)
+    return result
@@ -0,0 +1,41 @@
+from graphql import FieldNode, FragmentSpreadNode, InlineFragmentNode
+
+
+###########################################################################
+# Purpose:
+#   Collect the names of the fields a query selects below the field being
+#   resolved, e.g. {"id", "title"} for `allMovies { id title }`.
+#
+# Parameters:
+#   info (GraphQLResolveInfo): The resolve info passed to the resolver.
+#   path (tuple): Names of the nested fields to descend through first, e.g.
+#       ("edges", "node") for the movies of a connection.
+#
+# Process:
+#   - Walks the selection set of every node of the resolved field.
+#   - Follows inline fragments and named fragment spreads.
+#   - Ignores `__typename` and other introspection fields.
+#
+# Returns:
+#   set: The selected field names (first level below `path` only).
+###########################################################################
+def selected_fields(info, path=()):
+    def field_nodes(selection_set):
+        if selection_set is None:
+            return
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                yield selection
+            elif isinstance(selection, InlineFragmentNode):
+                yield from field_nodes(selection.selection_set)
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = info.fragments.get(selection.name.value)
+                if fragment is not None:
+                    yield from field_nodes(fragment.selection_set)
+
+    nodes = list(info.field_nodes)
+    for name in path:
+        nodes = [node for parent in nodes for node in field_nodes(parent.selection_set)
+                 if node.name.value == name]
+    return {node.name.value for parent in nodes for node in field_nodes(parent.selection_set)
+            if not node.name.value.startswith("__")}
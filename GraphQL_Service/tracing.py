@@ -0,0 +1,159 @@
+import json
+import threading
+from datetime import datetime, timezone
+from inspect import iscoroutinefunction
+
+from ariadne.contrib.tracing.utils import format_path, should_trace
+from ariadne.types import Extension
+from graphql.pyutils import is_awaitable
+
+from common.settings import settings
+from common.tracing import begin_trace, end_trace, span
+
+
+# Request header asking for a trace when GRAPHQL_TRACING is "header".
+TRACING_HEADER = "X-GraphQL-Tracing"
+
+_export_lock = threading.Lock()
+
+
+def _timestamp(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+###########################################################################
+# Purpose:
+#   Ariadne extension tracing one GraphQL request.
+#
+# Parameters:
+#   export_path (str): File the spans are appended to as OpenTelemetry-style
+#       JSON lines; nothing is exported if empty.
+#
+# Process:
+#   - Starts a trace (common/tracing.py) when the request starts; every
+#     resolver with its own resolver function becomes a span, and the OMDb
+#     pages, cache lookups and detail fetches it causes become spans nested
+#     under it. Default resolvers (plain dict lookups) aren't traced.
+#   - Adds the trace to the response `extensions.tracing` in the Apollo
+#     tracing format (version 1), where the resolvers are listed under
+#     `execution.resolvers`. The nested upstream spans are added under
+#     `tracing.spans`, with the id of their parent span.
+###########################################################################
+class TracingExtension(Extension):
+    def __init__(self, export_path=""):
+        self.export_path = export_path
+        self.trace = None
+        self._token = None
+
+    def request_started(self, context):
+        self.trace, self._token = begin_trace()
+
+    def request_finished(self, context):
+        if self._token is not None:
+            end_trace(self._token)
+            self._token = None
+            if self.export_path:
+                export_spans(self.trace, self.export_path)
+
+    def resolve(self, next_, obj, info, **kwargs):
+        if self.trace is None or not should_trace(info):
+            return next_(obj, info, **kwargs)
+
+        attributes = {"path": format_path(info.path), "parentType": str(info.parent_type),
+                      "fieldName": info.field_name, "returnType": str(info.return_type)}
+
+        if iscoroutinefunction(next_):
+            async def resolve_async():
+                with span("graphql.resolve", **attributes):
+                    result = await next_(obj, info, **kwargs)
+                    if is_awaitable(result):
+                        result = await result
+                    return result
+            return resolve_async()
+
+        with span("graphql.resolve", **attributes):
+            return next_(obj, info, **kwargs)
+
+    def format(self, context):
+        if self.trace is None:
+            return {}
+        if self.trace.end is None:
+            self.trace.finish()
+        return {"tracing": apollo_tracing(self.trace)}
+
+
+###########################################################################
+# Purpose:
+#   Shape a finished trace like Apollo tracing (version 1).
+#
+# Returns:
+#   dict: startTime/endTime/duration of the request, the resolvers with their
+#   start offset and duration (in nanoseconds) and `spanId`, and the other
+#   spans of the request.
+###########################################################################
+def apollo_tracing(trace):
+    duration = trace.end - trace.start
+    resolvers, spans = [], []
+    for record in sorted(trace.spans, key=lambda record: record["start"]):
+        if record["name"] == "graphql.resolve":
+            resolvers.append(dict(record["attributes"], spanId=record["span_id"],
+                                  startOffset=record["start"], duration=record["duration"]))
+        else:
+            spans.append({"name": record["name"], "spanId": record["span_id"],
+                          "parentId": record["parent_id"], "startOffset": record["start"],
+                          "duration": record["duration"], "attributes": record["attributes"]})
+    return {
+        "version": 1,
+        "startTime": _timestamp(trace.start_time),
+        "endTime": _timestamp(trace.start_time + duration / 1e9),
+        "duration": duration,
+        "parsing": {"startOffset": 0, "duration": 0},
+        "validation": {"startOffset": 0, "duration": 0},
+        "execution": {"resolvers": resolvers},
+        "spans": spans,
+    }
+
+
+###########################################################################
+# Purpose:
+#   Append the spans of a trace to `path`, one JSON object per line, with
+#   the fields of an OpenTelemetry span (trace and span ids, parent, start
+#   and end in Unix nanoseconds, attributes and the service name), so they
+#   can be loaded into a trace viewer or an OTel collector's file receiver.
+###########################################################################
+def export_spans(trace, path):
+    start_ns = int(trace.start_time * 1e9)
+    lines = []
+    for record in trace.spans:
+        attributes = {key: value if isinstance(value, (str, int, float, bool)) else json.dumps(value)
+                      for key, value in record["attributes"].items()}
+        lines.append(json.dumps({
+            "traceId": trace.trace_id,
+            "spanId": record["span_id"],
+            "parentSpanId": record["parent_id"] or "",
+            "name": record["name"],
+            "kind": "SPAN_KIND_INTERNAL",
+            "startTimeUnixNano": start_ns + record["start"],
+            "endTimeUnixNano": start_ns + record["start"] + record["duration"],
+            "attributes": attributes,
+            "resource": {"service.name": settings.SERVICE_NAME},
+        }))
+    if not lines:
+        return
+    with _export_lock, open(path, "a", encoding="utf-8") as export_file:
+        export_file.write("\n".join(lines) + "\n")
+
+
+###########################################################################
+# Purpose:
+#   Extensions to run a request with, from the `GRAPHQL_TRACING` mode:
+#   "off", "on" (every request) or "header" (requests sending
+#   `X-GraphQL-Tracing: 1`).
+#
+# Returns:
+#   list | None: The tracing extension factory, or None when not traced.
+###########################################################################
+def tracing_extensions(headers, mode, export_path=""):
+    if mode == "on" or (mode == "header" and headers.get(TRACING_HEADER) in ("1", "true")):
+        return [lambda: TracingExtension(export_path)]
+    return None
@@ -0,0 +1,116 @@
+import argparse
+import os
+import random
+import threading
+import time
+
+from flask import Flask, jsonify, request
+
+from catalog import Catalog
+
+
+app = Flask(__name__)
+app.config.update(
+    OMDB_STUB_SEED=int(os.getenv("OMDB_STUB_SEED", 42)),
+    OMDB_STUB_LATENCY_MS=float(os.getenv("OMDB_STUB_LATENCY_MS", 0)),
+    OMDB_STUB_JITTER_MS=float(os.getenv("OMDB_STUB_JITTER_MS", 0)),
+    OMDB_STUB_ERROR_RATE=float(os.getenv("OMDB_STUB_ERROR_RATE", 0)),
+    OMDB_STUB_LIMIT_RATE=float(os.getenv("OMDB_STUB_LIMIT_RATE", 0)),
+    OMDB_STUB_MIN_MOVIES=int(os.getenv("OMDB_STUB_MIN_MOVIES", 50)),
+    OMDB_STUB_MAX_MOVIES=int(os.getenv("OMDB_STUB_MAX_MOVIES", 300)),
+)
+
+catalog = None
+# Random generator of the injected latency and errors, seeded like the catalog
+# so that runs with the same settings see the same sequence of faults.
+faults = random.Random()
+faults_lock = threading.Lock()
+
+
+def build_catalog():
+    global catalog
+    catalog = Catalog(seed=app.config["OMDB_STUB_SEED"],
+                      min_movies=app.config["OMDB_STUB_MIN_MOVIES"],
+                      max_movies=app.config["OMDB_STUB_MAX_MOVIES"])
+    faults.seed(app.config["OMDB_STUB_SEED"])
+
+
+build_catalog()
+
+
+###########################################################################
+# Purpose:
+#   Local stand-in for http://www.omdbapi.com, so the REST and GraphQL
+#   services can be benchmarked offline and reproducibly. Point the services
+#   at it with OMDB_API_URL=http://127.0.0.1:5001.
+#
+# Parameters (query string, as in OMDb):
+#   s, y, page: search by title word and year, 10 results per page like OMDb.
+#   t (and optional y): detail lookup by title.
+#   i: detail lookup by IMDb id.
+#   The `apikey` parameter is accepted and ignored.
+#
+# Process:
+#   - Sleeps `OMDB_STUB_LATENCY_MS` plus a uniform jitter of up to
+#     +/- `OMDB_STUB_JITTER_MS` to simulate the network and OMDb itself.
+#   - Fails a share `OMDB_STUB_ERROR_RATE` of the requests with a 503, and a
+#     share `OMDB_STUB_LIMIT_RATE` with OMDb's "Request limit reached!" body.
+#   - Answers everything else from the seeded synthetic catalog.
+#
+# Returns:
+#   JSON shaped like the OMDb API response.
+###########################################################################
+@app.route("/", methods=["GET"])
+def omdb():
+    latency = app.config["OMDB_STUB_LATENCY_MS"]
+    jitter = app.config["OMDB_STUB_JITTER_MS"]
+    with faults_lock:
+        delay = max(0.0, latency + faults.uniform(-jitter, jitter)) / 1000
+        draw = faults.random()
+    if delay:
+        time.sleep(delay)
+
+    if draw < app.config["OMDB_STUB_ERROR_RATE"]:
+        return jsonify({"Response": "False", "Error": "Service unavailable"}), 503
+    if draw < app.config["OMDB_STUB_ERROR_RATE"] + app.config["OMDB_STUB_LIMIT_RATE"]:
+        return jsonify({"Response": "False", "Error": "Request limit reached!"}), 401
+
+    args = request.args
+    if args.get("i"):
+        return jsonify(catalog.by_id(args["i"]))
+    if args.get("t"):
+        return jsonify(catalog.by_title(args["t"], args.get("y")))
+    if args.get("s"):
+        try:
+            page = int(args.get("page", 1))
+        except ValueError:
+            page = 1
+        if not 1 <= page <= 100:
+            return jsonify({"Response": "False", "Error": "The page number must be between 1 and 100."})
+        return jsonify(catalog.search(args["s"], args.get("y"), page))
+    return jsonify({"Response": "False", "Error": "No API key provided."}), 401
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OMDb stand-in server")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--seed", type=int, default=app.config["OMDB_STUB_SEED"])
+    parser.add_argument("--latency-ms", type=float, default=app.config["OMDB_STUB_LATENCY_MS"])
+    parser.add_argument("--jitter-ms", type=float, default=app.config["OMDB_STUB_JITTER_MS"])
+    parser.add_argument("--error-rate", type=float, default=app.config["OMDB_STUB_ERROR_RATE"])
+    parser.add_argument("--limit-rate", type=float, default=app.config["OMDB_STUB_LIMIT_RATE"])
+    parser.add_argument("--min-movies", type=int, default=app.config["OMDB_STUB_MIN_MOVIES"])
+    parser.add_argument("--max-movies", type=int, default=app.config["OMDB_STUB_MAX_MOVIES"])
+    options = parser.parse_args()
+
+    app.config.update(
+        OMDB_STUB_SEED=options.seed,
+        OMDB_STUB_LATENCY_MS=options.latency_ms,
+        OMDB_STUB_JITTER_MS=options.jitter_ms,
+        OMDB_STUB_ERROR_RATE=options.error_rate,
+        OMDB_STUB_LIMIT_RATE=options.limit_rate,
+        OMDB_STUB_MIN_MOVIES=options.min_movies,
+        OMDB_STUB_MAX_MOVIES=options.max_movies,
+    )
+    build_catalog()
+    app.run(port=options.port, threaded=True)
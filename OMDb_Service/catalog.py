@@ -0,0 +1,119 @@
+import random
+import threading
+
+
+ADJECTIVES = ["Silent", "Broken", "Golden", "Hidden", "Last", "Midnight", "Crimson", "Lost",
+              "Electric", "Frozen", "Wild", "Secret", "Distant", "Burning", "Quiet", "Savage"]
+NOUNS = ["River", "Empire", "Garden", "Signal", "Horizon", "Machine", "Harbor", "Kingdom",
+         "Shadow", "Voyage", "Station", "Orchard", "Frontier", "Mirror", "Storm", "Citadel"]
+GENRES = ["Action", "Adventure", "Comedy", "Crime", "Drama", "Fantasy", "Horror",
+          "Mystery", "Romance", "Sci-Fi", "Thriller", "Animation", "Documentary"]
+FIRST_NAMES = ["Alex", "Maya", "Jonas", "Priya", "Lena", "Omar", "Sofia", "Noah", "Aiko",
+               "Mateo", "Zara", "Ivan", "Chloe", "Ravi", "Elena", "Kofi"]
+LAST_NAMES = ["Stone", "Kapoor", "Novak", "Reyes", "Larsen", "Haddad", "Moreau", "Okafor",
+              "Tanaka", "Silva", "Brennan", "Petrov", "Walsh", "Mehta", "Costa", "Berg"]
+LANGUAGES = ["English", "Hindi", "French", "Spanish", "Japanese", "German", "Korean"]
+COUNTRIES = ["United States", "India", "France", "Spain", "Japan", "Germany", "South Korea"]
+TYPES = ["movie", "movie", "movie", "series", "episode"]
+# Search results per page. OMDb always answers 10, and the services count
+# pages and cursor windows with that size (`common.omdb.PAGE_SIZE`).
+PAGE_SIZE = 10
+
+
+###########################################################################
+# Purpose:
+#   Seeded synthetic movie catalog answering like the OMDb API.
+#
+# Parameters:
+#   seed (int): Seed of the catalog; the same seed always gives the same movies.
+#   min_movies, max_movies (int): Range of the number of movies of one year.
+#
+# Process:
+#   - The movies of a year are generated the first time the year is asked
+#     for, from a random generator seeded with (seed, year), so the catalog
+#     does not depend on the order of the requests.
+#   - Every title contains the word "Movie", so the services' `s=movie`
+#     search finds the whole year.
+###########################################################################
+class Catalog:
+    def __init__(self, seed=42, min_movies=50, max_movies=300):
+        self.seed = seed
+        self.min_movies = min_movies
+        self.max_movies = max_movies
+        self._years = {}
+        self._by_id = {}
+        self._by_title = {}
+        self._lock = threading.Lock()
+
+    def _year(self, year):
+        with self._lock:
+            return self._generate_year(year)
+
+    def _generate_year(self, year):
+        movies = self._years.get(year)
+        if movies is None:
+            rng = random.Random(f"{self.seed}-{year}")
+            movies = [self._movie(rng, year, index)
+                      for index in range(rng.randint(self.min_movies, self.max_movies))]
+            for movie in movies:
+                self._by_id[movie["imdbID"]] = movie
+                self._by_title.setdefault(movie["Title"].lower(), movie)
+            self._years[year] = movies
+        return movies
+
+    def _movie(self, rng, year, index):
+        director = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        actors = ", ".join(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(3))
+        title = f"The {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} Movie {index + 1}"
+        imdb_id = f"tt{year:04d}{index:04d}"
+        return {
+            "Title": title,
+            "Year": str(year),
+            "imdbID": imdb_id,
+            "Type": rng.choice(TYPES),
+            "Poster": f"https://img.example.com/{imdb_id}.jpg" if rng.random() < 0.8 else "N/A",
+            "Rated": rng.choice(["G", "PG", "PG-13", "R"]),
+            "Runtime": f"{rng.randint(80, 180)} min",
+            "Genre": ", ".join(rng.sample(GENRES, rng.randint(1, 3))),
+            "Director": director,
+            "Actors": actors,
+            "Plot": f"A {rng.choice(ADJECTIVES).lower()} story about a {rng.choice(NOUNS).lower()}.",
+            "Language": rng.choice(LANGUAGES),
+            "Country": rng.choice(COUNTRIES),
+            "Awards": rng.choice(["N/A", f"{rng.randint(1, 9)} wins & {rng.randint(1, 20)} nominations"]),
+            "Ratings": [
+                {"Source": "Internet Movie Database", "Value": f"{rng.randint(10, 95) / 10}/10"},
+                {"Source": "Rotten Tomatoes", "Value": f"{rng.randint(5, 100)}%"}
+            ],
+            "imdbRating": f"{rng.randint(10, 95) / 10}",
+            "Response": "True"
+        }
+
+    # Answer an OMDb search (`s=`, optional `y=` and `page=`).
+    def search(self, term, year, page):
+        if not year:
+            return {"Response": "False", "Error": "Too many results."}
+        term = term.lower()
+        matches = [movie for movie in self._year(int(year)) if term in movie["Title"].lower()]
+        start = (page - 1) * PAGE_SIZE
+        results = matches[start:start + PAGE_SIZE]
+        if not results:
+            return {"Response": "False", "Error": "Movie not found!"}
+        return {
+            "Search": [{key: movie[key] for key in ("Title", "Year", "imdbID", "Type", "Poster")}
+                       for movie in results],
+            "totalResults": str(len(matches)),
+            "Response": "True"
+        }
+
+    # Answer an OMDb detail lookup by IMDb id (`i=`).
+    def by_id(self, imdb_id):
+        if imdb_id[2:6].isdigit():
+            self._year(int(imdb_id[2:6]))
+        return self._by_id.get(imdb_id) or {"Response": "False", "Error": "Incorrect IMDb ID."}
+
+    # Answer an OMDb detail lookup by title (`t=`, optional `y=`).
+    def by_title(self, title, year=None):
+        if year:
+            self._year(int(year))
+        return self._by_title.get(title.lower()) or {"Response": "False", "Error": "Movie not found!"}
@@ -1,13 +1,104 @@
-from flask import Flask, render_template, request
-from controllers import get_movies,fetch_movies_by_year,fetch_all_movies, plot_movies_performance, fetch_movies_by_years
+from flask import Flask, Response, jsonify, render_template, request, stream_with_context, url_for
+from controllers import get_movies,fetch_all_movies, plot_movies_performance, fetch_movies_by_years, stream_movies_by_years, fetch_movies_window, parse_fields
+import json
 import os
 import requests
+from common.catalog import get_catalog
+from common.metrics import CONTENT_TYPE, instrument_flask, render_metrics
+from common.movies import movie_dicts
+from common.omdb import year_range
+from common.plots import PlotRenderer
+from common.refresher import refresher_status, start_refresher
+from common.resilience import begin_stale_tracking, stale_keys
+from common.settings import settings
 
 #app = Flask(__name__)
 app = Flask(__name__,)
 
 
 app.config.from_object('config.Config')
+settings.configure(app.config)
+# Request latency, in-flight requests and template render times for `/metrics`.
+instrument_flask(app)
+
+# Performance plots are rendered off the request thread and cached in static/plots.
+plot_renderer = PlotRenderer("rest", os.path.join(app.static_folder, "plots"), "/static/plots")
+
+# With the debug reloader, `python app.py` runs this module both in a watcher
+# process and in the serving process; only the serving one refreshes.
+if __name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+    start_refresher()
+
+
+# Responses built from OMDb data served stale (past its cache TTL, while it
+# is fetched again in the background) carry an `X-Data-Stale` header.
+@app.before_request
+def start_stale_tracking():
+    begin_stale_tracking()
+
+
+@app.after_request
+def flag_stale_response(response):
+    if stale_keys():
+        response.headers["X-Data-Stale"] = "true"
+    return response
+
+
+# True if the client asked for NDJSON instead of an HTML page.
+def wants_ndjson():
+    return (request.args.get('format') == 'ndjson'
+            or request.accept_mimetypes.best_match(['text/html', 'application/x-ndjson']) == 'application/x-ndjson')
+
+
+# True if the client asked for one page of a movie list (`limit` or `cursor`).
+def wants_page():
+    return 'limit' in request.args or 'cursor' in request.args
+
+
+###########################################################################
+# Purpose:
+#   Answer a movie list route with one page of the movies of `years`.
+#
+# Parameters:
+#   years (iterable): The release years listed, oldest first.
+#   fields (list): Movie fields to return; all of them if None.
+#   as_json (bool): Answer JSON (the `/api` routes) instead of HTML.
+#
+# Process:
+#   - Reads the `limit` and `cursor` query parameters, and fetches only the
+#     OMDb pages holding that page (see `fetch_movies_window`).
+#   - Renders the page as HTML, with a link to the next one, as JSON (with
+#     `next_cursor`) or as NDJSON; all carry the url of the next page in a
+#     `Link: <...>; rel="next"` header, absent on the last page.
+#
+# Returns:
+#   Response: The page, or a 400 for an invalid year or cursor.
+###########################################################################
+def movies_page_response(years, fields=None, as_json=False):
+    try:
+        years = [int(year) for year in years]
+    except ValueError:
+        return jsonify({"error": f"Invalid year: {', '.join(str(year) for year in years)!r}"}), 400
+    cursor = request.args.get('cursor') or None
+    try:
+        movies_list, next_cursor = fetch_movies_window(years, request.args.get('limit', type=int), cursor, fields)
+    except ValueError:
+        return jsonify({"error": f"Invalid cursor: {cursor!r}"}), 400
+
+    next_url = None
+    if next_cursor is not None:
+        next_url = url_for(request.endpoint, **{**request.args.to_dict(), "cursor": next_cursor, **request.view_args})
+    if wants_ndjson():
+        response = Response("".join(json.dumps(movie_item.to_dict()) + "\n" for movie_item in movies_list),
+                            mimetype='application/x-ndjson')
+    elif as_json:
+        response = jsonify({"count": len(movies_list), "movies": movie_dicts(movies_list), "next_cursor": next_cursor})
+    else:
+        response = Response(render_template('movies.html', movies=movies_list, next_url=next_url))
+    if next_url is not None:
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return response
+
 
 ##########################################################################
 # Its a REST Routing function which can be called as http://localhost/movies/<year>
@@ -18,7 +109,10 @@ app.config.from_object('config.Config')
 # - year (str): The release year of the movies to fetch, passed as a URL parameter.
 
 # Process:
-# - Calls `fetch_all_movies` function with the `year` parameter to retrieve the list of movies.
+# - With `?limit=<n>` and/or `?cursor=<cursor>`, answers one page of the movies only
+#   (see `movies_page_response`).
+# - Calls `fetch_all_movies` function with the `year` parameter to retrieve the list of movies,
+#   served from the local catalog when it holds a fresh copy of the year.
 # - Renders the 'movies.html' template with the fetched movies list.
 
 # Returns:
@@ -26,8 +120,10 @@ app.config.from_object('config.Config')
 ###########################################################################
 @app.route('/movies/<year>', methods=['GET'])
 def get_all_movies(year):
+    if wants_page():
+        return movies_page_response([year])
     #year = getattr
-    movies_list, _ = fetch_all_movies(year) #(fetch_movies_by_year)
+    movies_list, _ = fetch_all_movies(year)
     return render_template('movies.html', movies=movies_list)
 
 
@@ -40,20 +136,90 @@ def get_all_movies(year):
 # - years (str): A number of years for which movies to be extracted, passed as a URL parameter.
 
 # Process:
-# - Calls `fetch_movies_by_years` function with the `years` parameter to retrieve the list of movies 
-#   released in last number of specified years.
+# - With `?limit=<n>` and/or `?cursor=<cursor>`, answers one page of the movies only, as
+#   HTML or NDJSON (see `movies_page_response`).
+# - With `?format=ndjson` (or `Accept: application/x-ndjson`), streams the movies as NDJSON,
+#   one movie per line, year by year as they are fetched (see `stream_movies_by_years`).
+# - Otherwise calls `fetch_movies_by_years` function with the `years` parameter to retrieve the
+#   list of movies released in last number of specified years.
 # - Renders the 'movies.html' template with the fetched movies list.
 
 # Returns:
-# - A rendered HTML page displaying the list of movies for the specified years.
+# - A rendered HTML page displaying the list of movies for the specified years, or the NDJSON stream.
 ###########################################################################
 @app.route('/moviesforyears/<years>', methods=['GET'])
 def get_movies_by_years(years):
+    if wants_page():
+        try:
+            return movies_page_response(year_range(years))
+        except ValueError:
+            return jsonify({"error": f"Invalid number of years: {years!r}"}), 400
+    if wants_ndjson():
+        return Response(stream_with_context(stream_movies_by_years(years)), mimetype='application/x-ndjson')
     #year = getattr
-    movies_list = fetch_movies_by_years(years) #(fetch_movies_by_year)
+    movies_list = fetch_movies_by_years(years)
     return render_template('movies.html', movies=movies_list)
 
 
+###########################################################################
+# Purpose:
+#   JSON variant of `/movies/<year>`, e.g. /api/movies/2020?fields=title,year,poster
+#
+# Process:
+#   - Builds only the movie fields of the `fields` sparse fieldset (all of
+#     them if missing), and fetches the movie detail records only when a
+#     detail field is asked for, like the GraphQL `allMovies` resolver.
+#   - Takes the `limit` and `cursor` page parameters of `/movies/<year>`.
+#
+# Returns:
+#   JSON: {"count", "movies"} (plus "next_cursor" for a page), or a 400 for
+#   an unknown field or an invalid cursor.
+###########################################################################
+@app.route('/api/movies/<year>', methods=['GET'])
+def api_movies(year):
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+    if wants_page():
+        return movies_page_response([year], fields, as_json=True)
+    movies_list, _ = fetch_all_movies(year, fields=fields)
+    return jsonify({"count": len(movies_list), "movies": movie_dicts(movies_list)})
+
+
+###########################################################################
+# Purpose:
+#   JSON variant of `/moviesforyears/<years>`, with the same `fields`
+#   sparse fieldset as `/api/movies/<year>`.
+#
+# Process:
+#   - With `limit`/`cursor`, answers one page of the movies.
+#   - With `?format=ndjson` (or `Accept: application/x-ndjson`), streams the
+#     movies as NDJSON, year by year.
+#   - Otherwise answers all the movies of the years as one JSON document.
+#
+# Returns:
+#   JSON | NDJSON: The movies, or a 400 for an unknown field, an invalid
+#   number of years or an invalid cursor.
+###########################################################################
+@app.route('/api/moviesforyears/<years>', methods=['GET'])
+def api_movies_by_years(years):
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+    try:
+        year_list = year_range(years)
+    except ValueError:
+        return jsonify({"error": f"Invalid number of years: {years!r}"}), 400
+    if wants_page():
+        return movies_page_response(year_list, fields, as_json=True)
+    if wants_ndjson():
+        return Response(stream_with_context(stream_movies_by_years(years, fields)), mimetype='application/x-ndjson')
+    movies_list = fetch_movies_by_years(years, fields=fields)
+    return jsonify({"count": len(movies_list), "movies": movie_dicts(movies_list)})
+
+
 ###########################################################################
 # Its a REST Routing function which can be called as http://localhost/performancebyyears/<years>
 # The purpose of the function is to generate and display a performance plot 
@@ -64,21 +230,79 @@ def get_movies_by_years(years):
 #   passed as a URL parameter.
 
 # Process:
-# - Calls `plot_movies_performance` function with the `years` parameter to generate a plot showing 
-#   the performance of movies over the specified number of years.
-# - Receives the file path of the generated plot.
-# - Renders the 'performance.html' template with the plot file path as `plot_url`.
+# - Asks the plot renderer for the plot of the `years` parameter. It returns at once: the
+#   plot is rendered by a background worker the first time, then served from its cached file.
+# - Renders the 'performance.html' template with the plot url once the plot is done, or with
+#   the render job (the page reloads itself until the plot is ready).
 
 # Returns:
 # - A rendered HTML page displaying the performance plot for the specified years.
 ###########################################################################
 @app.route('/performancebyyears/<years>')
 def movies_performance(years):
-    #num_year = 5  # Define the number of years to fetch data for
-    plot_filename = plot_movies_performance(years)  # Call the function and get the plot file path
-    
-    print(plot_filename)
-    return render_template('performance.html', plot_url=plot_filename)
+    job = plot_renderer.request_plot(years)
+    plot_url = job.url if job.status == "done" else None
+    return render_template('performance.html', plot_url=plot_url, job=job)
+
+
+###########################################################################
+# Purpose:
+#   Report the status of a performance plot render job.
+#
+# Returns:
+#   JSON: The job id, its status ("pending", "done" or "failed") and the
+#   plot url, or a 404 for an unknown job.
+###########################################################################
+@app.route('/plots/<job_id>', methods=['GET'])
+def plot_job(job_id):
+    job = plot_renderer.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown plot job"}), 404
+    return jsonify(job.to_dict())
+
+
+###########################################################################
+# Purpose:
+#   Show the schedule of the background refresher that keeps the most recent
+#   years' OMDb search pages in the cache (see common/refresher.py).
+#
+# Returns:
+#   JSON: The refreshed years with their page count, last and next refresh
+#   times and last error.
+###########################################################################
+@app.route('/refresher', methods=['GET'])
+def refresher():
+    return jsonify(refresher_status())
+
+
+###########################################################################
+# Purpose:
+#   Search the titles of the movies in the local catalog, e.g.
+#   /catalog/search?q=star+wa (every word matches as a prefix).
+#
+# Returns:
+#   JSON: The matching movies as OMDb records, best matches first (at most
+#   `limit`, 20 by default), or a 404 when the catalog is off.
+###########################################################################
+@app.route('/catalog/search', methods=['GET'])
+def catalog_search():
+    catalog = get_catalog()
+    if catalog is None:
+        return jsonify({"error": "The movie catalog is off"}), 404
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    return jsonify(catalog.search(request.args.get('q', ''), max(limit, 1)))
+
+
+###########################################################################
+# Purpose:
+#   Expose the metrics of the service in the Prometheus text format: request
+#   latency by route, OMDb request latency by endpoint, cache hit ratio,
+#   in-flight requests, connection pool saturation and template render
+#   times (see common/metrics.py).
+###########################################################################
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_metrics(), content_type=CONTENT_TYPE)
 
 
 
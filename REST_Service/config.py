@@ -1,6 +1,37 @@
 import os
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 class Config:
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///data.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Name recorded with the OMDb fetch timings of this service
+    SERVICE_NAME = "rest"
+
+    # OMDb upstream settings, applied to the shared client by `app.py`
+    OMDB_API_URL = os.getenv("OMDB_API_URL", "http://www.omdbapi.com")
+    OMDB_PAGE_CONCURRENCY = int(os.getenv("OMDB_PAGE_CONCURRENCY", 4))
+    OMDB_YEAR_CONCURRENCY = int(os.getenv("OMDB_YEAR_CONCURRENCY", 5))
+    OMDB_DETAIL_CONCURRENCY = int(os.getenv("OMDB_DETAIL_CONCURRENCY", 8))
+    OMDB_POOL_SIZE = int(os.getenv("OMDB_POOL_SIZE", 20))
+    OMDB_CONNECT_TIMEOUT = float(os.getenv("OMDB_CONNECT_TIMEOUT", 3.05))
+    OMDB_READ_TIMEOUT = float(os.getenv("OMDB_READ_TIMEOUT", 10))
+    OMDB_RETRIES = int(os.getenv("OMDB_RETRIES", 2))
+    OMDB_RETRY_BACKOFF = float(os.getenv("OMDB_RETRY_BACKOFF", 0.2))
+    OMDB_BREAKER_FAILURES = int(os.getenv("OMDB_BREAKER_FAILURES", 5))
+    OMDB_BREAKER_RESET = float(os.getenv("OMDB_BREAKER_RESET", 30))
+    OMDB_MAX_PAGES = int(os.getenv("OMDB_MAX_PAGES", 100))
+    OMDB_CACHE_BACKEND = os.getenv("OMDB_CACHE_BACKEND", "memory")
+    OMDB_CACHE_TTL = float(os.getenv("OMDB_CACHE_TTL", 3600))
+    OMDB_CACHE_STALE_TTL = float(os.getenv("OMDB_CACHE_STALE_TTL", 86400))
+    OMDB_CACHE_MAX_ENTRIES = int(os.getenv("OMDB_CACHE_MAX_ENTRIES", 2048))
+    OMDB_CACHE_PATH = os.getenv("OMDB_CACHE_PATH", os.path.join(PROJECT_ROOT, "data.db"))
+    OMDB_TIMINGS_PATH = os.getenv("OMDB_TIMINGS_PATH", os.path.join(PROJECT_ROOT, "timings.db"))
+    OMDB_TIMINGS_RETENTION = float(os.getenv("OMDB_TIMINGS_RETENTION", 7 * 86400))
+    CATALOG_DATABASE_URL = os.getenv("CATALOG_DATABASE_URL", f"sqlite:///{os.path.join(PROJECT_ROOT, 'catalog.db')}")
+    CATALOG_TTL = float(os.getenv("CATALOG_TTL", OMDB_CACHE_TTL))
+    OMDB_REFRESH_YEARS = int(os.getenv("OMDB_REFRESH_YEARS", 0))
+    OMDB_REFRESH_AHEAD = float(os.getenv("OMDB_REFRESH_AHEAD", 300))
+    OMDB_REFRESH_RATE = float(os.getenv("OMDB_REFRESH_RATE", 2))
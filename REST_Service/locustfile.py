@@ -1,18 +1,18 @@
-from locust import HttpUser, TaskSet, task, between
+import os
+import sys
 
-class RestApiUser(HttpUser):
-    host = "http://localhost:5000" 
+# The Locust scenarios are shared with the GraphQL service and live in the
+# top-level `benchmark` folder.
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmark")
+if BENCHMARK_DIR not in sys.path:
+    sys.path.append(BENCHMARK_DIR)
 
-    wait_time = between(1, 5)  # Simulates time between tasks (1 to 5 seconds)
+from load_scenarios import RestUser
 
 
-    @task(1)
-    def get_all_movies(self):
-        self.client.get("/movies/2023")  # Replace with a year parameter
+class RestApiUser(RestUser):
+    host = "http://localhost:5000"
 
-    @task(1)
-    def get_movie_by_years(self):
-        self.client.get("/moviesforyears/1") 
 
-
-# python3 -m locust --host=http://127.0.0.1:5000
\ No newline at end of file
+# python3 -m locust --host=http://127.0.0.1:5000
+# python3 -m locust --headless -u 20 -r 5 -t 2m --slo-p95-ms 2000
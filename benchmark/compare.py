@@ -0,0 +1,78 @@
+import argparse
+import json
+import sys
+
+
+# Metrics compared between two runs, and whether a higher value is worse.
+COMPARED_METRICS = {
+    "latency_p50_ms": True,
+    "latency_p95_ms": True,
+    "latency_p99_ms": True,
+    "throughput_rps": False,
+    "error_rate": True,
+    "response_bytes": True,
+}
+
+
+def cell_key(result):
+    return (result["service"], result["scenario"], result["num_years"],
+            result["fields"], result["concurrency"])
+
+
+###########################################################################
+# Purpose:
+#   Compare two benchmark runs (JSON files written by run.py), e.g. the one
+#   of the main branch and the one of a change.
+#
+# Process:
+#   - Matches the cells of both runs by service, scenario, years, field set
+#     and concurrency.
+#   - A metric regresses when it got worse by more than `threshold` percent
+#     AND the 95% confidence intervals of both runs don't overlap, so noise
+#     within the measured spread is not reported.
+#
+# Returns:
+#   list[dict]: The regressions found.
+###########################################################################
+def compare(baseline, candidate, threshold):
+    baseline_cells = {cell_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in candidate["results"]:
+        previous = baseline_cells.get(cell_key(result))
+        if previous is None:
+            continue
+        for metric, higher_is_worse in COMPARED_METRICS.items():
+            old = previous["summary"][metric]
+            new = result["summary"][metric]
+            if old["mean"] is None or new["mean"] is None:
+                continue
+            change = (new["mean"] - old["mean"]) / old["mean"] * 100 if old["mean"] else 0.0
+            if higher_is_worse:
+                worse = change > threshold and new["ci95_low"] > old["ci95_high"]
+            else:
+                worse = -change > threshold and new["ci95_high"] < old["ci95_low"]
+            if worse:
+                regressions.append({"cell": cell_key(result), "metric": metric,
+                                    "baseline": old["mean"], "candidate": new["mean"],
+                                    "change_pct": change})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark runs")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=5.0, help="minimum change in percent")
+    options = parser.parse_args()
+
+    with open(options.baseline) as baseline_file, open(options.candidate) as candidate_file:
+        regressions = compare(json.load(baseline_file), json.load(candidate_file), options.threshold)
+
+    for regression in regressions:
+        service, scenario, num_years, fields, concurrency = regression["cell"]
+        print(f"REGRESSION {service} {scenario} years={num_years} fields={fields} c={concurrency} "
+              f"{regression['metric']}: {regression['baseline']:.2f} -> {regression['candidate']:.2f} "
+              f"({regression['change_pct']:+.1f}%)")
+    if not regressions:
+        print("no regression")
+    sys.exit(1 if regressions else 0)
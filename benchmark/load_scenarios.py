@@ -0,0 +1,150 @@
+###########################################################################
+# Shared Locust scenario library of the REST and GraphQL services.
+#
+# Both users run the same weighted mix of questions from workloads.py. The
+# REST side asks the JSON API for the same movie fields the GraphQL query
+# selects, so both services make the same OMDb lookups (search pages, plus
+# the detail lookups of detail fields) and can be compared request name by
+# request name. The locustfiles of the two services, and the
+# combined benchmark/locustfile.py, only pick a user class from here.
+#
+# Headless runs end with an SLO check: when the 95th/99th percentile latency
+# or the failure ratio of a service is over its threshold, Locust exits with
+# status 1, so a load test can gate a deployment:
+#
+#   locust --headless -u 20 -r 5 -t 2m --slo-p95-ms 2000 --slo-fail-ratio 0.01
+###########################################################################
+from locust import HttpUser, between, events
+from locust.stats import StatsEntry
+
+from workloads import FIELD_SETS, SCENARIOS
+
+
+# Weighted mix of (scenario, num_years, field set) run by every user. The
+# `full` one-year entry stands for the `/moviesforyears/1` task of the
+# original locustfile. Its detail fields cost more than the default
+# GRAPHQL_MAX_COST, so start the GraphQL service with a higher budget.
+MIX = [
+    {"scenario": "movies_for_years_json", "num_years": 0, "fields": "summary", "weight": 3},
+    {"scenario": "movies_for_years_json", "num_years": 1, "fields": "full", "weight": 1},
+]
+
+
+@events.init_command_line_parser.add_listener
+def add_slo_arguments(parser):
+    parser.add_argument("--slo-p95-ms", type=float, default=0, env_var="LOCUST_SLO_P95_MS",
+                        help="Fail the run when the 95th percentile latency is over this (0 = off)")
+    parser.add_argument("--slo-p99-ms", type=float, default=0, env_var="LOCUST_SLO_P99_MS",
+                        help="Fail the run when the 99th percentile latency is over this (0 = off)")
+    parser.add_argument("--slo-fail-ratio", type=float, default=0.01, env_var="LOCUST_SLO_FAIL_RATIO",
+                        help="Fail the run when the share of failed requests is over this")
+    parser.add_argument("--rest-host", default="", env_var="LOCUST_REST_HOST",
+                        help="Host of the REST service (combined locustfile)")
+    parser.add_argument("--graphql-host", default="", env_var="LOCUST_GRAPHQL_HOST",
+                        help="Host of the GraphQL service (combined locustfile)")
+
+
+def request_name(service, entry):
+    return f"{service} {entry['scenario']} years={entry['num_years']} fields={entry['fields']}"
+
+
+###########################################################################
+# Purpose:
+#   Build the Locust task of one mix entry for one service.
+#
+# Process:
+#   - Sends the request built by workloads.py with the service's HTTP
+#     session, named after the service and the mix entry so the statistics
+#     of both services line up.
+#   - GraphQL answers with status 200 even when the query failed, so a
+#     response with `errors` is marked as a failure.
+#   - Response bodies are not printed or kept, to not slow the load
+#     generator down.
+###########################################################################
+def make_task(service, entry):
+    request = SCENARIOS[entry["scenario"]][service](entry["num_years"], FIELD_SETS[entry["fields"]])
+    name = request_name(service, entry)
+
+    def run(user):
+        with user.client.request(request.method, request.path, json=request.json,
+                                 name=name, catch_response=True) as response:
+            if response.status_code >= 400:
+                response.failure(f"HTTP {response.status_code}")
+            elif service == "graphql":
+                try:
+                    errors = response.json().get("errors")
+                except ValueError:
+                    errors = "invalid JSON response"
+                if errors:
+                    response.failure(str(errors)[:200])
+    run.__name__ = name.replace(" ", "_")
+    return run
+
+
+def make_tasks(service):
+    return {make_task(service, entry): entry["weight"] for entry in MIX}
+
+
+# Base user of a service: takes its host from `--<service>-host` when given.
+class ServiceUser(HttpUser):
+    abstract = True
+    service = None
+    wait_time = between(1, 5)  # Simulates time between tasks (1 to 5 seconds)
+
+    def __init__(self, environment):
+        options = environment.parsed_options
+        host = getattr(options, f"{self.service}_host", "") if options is not None else ""
+        if host:
+            self.host = host
+        super().__init__(environment)
+
+
+class RestUser(ServiceUser):
+    abstract = True
+    service = "rest"
+    tasks = make_tasks("rest")
+
+
+class GraphQLUser(ServiceUser):
+    abstract = True
+    service = "graphql"
+    tasks = make_tasks("graphql")
+
+
+###########################################################################
+# Purpose:
+#   Check the SLOs when a run ends.
+#
+# Process:
+#   - Checks the 95th/99th percentile latency and the failure ratio of each
+#     service that sent requests (request names start with the service).
+#   - Prints every breached threshold and sets the exit code of Locust to 1.
+###########################################################################
+@events.quitting.add_listener
+def check_slos(environment, **kwargs):
+    options = environment.parsed_options
+    if options is None:
+        return
+
+    by_service = {}
+    for entry in environment.stats.entries.values():
+        by_service.setdefault(entry.name.split(" ", 1)[0], []).append(entry)
+
+    breaches = []
+    for service, entries in sorted(by_service.items()):
+        total = StatsEntry(environment.stats, service, None)
+        for entry in entries:
+            total.extend(entry)
+        if not total.num_requests:
+            continue
+        checks = [("p95", total.get_response_time_percentile(0.95), options.slo_p95_ms or None, "ms"),
+                  ("p99", total.get_response_time_percentile(0.99), options.slo_p99_ms or None, "ms"),
+                  ("failure ratio", total.fail_ratio, options.slo_fail_ratio, "")]
+        for label, value, limit, unit in checks:
+            if limit is not None and value > limit:
+                breaches.append(f"{service} {label} {value:.3g}{unit} > {limit:g}{unit}")
+
+    for breach in breaches:
+        print(f"SLO breached: {breach}")
+    if breaches:
+        environment.process_exit_code = 1
@@ -0,0 +1,30 @@
+from locust import LoadTestShape, events
+
+
+@events.init_command_line_parser.add_listener
+def add_step_arguments(parser):
+    parser.add_argument("--step-users", type=int, default=10, env_var="LOCUST_STEP_USERS",
+                        help="Users added at every step")
+    parser.add_argument("--step-seconds", type=int, default=30, env_var="LOCUST_STEP_SECONDS",
+                        help="Duration of one step")
+    parser.add_argument("--steps", type=int, default=5, env_var="LOCUST_STEPS",
+                        help="Number of steps before the run stops")
+
+
+###########################################################################
+# Purpose:
+#   Step load: adds `--step-users` users every `--step-seconds` seconds,
+#   `--steps` times, then stops the run. Latency is then reported for each
+#   load level of the same run, which shows where a service saturates.
+#
+#   Add it to any of the locustfiles:
+#       locust -f locustfile.py,../benchmark/locust_shapes.py --headless
+###########################################################################
+class StepLoadShape(LoadTestShape):
+    def tick(self):
+        options = self.runner.environment.parsed_options
+        step = int(self.get_run_time() // options.step_seconds)
+        if step >= options.steps:
+            return None
+        users = (step + 1) * options.step_users
+        return users, options.step_users
@@ -0,0 +1,16 @@
+from load_scenarios import GraphQLUser, RestUser
+
+
+###########################################################################
+# Runs the REST and the GraphQL users side by side, half of the users each,
+# so both services are measured under the same load at the same time:
+#
+#   locust --headless -u 40 -r 10 -t 5m \
+#       --rest-host http://127.0.0.1:5000 --graphql-host http://127.0.0.1:5002
+###########################################################################
+class RestApiUser(RestUser):
+    host = "http://localhost:5000"
+
+
+class GraphQLApiUser(GraphQLUser):
+    host = "http://localhost:5002"
@@ -0,0 +1,132 @@
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCHMARK_DIR)
+# The movies are generated by the OMDb stand-in's catalog.
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, "OMDb_Service")):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from catalog import Catalog
+from common.columns import MovieColumns
+from common.movies import split_names
+
+
+# The movie item as it was built before `MovieItem`: one dict per movie, with
+# fresh lists for the genre, the actors and the ratings.
+LEGACY_FIELDS = {
+    "id": lambda movie_data: movie_data.get("imdbID", "N/A"),
+    "title": lambda movie_data: movie_data.get("Title", "N/A"),
+    "year": lambda movie_data: movie_data.get("Year", "N/A"),
+    "genre": lambda movie_data: movie_data.get("Genre", "N/A").split(", "),
+    "director": lambda movie_data: movie_data.get("Director", "N/A"),
+    "actors": lambda movie_data: movie_data.get("Actors", "N/A").split(", "),
+    "plot": lambda movie_data: movie_data.get("Plot", "N/A"),
+    "language": lambda movie_data: movie_data.get("Language", "N/A"),
+    "country": lambda movie_data: movie_data.get("Country", "N/A"),
+    "awards": lambda movie_data: movie_data.get("Awards", "N/A"),
+    "ratings": lambda movie_data: [{"source": rating.get("Source"), "value": rating.get("Value")}
+                                   for rating in movie_data.get("Ratings", [])],
+    "poster": lambda movie_data: movie_data.get("Poster", "N/A")
+}
+
+
+def legacy_movie_items(records):
+    return [{name: build(movie_data) for name, build in LEGACY_FIELDS.items()} for movie_data in records]
+
+
+# Every movie as a `MovieItem`, as when a template or GraphQL list reads them all.
+def movie_item_rows(records):
+    return list(MovieColumns.from_records(records))
+
+
+###########################################################################
+# Purpose:
+#   Generate OMDb records of `num_years` years with the stand-in's catalog.
+#
+# Process:
+#   - The records go through a JSON round trip, so their strings are distinct
+#     objects like in decoded OMDb responses (no literal shared by accident).
+#   - "search" records hold the fields of OMDb search results; "detail"
+#     records the search fields merged with the detail fields.
+#
+# Returns:
+#   list: The records.
+###########################################################################
+def generate_records(kind, num_years, seed):
+    catalog = Catalog(seed=seed)
+    records = []
+    for year in range(2023 - num_years, 2024):
+        for movie in catalog._year(year):
+            if kind == "search":
+                movie = {key: movie[key] for key in ("Title", "Year", "imdbID", "Type", "Poster")}
+            records.append(movie)
+    return json.loads(json.dumps(records))
+
+
+###########################################################################
+# Purpose:
+#   Measure the memory held by the movie items `build` makes of `records`,
+#   and the time taken to build them.
+#
+# Process:
+#   - Traces the allocations while the items are built and keeps the bytes
+#     still allocated once they are all built (the items and everything they
+#     reference that wasn't there before), divided by the number of movies.
+#   - Times the build separately, without tracing, best of `repeat` runs.
+#
+# Returns:
+#   dict: Bytes per movie and build time per movie in microseconds.
+###########################################################################
+def measure(build, records, repeat=5):
+    split_names.cache_clear()
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    items = build(records)
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = build(records)
+        elapsed.append(time.perf_counter() - start)
+        del items
+    return {"bytes_per_movie": (after - before) / len(records),
+            "build_us_per_movie": min(elapsed) * 1e6 / len(records)}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Memory held per movie: dicts vs MovieItem rows vs MovieColumns")
+    parser.add_argument("--years", type=int, default=5, help="years of movies generated")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+# The movie containers compared, from the former dicts to the columns.
+BUILDERS = {
+    "dict": legacy_movie_items,
+    "MovieItem": movie_item_rows,
+    "MovieColumns": MovieColumns.from_records,
+}
+
+
+if __name__ == "__main__":
+    options = parse_args()
+    print(f"{'records':8} {'movies':>7} " + " ".join(f"{name + ' B/movie':>20}" for name in BUILDERS)
+          + " " + " ".join(f"{name + ' us/movie':>21}" for name in BUILDERS))
+    for kind in ("search", "detail"):
+        records = generate_records(kind, options.years, options.seed)
+        results = {name: measure(build, records) for name, build in BUILDERS.items()}
+        print(f"{kind:8} {len(records):7d} "
+              + " ".join(f"{result['bytes_per_movie']:20.0f}" for result in results.values()) + " "
+              + " ".join(f"{result['build_us_per_movie']:21.2f}" for result in results.values()))
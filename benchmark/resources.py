@@ -0,0 +1,62 @@
+import threading
+
+try:
+    import psutil
+except ImportError:  # CPU/RSS of the services is then not recorded
+    psutil = None
+
+
+###########################################################################
+# Purpose:
+#   Record the CPU time and peak resident memory of a service process while
+#   a trial runs.
+#
+# Parameters:
+#   pid (int | None): Process id of the service; None disables sampling.
+#   interval (float): Seconds between two RSS samples.
+#
+# Process:
+#   - Used as a context manager around one trial.
+#   - CPU time is the difference of the process (and children) CPU times
+#     between the start and the end of the trial.
+#   - RSS is sampled by a background thread, the peak is kept.
+#   - Needs the optional `psutil` package; without it, or without a pid,
+#     `result()` is empty.
+###########################################################################
+class ResourceSampler:
+    def __init__(self, pid, interval=0.1):
+        self.process = psutil.Process(pid) if psutil is not None and pid else None
+        self.interval = interval
+        self.cpu_seconds = None
+        self.peak_rss = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _cpu_time(self):
+        times = self.process.cpu_times()
+        return times.user + times.system + times.children_user + times.children_system
+
+    def _sample(self):
+        while True:
+            self.peak_rss = max(self.peak_rss or 0, self.process.memory_info().rss)
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        if self.process is not None:
+            self._start_cpu = self._cpu_time()
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.process is not None:
+            self._stop.set()
+            self._thread.join()
+            self.cpu_seconds = self._cpu_time() - self._start_cpu
+        return False
+
+    def result(self):
+        if self.process is None:
+            return {}
+        return {"server_cpu_seconds": self.cpu_seconds, "server_peak_rss_mb": self.peak_rss / 2**20}
@@ -0,0 +1,255 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import platform
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+
+import requests
+
+from resources import ResourceSampler
+from stats import percentile, summarize
+from workloads import FIELD_SETS, SCENARIOS, build_workloads
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCHMARK_DIR)
+
+# Metrics of one trial that are summarized across trials.
+TRIAL_METRICS = ["latency_p50_ms", "latency_p95_ms", "latency_p99_ms", "latency_mean_ms",
+                 "throughput_rps", "error_rate", "request_bytes", "response_bytes",
+                 "server_cpu_seconds", "server_peak_rss_mb"]
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# A response is an error on an HTTP error status, or when a GraphQL result
+# carries `errors`.
+def is_error(response):
+    if response.status_code >= 400:
+        return True
+    if response.headers.get("Content-Type", "").startswith("application/json"):
+        try:
+            return bool(response.json().get("errors"))
+        except (ValueError, AttributeError):
+            return True
+    return False
+
+
+###########################################################################
+# Purpose:
+#   Run one trial: send `total` requests with `concurrency` closed-loop
+#   workers and measure them.
+#
+# Parameters:
+#   request (BenchmarkRequest): The request of the scenario.
+#   base_url (str): Url of the service.
+#   concurrency (int): Number of workers, each with its own keep-alive session.
+#   total (int): Number of requests of the trial.
+#   timeout (float): Timeout of one request, in seconds.
+#   pid (int | None): Process id of the service, to record its CPU and RSS.
+#
+# Returns:
+#   dict: Latency percentiles, throughput, error rate, bytes on the wire per
+#   request and, when available, server CPU seconds and peak RSS.
+###########################################################################
+def run_trial(request, base_url, concurrency, total, timeout, pid=None):
+    tickets = itertools.count()
+    tickets_lock = threading.Lock()
+    latencies = []
+    errors = 0
+    request_bytes = 0
+    response_bytes = 0
+    results_lock = threading.Lock()
+
+    def worker():
+        nonlocal errors, request_bytes, response_bytes
+        session = requests.Session()
+        while True:
+            with tickets_lock:
+                if next(tickets) >= total:
+                    break
+            start = time.perf_counter()
+            try:
+                response = request.send(session, base_url, timeout)
+                failed = is_error(response)
+                sent = len(response.request.body or b"")
+                received = len(response.content)
+            except requests.RequestException:
+                failed, sent, received = True, 0, 0
+            elapsed = (time.perf_counter() - start) * 1000
+            with results_lock:
+                latencies.append(elapsed)
+                errors += failed
+                request_bytes += sent
+                response_bytes += received
+        session.close()
+
+    with ResourceSampler(pid) as sampler:
+        started = time.perf_counter()
+        workers = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        duration = time.perf_counter() - started
+
+    count = len(latencies)
+    trial = {
+        "requests": count,
+        "errors": errors,
+        "duration_s": duration,
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p95_ms": percentile(latencies, 95),
+        "latency_p99_ms": percentile(latencies, 99),
+        "latency_mean_ms": sum(latencies) / count if count else None,
+        "throughput_rps": count / duration if duration else None,
+        "error_rate": errors / count if count else None,
+        "request_bytes": request_bytes / count if count else None,
+        "response_bytes": response_bytes / count if count else None,
+    }
+    trial.update(sampler.result())
+    return trial
+
+
+###########################################################################
+# Purpose:
+#   Run every cell of the benchmark matrix on every service.
+#
+# Process:
+#   - For each (scenario, num_years, field set, concurrency, service), sends
+#     `warmup` unmeasured requests, then runs `trials` measured trials.
+#   - Services are interleaved cell by cell, so a slow period of OMDb or of
+#     the machine affects both of them alike.
+#
+# Returns:
+#   list[dict]: One result per cell with its trials and their summary.
+###########################################################################
+def run_benchmark(options):
+    urls = {"rest": options.rest_url, "graphql": options.graphql_url}
+    pids = {"rest": options.rest_pid, "graphql": options.graphql_pid}
+    results = []
+    for workload in build_workloads(options.scenarios, options.years, options.fields):
+        for concurrency in options.concurrency:
+            for service in options.services:
+                request = workload["requests"][service]
+                for _ in range(options.warmup):
+                    try:
+                        request.send(requests, urls[service], options.timeout)
+                    except requests.RequestException:
+                        pass
+
+                trials = [run_trial(request, urls[service], concurrency, options.requests,
+                                    options.timeout, pids[service])
+                          for _ in range(options.trials)]
+                result = {
+                    "service": service,
+                    "scenario": workload["scenario"],
+                    "num_years": workload["num_years"],
+                    "fields": workload["fields"],
+                    "concurrency": concurrency,
+                    "trials": trials,
+                    "summary": {metric: summarize([trial.get(metric) for trial in trials])
+                                for metric in TRIAL_METRICS}
+                }
+                results.append(result)
+                print_result(result)
+    return results
+
+
+def print_result(result):
+    summary = result["summary"]
+
+    def fmt(metric, unit=""):
+        value = summary[metric]
+        if value["mean"] is None:
+            return "n/a"
+        return f"{value['mean']:.1f}{unit} [{value['ci95_low']:.1f}, {value['ci95_high']:.1f}]"
+
+    print(f"{result['service']:8} {result['scenario']} years={result['num_years']} "
+          f"fields={result['fields']} c={result['concurrency']}: "
+          f"p50 {fmt('latency_p50_ms', 'ms')}  p95 {fmt('latency_p95_ms', 'ms')}  "
+          f"rps {fmt('throughput_rps')}  errors {summary['error_rate']['mean'] or 0:.1%}")
+
+
+# One CSV row per cell, with the mean and confidence interval of every metric.
+def write_csv(path, results):
+    columns = ["service", "scenario", "num_years", "fields", "concurrency"]
+    header = columns + [f"{metric}_{stat}" for metric in TRIAL_METRICS
+                        for stat in ("mean", "ci95_low", "ci95_high")]
+    with open(path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(header)
+        for result in results:
+            writer.writerow([result[column] for column in columns] +
+                            [result["summary"][metric][stat] for metric in TRIAL_METRICS
+                             for stat in ("mean", "ci95_low", "ci95_high")])
+
+
+def int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+def name_list(choices):
+    def parse(value):
+        names = [item for item in value.split(",") if item]
+        unknown = set(names) - set(choices)
+        if unknown:
+            raise argparse.ArgumentTypeError(f"unknown: {', '.join(sorted(unknown))}")
+        return names
+    return parse
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the REST and GraphQL services")
+    parser.add_argument("--rest-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--graphql-url", default="http://127.0.0.1:5002")
+    parser.add_argument("--rest-pid", type=int, help="pid of the REST service, to record its CPU/RSS")
+    parser.add_argument("--graphql-pid", type=int, help="pid of the GraphQL service, to record its CPU/RSS")
+    parser.add_argument("--services", type=name_list(["rest", "graphql"]), default=["rest", "graphql"])
+    # the JSON API is asked for the same fields as GraphQL; `movies_for_years`
+    # (the full REST movies page) is opt-in
+    parser.add_argument("--scenarios", type=name_list(SCENARIOS), default=["movies_for_years_json"])
+    parser.add_argument("--years", type=int_list, default=[0, 1], help="num_years values, e.g. 0,1,3")
+    parser.add_argument("--fields", type=name_list(FIELD_SETS), default=list(FIELD_SETS))
+    parser.add_argument("--concurrency", type=int_list, default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=50, help="requests per trial")
+    parser.add_argument("--trials", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=2, help="unmeasured requests before each cell")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output-dir", default=os.path.join(BENCHMARK_DIR, "results"))
+    parser.add_argument("--label", default="", help="name added to the result files")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    options = parse_args()
+    commit = current_commit()
+    started = datetime.now(timezone.utc)
+    results = run_benchmark(options)
+
+    os.makedirs(options.output_dir, exist_ok=True)
+    name = "-".join(part for part in (started.strftime("%Y%m%dT%H%M%SZ"), commit, options.label) if part)
+    report = {
+        "commit": commit,
+        "started": started.isoformat(),
+        "host": {"python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count()},
+        "options": {key: value for key, value in vars(options).items() if key != "output_dir"},
+        "results": results
+    }
+    json_path = os.path.join(options.output_dir, name + ".json")
+    with open(json_path, "w") as json_file:
+        json.dump(report, json_file, indent=2)
+    write_csv(os.path.join(options.output_dir, name + ".csv"), results)
+    print(f"results written to {json_path}")
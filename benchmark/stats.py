@@ -0,0 +1,54 @@
+import math
+import statistics
+
+
+# Two-sided 95% critical values of Student's t distribution by degrees of
+# freedom; larger samples use the normal approximation.
+T_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365,
+        8: 2.306, 9: 2.262, 10: 2.228, 11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145,
+        15: 2.131, 16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093, 20: 2.086,
+        25: 2.060, 30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980}
+
+
+def t_critical(degrees_of_freedom):
+    for df in sorted(T_95):
+        if degrees_of_freedom <= df:
+            return T_95[df]
+    return 1.960
+
+
+###########################################################################
+# Purpose:
+#   Percentile of a list of values, with linear interpolation between the
+#   two closest ranks (the same definition as numpy's default).
+###########################################################################
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+###########################################################################
+# Purpose:
+#   Mean of the values of one metric across trials, with its 95% confidence
+#   interval.
+#
+# Returns:
+#   dict: mean, stdev, ci95_low, ci95_high and n. With a single trial the
+#   interval collapses on the mean.
+###########################################################################
+def summarize(values):
+    values = [value for value in values if value is not None]
+    if not values:
+        return {"mean": None, "stdev": None, "ci95_low": None, "ci95_high": None, "n": 0}
+    mean = statistics.fmean(values)
+    if len(values) < 2:
+        return {"mean": mean, "stdev": 0.0, "ci95_low": mean, "ci95_high": mean, "n": len(values)}
+    stdev = statistics.stdev(values)
+    margin = t_critical(len(values) - 1) * stdev / math.sqrt(len(values))
+    return {"mean": mean, "stdev": stdev, "ci95_low": mean - margin,
+            "ci95_high": mean + margin, "n": len(values)}
@@ -0,0 +1,104 @@
+###########################################################################
+# Equivalent REST and GraphQL workloads.
+#
+# Every scenario is one logical question asked to both services in the way
+# each of them answers it: the same years and the same movie fields. The REST
+# movies page always returns every field, GraphQL returns exactly the
+# selected ones, which is part of what the benchmark measures; the
+# `movies_for_years_json` scenario compares GraphQL with the REST JSON API
+# and its sparse fieldsets instead, like for like.
+###########################################################################
+
+# Fields shown by the REST movies page (templates/movies.html).
+FULL_FIELDS = ["title", "year", "genre", "director", "actors", "plot",
+               "language", "country", "awards", "poster"]
+# Fields OMDb search results already contain (no detail lookup needed).
+SUMMARY_FIELDS = ["title", "year", "poster"]
+
+FIELD_SETS = {
+    "full": FULL_FIELDS,
+    "summary": SUMMARY_FIELDS,
+}
+
+ALL_MOVIES_QUERY = """
+query allMovies($num_years: Int) {
+  allMovies(num_years: $num_years) {
+    %s
+  }
+}
+"""
+
+
+###########################################################################
+# Purpose:
+#   One request of a scenario, ready to be sent with `requests`.
+#
+# Parameters:
+#   method (str): HTTP method.
+#   path (str): Path on the service, e.g. "/moviesforyears/1".
+#   json (dict | None): JSON body of the request.
+###########################################################################
+class BenchmarkRequest:
+    def __init__(self, method, path, json=None):
+        self.method = method
+        self.path = path
+        self.json = json
+
+    def send(self, session, base_url, timeout):
+        return session.request(self.method, base_url.rstrip("/") + self.path,
+                               json=self.json, timeout=timeout)
+
+
+def rest_movies_for_years(num_years, fields):
+    return BenchmarkRequest("GET", f"/moviesforyears/{num_years}")
+
+
+def rest_api_movies_for_years(num_years, fields):
+    return BenchmarkRequest("GET", f"/api/moviesforyears/{num_years}?fields={','.join(fields)}")
+
+
+def graphql_movies_for_years(num_years, fields):
+    query = ALL_MOVIES_QUERY % "\n    ".join(fields)
+    return BenchmarkRequest("POST", "/graphql",
+                            json={"query": query, "variables": {"num_years": num_years}})
+
+
+# Scenario name -> request builder per service.
+SCENARIOS = {
+    "movies_for_years": {
+        "rest": rest_movies_for_years,
+        "graphql": graphql_movies_for_years,
+    },
+    "movies_for_years_json": {
+        "rest": rest_api_movies_for_years,
+        "graphql": graphql_movies_for_years,
+    },
+}
+
+
+###########################################################################
+# Purpose:
+#   Expand the benchmark matrix into (scenario, num_years, field set) cells.
+#
+# Parameters:
+#   scenarios (list[str]): Names from SCENARIOS.
+#   years (list[int]): `num_years` values to run.
+#   field_sets (list[str]): Names from FIELD_SETS.
+#
+# Returns:
+#   list[dict]: One dict per cell with the request of each service.
+###########################################################################
+def build_workloads(scenarios, years, field_sets):
+    workloads = []
+    for scenario in scenarios:
+        for num_years in years:
+            for field_set in field_sets:
+                fields = FIELD_SETS[field_set]
+                workloads.append({
+                    "scenario": scenario,
+                    "num_years": num_years,
+                    "fields": field_set,
+                    "requests": {service: build(num_years, fields)
+                                 for service, build in SCENARIOS[scenario].items()}
+                })
+    return workloads
@@ -0,0 +1,7 @@
+###########################################################################
+# Shared code used by both the REST_Service and the GraphQL_Service.
+#
+# Both services are started from their own folder ('python app.py'), so each
+# service's `utils.py` adds the project root to `sys.path` before importing
+# anything from this package.
+###########################################################################
@@ -0,0 +1,295 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from common.settings import settings
+
+
+###########################################################################
+# Purpose:
+#   Count the hits, misses and evictions of a cache backend.
+###########################################################################
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+
+    def to_dict(self):
+        lookups = self.hits + self.misses + self.stale_hits
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+
+###########################################################################
+# Purpose:
+#   In-process cache with a time to live per entry and a bounded size.
+#
+# Parameters:
+#   max_entries (int): Number of entries kept before the least recently
+#       used one is evicted.
+#   ttl (float): Default time to live of an entry, in seconds.
+#   stale_ttl (float): Seconds an expired entry is kept for `get_entry`,
+#       which serves it as stale.
+#
+# Process:
+#   - Entries live in an OrderedDict ordered from least to most recently used.
+#   - A lookup moves the entry to the end; an expired entry counts as a miss
+#     for `get`, and is dropped once it is also past its stale window.
+#   - All operations hold one lock, so the cache can be shared by the
+#     threads fetching pages and years in parallel.
+###########################################################################
+class MemoryCache:
+    # Calls return without I/O, so the async helpers call them on the event loop.
+    blocking = False
+
+    def __init__(self, max_entries, ttl, stale_ttl=0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self.get_entry(key, allow_stale=False)
+        return None if entry is None else entry[0]
+
+    # Return (value, fresh) for a cached key, None on a miss. Expired values
+    # are returned with fresh=False while within their stale window, unless
+    # `allow_stale` is False.
+    def get_entry(self, key, allow_stale=True):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                if now >= expires_at + self.stale_ttl:
+                    del self._entries[key]
+                    self.stats.expirations += 1
+                    self.stats.misses += 1
+                    return None
+                if not allow_stale:
+                    self.stats.misses += 1
+                    return None
+                self._entries.move_to_end(key)
+                self.stats.stale_hits += 1
+                return value, False
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value, True
+
+    # Return (expires_at, value) without counting a lookup or refreshing the
+    # entry's recency, even if it has expired; None if the key is not cached.
+    def peek(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+###########################################################################
+# Purpose:
+#   Cache with the same behaviour as `MemoryCache`, kept in a SQLite file so
+#   that it survives restarts and is shared by both services.
+#
+# Parameters:
+#   path (str): The SQLite file holding the `omdb_cache` table.
+#   max_entries (int): Number of entries kept before the least recently
+#       used ones are evicted.
+#   ttl (float): Default time to live of an entry, in seconds.
+#   stale_ttl (float): Seconds an expired entry is kept for `get_entry`.
+#
+# Process:
+#   - Values are stored as JSON together with their expiry and last access
+#     time; the least recently accessed rows are deleted when the table
+#     grows beyond `max_entries`.
+#   - The database runs in WAL mode so the REST and GraphQL processes can
+#     read and write the same file at once.
+###########################################################################
+class SQLiteCache:
+    # Calls read and write the file under a lock: the async helpers run them
+    # on a worker thread.
+    blocking = True
+
+    def __init__(self, path, max_entries, ttl, stale_ttl=0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS omdb_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_omdb_cache_accessed_at"
+                " ON omdb_cache (accessed_at)")
+
+    def get(self, key):
+        entry = self.get_entry(key, allow_stale=False)
+        return None if entry is None else entry[0]
+
+    def get_entry(self, key, allow_stale=True):
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM omdb_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            value, expires_at = row
+            fresh = expires_at > now
+            if not fresh:
+                if now >= expires_at + self.stale_ttl:
+                    self._conn.execute("DELETE FROM omdb_cache WHERE key = ?", (key,))
+                    self.stats.expirations += 1
+                    self.stats.misses += 1
+                    return None
+                if not allow_stale:
+                    self.stats.misses += 1
+                    return None
+            self._conn.execute(
+                "UPDATE omdb_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            if fresh:
+                self.stats.hits += 1
+            else:
+                self.stats.stale_hits += 1
+        return json.loads(value), fresh
+
+    def peek(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM omdb_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        return expires_at, json.loads(value)
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO omdb_cache (key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)", (key, json.dumps(value), expires_at, now))
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM omdb_cache").fetchone()
+            overflow = size - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM omdb_cache WHERE key IN ("
+                    " SELECT key FROM omdb_cache ORDER BY accessed_at LIMIT ?)", (overflow,))
+                self.stats.evictions += overflow
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM omdb_cache")
+
+    def __len__(self):
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM omdb_cache").fetchone()
+        return size
+
+
+###########################################################################
+# Purpose:
+#   Cache used when `OMDB_CACHE_BACKEND` is "none": every lookup misses.
+###########################################################################
+class NullCache:
+    blocking = False
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    def get(self, key):
+        self.stats.misses += 1
+        return None
+
+    def get_entry(self, key, allow_stale=True):
+        self.stats.misses += 1
+        return None
+
+    def peek(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+###########################################################################
+# Purpose:
+#   Return the OMDb response cache of the process, building it on first use
+#   from `OMDB_CACHE_BACKEND` ("memory", "sqlite" or "none").
+###########################################################################
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backend = settings.OMDB_CACHE_BACKEND
+                if backend == "memory":
+                    _cache = MemoryCache(settings.OMDB_CACHE_MAX_ENTRIES, settings.OMDB_CACHE_TTL,
+                                         settings.OMDB_CACHE_STALE_TTL)
+                elif backend == "sqlite":
+                    _cache = SQLiteCache(settings.OMDB_CACHE_PATH, settings.OMDB_CACHE_MAX_ENTRIES,
+                                         settings.OMDB_CACHE_TTL, settings.OMDB_CACHE_STALE_TTL)
+                elif backend == "none":
+                    _cache = NullCache()
+                else:
+                    raise ValueError(f"Unknown OMDB_CACHE_BACKEND: {backend!r}")
+    return _cache
+
+
+# Drop the process cache so the next call builds one from the current settings.
+def reset_cache():
+    global _cache
+    with _cache_lock:
+        _cache = None
+
+
+# Build the cache key of an OMDb query from its parameters, e.g. "s=movie&y=2023&page=1".
+def cache_key(params):
+    return "&".join(f"{name}={value}" for name, value in params.items())
@@ -0,0 +1,224 @@
+import threading
+import time
+
+from sqlalchemy import create_engine, delete, event, select, text
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from common.settings import settings
+from models import MOVIE_DETAIL_COLUMNS, CatalogYear, Movie, Rating
+
+
+# Movies returned by one title search.
+SEARCH_LIMIT = 20
+
+# Full-text index of the movie titles (SQLite FTS5), kept in sync with the
+# `movies` table by triggers.
+FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5(title, content='movies', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_insert AFTER INSERT ON movies BEGIN"
+    " INSERT INTO movies_fts (rowid, title) VALUES (new.id, new.title); END",
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_delete AFTER DELETE ON movies BEGIN"
+    " INSERT INTO movies_fts (movies_fts, rowid, title) VALUES ('delete', old.id, old.title); END",
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_update AFTER UPDATE OF title ON movies BEGIN"
+    " INSERT INTO movies_fts (movies_fts, rowid, title) VALUES ('delete', old.id, old.title);"
+    " INSERT INTO movies_fts (rowid, title) VALUES (new.id, new.title); END",
+]
+
+
+# Copy the detail fields and ratings of a detail record onto a movie; search
+# records leave the details already stored untouched.
+def _set_details(movie, record):
+    if "Plot" not in record and "Ratings" not in record:
+        return
+    for key, column in MOVIE_DETAIL_COLUMNS.items():
+        setattr(movie, column, record.get(key))
+    movie.ratings = [Rating(source=rating.get("Source", "N/A"), value=rating.get("Value", "N/A"))
+                     for rating in record.get("Ratings", [])]
+    movie.has_details = True
+
+
+def _fts_query(words):
+    # Every word as a quoted prefix term, so user input can't inject FTS syntax.
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in words.split())
+
+
+###########################################################################
+# Purpose:
+#   Local, indexed copy of the movies seen on OMDb, so the years already
+#   fetched are answered from a database instead of walking OMDb pages.
+#
+# Parameters:
+#   url (str): SQLAlchemy database url of the catalog.
+#   ttl (float): Seconds the movies of an ingested year are served from
+#       the catalog before they are fetched from OMDb again.
+#
+# Process:
+#   - Uses the `Movie`, `Rating` and `CatalogYear` models of models.py with
+#     a plain SQLAlchemy engine, so it works outside of a Flask app context
+#     (the ASGI service, worker threads).
+#   - `ingest(year, records)` upserts the OMDb records of a year by imdbID
+#     in one transaction and marks the year fresh; `add_details(records)`
+#     stores the detail fields and ratings, which are kept until a newer
+#     detail record replaces them.
+#   - `year_records(year, with_details)` reads a fresh year back in OMDb
+#     order through the (release_year, position) index; None when the year
+#     is missing, expired, or lacks the requested details.
+#   - `search(words)` looks titles up in the FTS5 index on SQLite, and with
+#     a LIKE query on other databases.
+#   - SQLite runs in WAL mode so both services can share the file.
+###########################################################################
+class Catalog:
+    def __init__(self, url, ttl):
+        self.ttl = ttl
+        self.is_sqlite = url.startswith("sqlite")
+        connect_args = {"check_same_thread": False, "timeout": 10} if self.is_sqlite else {}
+        self.engine = create_engine(url, connect_args=connect_args)
+        self._ingest_lock = threading.Lock()
+
+        if self.is_sqlite:
+            @event.listens_for(self.engine, "connect")
+            def set_sqlite_pragmas(connection, record):
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA foreign_keys=ON")
+
+        Movie.metadata.create_all(self.engine, tables=[Movie.__table__, Rating.__table__,
+                                                       CatalogYear.__table__])
+        if self.is_sqlite:
+            with self.engine.begin() as connection:
+                for statement in FTS_DDL:
+                    connection.execute(text(statement))
+
+    def year_records(self, year, with_details=False):
+        year = int(year)
+        with Session(self.engine) as session:
+            state = session.get(CatalogYear, year)
+            if state is None or state.fetched_at + self.ttl <= time.time():
+                return None
+            movies = session.scalars(select(Movie).where(Movie.release_year == year)
+                                     .order_by(Movie.position)).all()
+            if with_details and not all(movie.has_details for movie in movies):
+                return None
+            return [movie.to_record() for movie in movies]
+
+    def ingest(self, year, records):
+        year = int(year)
+        records = [record for record in records if record.get("imdbID")]
+        if not records:
+            return  # a failed fetch never replaces what the catalog has
+        with self._ingest_lock:
+            try:
+                self._upsert(year, records)
+            except IntegrityError:
+                self._upsert(year, records)  # the other service inserted the same movies first
+
+    def _upsert(self, year, records):
+        now = time.time()
+        with Session(self.engine) as session, session.begin():
+            # movies OMDb no longer lists for the year leave the catalog
+            session.execute(delete(Movie).where(Movie.release_year == year,
+                                                Movie.imdb_id.not_in([record["imdbID"] for record in records])))
+            existing = self._movies(session, records)
+            for position, record in enumerate(records):
+                movie = existing.get(record["imdbID"])
+                if movie is None:
+                    movie = existing[record["imdbID"]] = Movie(imdb_id=record["imdbID"], has_details=False)
+                    session.add(movie)
+                movie.title = record.get("Title") or movie.title or "N/A"
+                movie.year = record.get("Year", movie.year)
+                movie.type = record.get("Type", movie.type)
+                movie.poster = record.get("Poster", movie.poster)
+                movie.release_year = year
+                movie.position = position
+                movie.updated_at = now
+                _set_details(movie, record)
+            session.merge(CatalogYear(year=year, movie_count=len(records), fetched_at=now))
+
+    # Store the detail fields of movies already in the catalog (detail records
+    # of movies it doesn't hold are ignored).
+    def add_details(self, records):
+        records = [record for record in records if record.get("imdbID")]
+        if not records:
+            return
+        with self._ingest_lock, Session(self.engine) as session, session.begin():
+            existing = self._movies(session, records)
+            for record in records:
+                if record["imdbID"] in existing:
+                    _set_details(existing[record["imdbID"]], record)
+
+    @staticmethod
+    def _movies(session, records):
+        imdb_ids = [record["imdbID"] for record in records]
+        return {movie.imdb_id: movie for movie in session.scalars(select(Movie).where(Movie.imdb_id.in_(imdb_ids)))}
+
+    def search(self, words, limit=SEARCH_LIMIT):
+        query = _fts_query(words)
+        if not query:
+            return []
+        with Session(self.engine) as session:
+            if self.is_sqlite:
+                ids = [row[0] for row in session.execute(
+                    text("SELECT rowid FROM movies_fts WHERE movies_fts MATCH :query ORDER BY rank LIMIT :limit"),
+                    {"query": query, "limit": limit})]
+                movies = {movie.id: movie for movie in session.scalars(select(Movie).where(Movie.id.in_(ids)))}
+                return [movies[movie_id].to_record() for movie_id in ids if movie_id in movies]
+            movies = session.scalars(select(Movie).where(Movie.title.ilike(f"%{words.strip()}%"))
+                                     .order_by(Movie.title).limit(limit))
+            return [movie.to_record() for movie in movies]
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+# Catalog of the process, opened on first use from `CATALOG_DATABASE_URL`;
+# None when the catalog is off (empty url).
+def get_catalog():
+    global _catalog
+    if _catalog is None and settings.CATALOG_DATABASE_URL:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = Catalog(settings.CATALOG_DATABASE_URL, settings.CATALOG_TTL)
+    return _catalog
+
+
+###########################################################################
+# Purpose:
+#   Read path of the OMDb client: the catalog records of a year, if it is
+#   on and holds a fresh copy of the year (with details when asked for).
+#
+# Returns:
+#   list | None: The OMDb records of the year, in OMDb order, or None when
+#   the year must be fetched from OMDb. Catalog errors count as a miss.
+###########################################################################
+def catalog_records(year, with_details=False):
+    catalog = get_catalog()
+    if catalog is None:
+        return None
+    try:
+        return catalog.year_records(year, with_details)
+    except (ValueError, SQLAlchemyError):
+        return None
+
+
+# Ingest path: upsert the complete search records of a year fetched from
+# OMDb; catalog errors never fail the request.
+def ingest_records(year, records):
+    catalog = get_catalog()
+    if catalog is None:
+        return
+    try:
+        catalog.ingest(year, records)
+    except (ValueError, SQLAlchemyError):
+        pass
+
+
+# Ingest path of the detail records fetched for a year's movies.
+def ingest_details(records):
+    catalog = get_catalog()
+    if catalog is None:
+        return
+    try:
+        catalog.add_details(records)
+    except SQLAlchemyError:
+        pass
@@ -0,0 +1,152 @@
+from common.movies import NO_RATINGS, NOT_AVAILABLE, NOT_AVAILABLE_NAMES, MovieItem, split_names, to_ratings
+
+
+###########################################################################
+# How each movie item field is read from the OMDb records, keyed by the
+# field name used by the templates and the GraphQL `Movie` type:
+#   (OMDb key, kind), where the kind is
+#   raw:     the value as is ("N/A" when missing)
+#   text:    a free text value; OMDb's "N/A" becomes the shared constant
+#   shared:  a value repeated across movies (year, language, ...); equal
+#            values of a column are one object
+#   names:   a comma separated list, as a tuple of names
+#   ratings: the rating list, as `MovieRating` tuples
+###########################################################################
+MOVIE_COLUMNS = {
+    "id": ("imdbID", "raw"),
+    "title": ("Title", "text"),
+    "year": ("Year", "shared"),
+    "genre": ("Genre", "names"),
+    "director": ("Director", "shared"),
+    "actors": ("Actors", "names"),
+    "plot": ("Plot", "text"),
+    "language": ("Language", "shared"),
+    "country": ("Country", "shared"),
+    "awards": ("Awards", "text"),
+    "ratings": ("Ratings", "ratings"),
+    "poster": ("Poster", "text"),
+}
+
+# Value of a field whose OMDb key is missing, by kind.
+MISSING_VALUES = {
+    "raw": NOT_AVAILABLE,
+    "text": NOT_AVAILABLE,
+    "shared": NOT_AVAILABLE,
+    "names": NOT_AVAILABLE_NAMES,
+    "ratings": NO_RATINGS,
+}
+
+
+###########################################################################
+# Purpose:
+#   Build the column of one field for a batch of OMDb records.
+#
+# Process:
+#   - A key none of the records has (the detail fields of search results)
+#     gives a column repeating the shared missing value, without reading
+#     the records one by one.
+#   - Otherwise one comprehension over the records reads the key; repeated
+#     values are folded to one object through a per-column dict.
+#
+# Returns:
+#   list: The values of the field, one per record.
+###########################################################################
+def build_column(records, key, kind):
+    if not any(key in record for record in records):
+        return [MISSING_VALUES[kind]] * len(records)
+    if kind == "ratings":
+        return [to_ratings(record.get(key)) for record in records]
+    values = [record.get(key, NOT_AVAILABLE) for record in records]
+    if kind == "names":
+        return [split_names(value) for value in values]
+    if kind == "shared":
+        seen = {NOT_AVAILABLE: NOT_AVAILABLE}
+        return [seen.setdefault(value, value) for value in values]
+    if kind == "text":
+        return [NOT_AVAILABLE if value == NOT_AVAILABLE else value for value in values]
+    return values
+
+
+###########################################################################
+# Purpose:
+#   The movie items of a batch of OMDb records (a search page, a year, or
+#   several years), held as one list per field instead of one object per
+#   movie.
+#
+# Parameters:
+#   columns (dict): Field name -> list of values, all of `length` items.
+#   length (int): Number of movies.
+#
+# Process:
+#   - `from_records` normalizes the whole batch at once, column by column,
+#     and only for the requested fields (see `build_column`).
+#   - Reads as a sequence of `MovieItem`s: a row is only built when it is
+#     read, e.g. when a template or a GraphQL list iterates the movies.
+#     `len()` and the other aggregations work on the columns directly.
+#   - `to_dicts()` gives the JSON shape of every movie straight from the
+#     columns, without building the `MovieItem`s.
+###########################################################################
+class MovieColumns:
+    def __init__(self, columns, length):
+        self.columns = columns
+        self.length = length
+
+    @classmethod
+    def from_records(cls, records, fields=None):
+        if not isinstance(records, list):
+            records = list(records)
+        names = MOVIE_COLUMNS if fields is None else dict.fromkeys(
+            name for name in fields if name in MOVIE_COLUMNS)
+        return cls({name: build_column(records, *MOVIE_COLUMNS[name]) for name in names}, len(records))
+
+    # Join the movies of several batches (e.g. years), in order.
+    @classmethod
+    def concat(cls, batches):
+        batches = list(batches)
+        if not batches:
+            return cls({}, 0)
+        columns = {name: [value for batch in batches for value in batch.columns[name]]
+                   for name in batches[0].columns}
+        return cls(columns, sum(len(batch) for batch in batches))
+
+    @property
+    def fields(self):
+        return list(self.columns)
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        names = list(self.columns)
+        if not names:
+            for _ in range(self.length):
+                yield MovieItem()
+            return
+        for values in zip(*self.columns.values()):
+            yield MovieItem(**dict(zip(names, values)))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            columns = {name: column[index] for name, column in self.columns.items()}
+            return MovieColumns(columns, len(range(*index.indices(self.length))))
+        if not -self.length <= index < self.length:
+            raise IndexError("movie index out of range")
+        return MovieItem(**{name: column[index] for name, column in self.columns.items()})
+
+    def to_dicts(self):
+        names = list(self.columns)
+        columns = []
+        for name, column in self.columns.items():
+            kind = MOVIE_COLUMNS[name][1]
+            if kind == "names":
+                column = [list(value) for value in column]
+            elif kind == "ratings":
+                column = [[{"source": rating.source, "value": rating.value} for rating in value]
+                          for value in column]
+            columns.append(column)
+        if not names:
+            return [{} for _ in range(self.length)]
+        return [dict(zip(names, values)) for values in zip(*columns)]
+
+    def __repr__(self):
+        return f"MovieColumns({self.length} movies, fields={self.fields})"
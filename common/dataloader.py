@@ -0,0 +1,99 @@
+import asyncio
+import threading
+
+
+###########################################################################
+# Purpose:
+#   Per-request batching loader ("DataLoader") for the threaded services.
+#
+# Parameters:
+#   batch_fn (callable): Takes a list of distinct keys and returns a dict
+#       of the values it found, keyed by key.
+#
+# Process:
+#   - `load_many` sends every key it has not seen yet to `batch_fn` in one
+#     call and memoizes the answers, including the misses.
+#   - Later loads of the same keys during the request are served from the
+#     memo, so a loader must not outlive the request it was created for.
+###########################################################################
+class DataLoader:
+    def __init__(self, batch_fn):
+        self.batch_fn = batch_fn
+        self.batches = 0
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def load_many(self, keys):
+        keys = list(keys)
+        with self._lock:
+            missing = [key for key in dict.fromkeys(keys) if key not in self._values]
+        if missing:
+            found = self.batch_fn(missing)
+            with self._lock:
+                self.batches += 1
+                for key in missing:
+                    self._values[key] = found.get(key)
+        return [self._values[key] for key in keys]
+
+    def load(self, key):
+        return self.load_many([key])[0]
+
+    def prime(self, key, value):
+        with self._lock:
+            self._values.setdefault(key, value)
+
+
+###########################################################################
+# Purpose:
+#   Per-request batching loader for coroutines running on one event loop.
+#
+# Parameters:
+#   batch_fn (coroutine function): Takes a list of distinct keys and returns
+#       a dict of the values it found, keyed by key.
+#
+# Process:
+#   - `load(key)` returns a future right away. The keys of every `load`
+#     made during the same pass of the event loop are queued, and one task
+#     scheduled with `call_soon` hands them to `batch_fn` together.
+#   - Futures are memoized per key for the rest of the request, so repeated
+#     loads never reach `batch_fn` twice.
+###########################################################################
+class AsyncDataLoader:
+    def __init__(self, batch_fn):
+        self.batch_fn = batch_fn
+        self.batches = 0
+        self._futures = {}
+        self._queue = []
+        self._tasks = set()
+
+    def load(self, key):
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._futures[key] = loop.create_future()
+            if not self._queue:
+                loop.call_soon(self._schedule_dispatch, loop)
+            self._queue.append(key)
+        return future
+
+    async def load_many(self, keys):
+        return await asyncio.gather(*(self.load(key) for key in keys))
+
+    def _schedule_dispatch(self, loop):
+        task = loop.create_task(self._dispatch())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self):
+        keys, self._queue = self._queue, []
+        self.batches += 1
+        try:
+            found = await self.batch_fn(keys)
+        except Exception as error:
+            for key in keys:
+                if not self._futures[key].done():
+                    self._futures[key].set_exception(error)
+            return
+        for key in keys:
+            if not self._futures[key].done():
+                self._futures[key].set_result(found.get(key))
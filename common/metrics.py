@@ -0,0 +1,328 @@
+import threading
+import time
+from bisect import bisect_left
+
+from common.cache import get_cache
+from common.resilience import breakers
+from common.settings import settings
+
+
+# Content type of the Prometheus text exposition format.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds (in seconds) of the latency histogram buckets, from a cached
+# lookup to a multi-page OMDb walk.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_metrics = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    # Cumulative bucket counts (the last one is the "+Inf" bucket), sum and count.
+    def snapshot(self):
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total, running
+
+
+###########################################################################
+# Purpose:
+#   A metric family of the process, exposed by `render_metrics`.
+#
+# Parameters:
+#   name (str): The Prometheus metric name.
+#   documentation (str): The HELP text.
+#   labelnames (iterable): Names of the labels; `labels(*values)` returns the
+#       child of one combination of label values, created on first use.
+#
+# Process:
+#   - Children are kept in a dict; a lookup takes no lock once the child
+#     exists, and updating one takes only that child's lock, so recording a
+#     sample on the request path costs a dict lookup and a few additions.
+###########################################################################
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def labels(self, *values):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            yield self.name, _format_labels(self.labelnames, key), child.value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def dec(self, amount=1):
+        self.labels().dec(amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            cumulative, total, count = child.snapshot()
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), cumulative):
+                yield (f"{self.name}_bucket",
+                       _format_labels(self.labelnames, key, ("le", _format_value(bound))), bucket_count)
+            yield f"{self.name}_sum", _format_labels(self.labelnames, key), total
+            yield f"{self.name}_count", _format_labels(self.labelnames, key), count
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time to answer an HTTP request, by route",
+    ["method", "route", "status"])
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests being answered")
+GRAPHQL_OPERATION_DURATION = Histogram(
+    "graphql_operation_duration_seconds", "Time to execute a GraphQL operation",
+    ["operation", "outcome"])
+TEMPLATE_RENDER_DURATION = Histogram(
+    "template_render_duration_seconds", "Time to render a Jinja template", ["template"])
+OMDB_REQUEST_DURATION = Histogram(
+    "omdb_request_duration_seconds", "Time of one OMDb request attempt, by endpoint",
+    ["endpoint", "status"])
+OMDB_POOL_IN_USE = Gauge(
+    "omdb_pool_connections_in_use", "OMDb connections taken from the pool")
+OMDB_POOL_WAIT = Histogram(
+    "omdb_pool_wait_seconds", "Time waited for a free OMDb connection",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0))
+OMDB_POOL_REJECTIONS = Counter(
+    "omdb_pool_rejections_total", "OMDb requests given up because every connection was busy")
+
+
+# OMDb endpoint of a query: a search (`s=`), or a lookup by id (`i=`) or title (`t=`).
+def omdb_endpoint(params):
+    if "s" in params:
+        return "search"
+    if "i" in params:
+        return "id"
+    if "t" in params:
+        return "title"
+    return "other"
+
+
+# State of the OMDb client read when metrics are scraped: the response cache,
+# the connection pool size and the circuit breakers.
+def _state_samples():
+    stats = get_cache().stats
+    lookups = stats.hits + stats.misses + stats.stale_hits
+    yield ("omdb_cache_lookups_total", "counter", "OMDb response cache lookups, by result",
+           [({"result": "hit"}, stats.hits), ({"result": "stale"}, stats.stale_hits),
+            ({"result": "miss"}, stats.misses)])
+    yield ("omdb_cache_hit_ratio", "gauge", "Share of cache lookups answered with a fresh response",
+           [({}, stats.hits / lookups if lookups else 0.0)])
+    yield ("omdb_cache_evictions_total", "counter", "Cached responses evicted to stay under the size limit",
+           [({}, stats.evictions)])
+    yield ("omdb_pool_size", "gauge", "OMDb connections in the pool",
+           [({}, settings.OMDB_POOL_SIZE)])
+    yield ("circuit_breaker_open", "gauge", "1 while the circuit of an upstream is open or half open",
+           [({"upstream": breaker.name}, int(breaker.state != "closed")) for breaker in breakers()])
+    yield ("circuit_breaker_rejections_total", "counter", "Requests refused by an open circuit",
+           [({"upstream": breaker.name}, breaker.rejected) for breaker in breakers()])
+
+
+###########################################################################
+# Purpose:
+#   Render every metric of the process in the Prometheus text format, for
+#   the services' `/metrics` endpoints.
+#
+# Returns:
+#   str: The exposition, one HELP/TYPE header per metric family.
+###########################################################################
+def render_metrics():
+    lines = []
+    for metric in _metrics:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric._samples():
+            lines.append(f"{name}{labels} {_format_value(value)}")
+    for name, kind, documentation, samples in _state_samples():
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+###########################################################################
+# Purpose:
+#   Record the latency of every request of a Flask app, and of its template
+#   renders.
+#
+# Process:
+#   - Times each request with the monotonic `time.perf_counter` clock and
+#     labels it with the route rule (e.g. `/movies/<year>`), never the raw
+#     path, so the number of series stays bounded.
+#   - Counts the requests in flight; a request failing with an exception is
+#     recorded with status 500.
+#   - Times template renders through Flask's `before_render_template` and
+#     `template_rendered` signals.
+###########################################################################
+def instrument_flask(app):
+    from flask import before_render_template, g, request, template_rendered
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+
+    @app.after_request
+    def record_request(response):
+        _observe_request(request, response.status_code)
+        return response
+
+    @app.teardown_request
+    def end_request(error=None):
+        if "metrics_start" in g:
+            if not g.get("metrics_recorded"):
+                _observe_request(request, 500)
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+
+    def _observe_request(request, status):
+        g.metrics_recorded = True
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        HTTP_REQUEST_DURATION.labels(request.method, route, status).observe(
+            time.perf_counter() - g.metrics_start)
+
+    def start_template_timer(sender, template, context, **extra):
+        g.setdefault("template_starts", []).append(time.perf_counter())
+
+    def record_template(sender, template, context, **extra):
+        starts = g.get("template_starts")
+        if starts:
+            TEMPLATE_RENDER_DURATION.labels(template.name).observe(time.perf_counter() - starts.pop())
+
+    before_render_template.connect(start_template_timer, app, weak=False)
+    template_rendered.connect(record_template, app, weak=False)
+    return app
+
+
+###########################################################################
+# Purpose:
+#   ASGI middleware recording the latency of every HTTP request of an app,
+#   by route, like `instrument_flask`.
+#
+# Process:
+#   - The route is read from the scope after the app ran (Starlette stores
+#     the matched route there), so the label is the route template.
+#   - The status is taken from the `http.response.start` message.
+###########################################################################
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(scope["method"], route, status).observe(time.perf_counter() - start)
@@ -0,0 +1,113 @@
+import sys
+from collections import namedtuple
+from functools import lru_cache
+
+
+# OMDb's placeholder for a missing value, and the shared values standing for
+# missing lists. Movie items reuse these objects instead of allocating their
+# own copy for every movie.
+NOT_AVAILABLE = sys.intern("N/A")
+NOT_AVAILABLE_NAMES = (NOT_AVAILABLE,)
+NO_RATINGS = ()
+
+# Fields of a movie item, as named by the templates and the GraphQL `Movie` type.
+MOVIE_ITEM_FIELDS = ("id", "title", "year", "genre", "director", "actors", "plot",
+                     "language", "country", "awards", "ratings", "poster")
+
+# One rating of a movie; a tuple, readable as `.source` and `.value` like the
+# GraphQL `Rating` type.
+MovieRating = namedtuple("MovieRating", ["source", "value"])
+
+
+# The value of a field, with OMDb's "N/A" replaced by the shared constant.
+def text(value):
+    return NOT_AVAILABLE if value == NOT_AVAILABLE else value
+
+
+# A value repeated across many movies (year, language, ...), interned so
+# every movie holds the same string object ("N/A" included, as the constant
+# is the interned one).
+def shared(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+###########################################################################
+# Purpose:
+#   Split a comma separated OMDb list ("Drama, Action") into a tuple of
+#   names.
+#
+# Process:
+#   - "N/A" gives the shared ("N/A",) tuple; the names are interned.
+#   - Recent results are kept, so movies sharing a genre (or a cast) share
+#     one tuple too.
+#
+# Returns:
+#   tuple: The names, in OMDb order.
+###########################################################################
+@lru_cache(maxsize=4096)
+def split_names(value):
+    if not isinstance(value, str) or value == NOT_AVAILABLE:
+        return NOT_AVAILABLE_NAMES
+    return tuple(shared(name) for name in value.split(", "))
+
+
+# The ratings of an OMDb detail record as `MovieRating` tuples.
+def to_ratings(ratings):
+    if not ratings:
+        return NO_RATINGS
+    return tuple([MovieRating(shared(rating.get("Source")), rating.get("Value")) for rating in ratings])
+
+
+###########################################################################
+# Purpose:
+#   Compact record of one movie, read from a `MovieColumns` batch (see
+#   common/columns.py) or built by `omdb.to_movie_item`, and read as is by
+#   the GraphQL resolvers (attribute access) and the templates.
+#
+# Process:
+#   - Stores its fields in `__slots__` instead of a per-movie dict; fields
+#     that weren't requested are left unset and read as missing.
+#   - Lists are stored as tuples, so the shared empty and "N/A" values can
+#     be used for every movie that has no genre, cast or ratings.
+#   - `to_dict()` gives the JSON shape (lists and rating objects) for the
+#     JSON and NDJSON serializers.
+###########################################################################
+class MovieItem:
+    __slots__ = MOVIE_ITEM_FIELDS
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def to_dict(self):
+        item = {}
+        for name in MOVIE_ITEM_FIELDS:
+            try:
+                value = getattr(self, name)
+            except AttributeError:
+                continue  # not requested
+            if name == "ratings":
+                value = [rating._asdict() for rating in value]
+            elif isinstance(value, tuple):
+                value = list(value)
+            item[name] = value
+        return item
+
+    def __eq__(self, other):
+        if not isinstance(other, MovieItem):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"MovieItem({self.to_dict()!r})"
+
+
+# The JSON shape of movie items, for `jsonify` and `json.dumps`; built from
+# the columns directly for a `MovieColumns` batch.
+def movie_dicts(movie_items):
+    to_dicts = getattr(movie_items, "to_dicts", None)
+    if to_dicts is not None:
+        return to_dicts()
+    return [movie_item.to_dict() for movie_item in movie_items]
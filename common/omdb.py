@@ -0,0 +1,607 @@
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import requests
+
+from common.cache import cache_key, get_cache
+from common.catalog import catalog_records, ingest_details, ingest_records
+from common.columns import MOVIE_COLUMNS, MovieColumns
+from common.dataloader import DataLoader
+from common.metrics import omdb_endpoint
+from common.pagination import connection, page_size, start_position
+from common.resilience import in_context, mark_stale, track_stale
+from common.settings import settings
+from common.singleflight import SingleFlight
+from common.timings import FetchTiming, measure_fetch, record_fetch, record_page
+from common.tracing import span
+from common.upstream import omdb_get
+
+
+# OMDb search term used for every year listing and the fixed page size of a
+# search response.
+SEARCH_TERM = "movie"
+PAGE_SIZE = 10
+# Most recent year listed by `fetch_movies_by_years`.
+LAST_YEAR = 2023
+
+# Concurrent identical OMDb queries and year fetches share one upstream run.
+_flights = SingleFlight()
+# Background refreshes of the responses served stale, and their keys.
+_revalidator = ThreadPoolExecutor(max_workers=2, thread_name_prefix="omdb-revalidate")
+_revalidating = set()
+_revalidating_lock = threading.Lock()
+
+
+###########################################################################
+# Purpose:
+#   Fetch movie data from the OMDb API based on the given movie title.
+#
+# Parameters:
+#   movie_title (str): The title of the movie to search for in the OMDb database.
+#
+# Returns:
+#   dict: A dictionary containing the movie data retrieved from the OMDb API,
+#   served from the response cache when possible.
+###########################################################################
+def fetch_movie_data(movie_title):
+    params = {
+        't': movie_title,  # 't' is the parameter for the movie title
+    }
+    return _cached_get(params)
+
+
+###########################################################################
+# Purpose:
+#   Fetch a single page of OMDb search results for a year.
+#
+# Parameters:
+#   year (str | int): The release year to search for.
+#   page (int): The 1-based result page.
+#
+# Returns:
+#   dict | None: The decoded OMDb response, or None if the request failed
+#   or timed out.
+###########################################################################
+def fetch_search_page(year, page):
+    params = {
+        's': SEARCH_TERM,
+        'y': year,
+        'page': page
+    }
+    with span("omdb.search_page", year=str(year), page=page):
+        try:
+            return _cached_get(params)
+        except requests.RequestException:
+            return None
+
+
+# Fetch a search page from OMDb even if it is cached, and cache the new response.
+def refresh_search_page(year, page):
+    params = {
+        's': SEARCH_TERM,
+        'y': year,
+        'page': page
+    }
+    try:
+        return _cached_get(params, refresh=True)
+    except requests.RequestException:
+        return None
+
+
+# Cache key of a search page, as used by `fetch_search_page`.
+def search_page_key(year, page):
+    return cache_key({'s': SEARCH_TERM, 'y': year, 'page': page})
+
+
+###########################################################################
+# Purpose:
+#   Send an OMDb query through the response cache.
+#
+# Process:
+#   - Returns the cached response for the same parameters if there is one,
+#     unless `refresh` asks for a new one.
+#   - A response past its TTL but within `OMDB_CACHE_STALE_TTL` is returned
+#     at once and marked stale for the request (see `track_stale`), while a
+#     background thread fetches a fresh one (stale-while-revalidate).
+#   - Otherwise queries OMDb, coalescing concurrent identical queries, and
+#     caches the response when it holds results; errors such as
+#     "Request limit reached!" are never cached.
+#
+# Returns:
+#   dict | None: The decoded OMDb response, or None on a non-200 status.
+###########################################################################
+def _cached_get(params, refresh=False):
+    key = cache_key(params)
+    if not refresh:
+        entry = lookup_cache(key)
+        if entry is not None:
+            data, fresh = entry
+            if not fresh:
+                mark_stale(key)
+                _revalidate(key, params)
+            record_page("hit" if fresh else "stale")
+            return data
+
+    with span("omdb.request", endpoint=omdb_endpoint(params)):
+        data, _ = _flights.do(key, lambda: _fetch_and_cache(key, params))
+    return data
+
+
+# Cache lookup of an OMDb response, traced with its result (hit, stale or miss).
+def lookup_cache(key):
+    with span("cache.lookup") as attributes:
+        entry = get_cache().get_entry(key)
+        if attributes is not None:
+            attributes["result"] = "miss" if entry is None else "hit" if entry[1] else "stale"
+    return entry
+
+
+def _fetch_and_cache(key, params):
+    response = omdb_get(params)
+    record_page("upstream", len(response.content))
+    if response.status_code != 200:
+        return None
+    data = response.json()
+    if has_results(data):
+        get_cache().set(key, data)
+    return data
+
+
+# Fetch a stale response again in the background, once per key at a time.
+def _revalidate(key, params):
+    with _revalidating_lock:
+        if key in _revalidating:
+            return
+        _revalidating.add(key)
+
+    def run():
+        try:
+            _flights.do(key, lambda: _fetch_and_cache(key, params))
+        except requests.RequestException:
+            pass  # the stale response stays until its stale window ends
+        finally:
+            with _revalidating_lock:
+                _revalidating.discard(key)
+
+    _revalidator.submit(run)
+
+
+# Every field of the movie item, keyed by the field name used by the
+# templates and the GraphQL `Movie` type, with the OMDb key it is read from
+# (see common/columns.py).
+MOVIE_FIELDS = MOVIE_COLUMNS
+
+# Fields that OMDb search results never contain; filling them needs a detail
+# (`i=`) lookup per movie.
+DETAIL_FIELDS = frozenset(["genre", "director", "actors", "plot", "language",
+                           "country", "awards", "ratings"])
+
+
+###########################################################################
+# Purpose:
+#   Convert one raw OMDb movie record into the movie item structure used by
+#   the templates and the GraphQL `Movie` type. Batches of records are
+#   converted at once with `MovieColumns.from_records`.
+#
+# Parameters:
+#   movie_data (dict): The OMDb search or detail record.
+#   fields (iterable): Names of the fields to build; all of them if None.
+#
+# Returns:
+#   MovieItem: The movie item holding the requested fields.
+###########################################################################
+def to_movie_item(movie_data, fields=None):
+    return MovieColumns.from_records([movie_data], fields)[0]
+
+
+# True if building `fields` needs the detail record of each movie.
+def needs_details(fields):
+    return fields is not None and not DETAIL_FIELDS.isdisjoint(fields)
+
+
+def has_results(data):
+    return bool(data) and data.get("Response") == "True"
+
+
+# Number of result pages of a search, capped at `OMDB_MAX_PAGES`.
+def page_count(data):
+    try:
+        total_results = int(data.get("totalResults", 0))
+    except (TypeError, ValueError):
+        return 1
+    return min(max(1, math.ceil(total_results / PAGE_SIZE)), settings.OMDB_MAX_PAGES)
+
+
+###########################################################################
+# Purpose:
+#   Fetch the detail records of several movies at once.
+#
+# Parameters:
+#   imdb_ids (iterable): The IMDb ids of the movies; duplicates are fetched once.
+#
+# Process:
+#   - Sends one cached `i=` lookup per distinct id on a thread pool of
+#     `OMDB_DETAIL_CONCURRENCY` workers.
+#
+# Returns:
+#   dict: The detail record of every id that OMDb knows, keyed by IMDb id.
+###########################################################################
+def fetch_movie_details(imdb_ids):
+    imdb_ids = list(dict.fromkeys(imdb_id for imdb_id in imdb_ids if imdb_id))
+    if not imdb_ids:
+        return {}
+
+    def fetch(imdb_id):
+        with span("omdb.movie_detail", imdb_id=imdb_id):
+            try:
+                return _cached_get({'i': imdb_id})
+            except requests.RequestException:
+                return None
+
+    workers = max(1, min(settings.OMDB_DETAIL_CONCURRENCY, len(imdb_ids)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        details = executor.map(in_context(fetch), imdb_ids)
+        return {imdb_id: data for imdb_id, data in zip(imdb_ids, details) if has_results(data)}
+
+
+# Fetch the records of several movie titles at once, keyed by title.
+def fetch_movies_by_title(movie_titles):
+    movie_titles = list(movie_titles)
+    workers = max(1, min(settings.OMDB_DETAIL_CONCURRENCY, len(movie_titles)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        records = executor.map(in_context(fetch_movie_data), movie_titles)
+        return {title: data for title, data in zip(movie_titles, records) if has_results(data)}
+
+
+# Per-request loaders of movie detail records, by IMDb id and by title.
+def movie_detail_loader():
+    return DataLoader(fetch_movie_details)
+
+
+def movie_title_loader():
+    return DataLoader(fetch_movies_by_title)
+
+
+###########################################################################
+# Purpose:
+#   Merge the detail record of each movie over its search record.
+#
+# Parameters:
+#   records (list): OMDb search records.
+#   loader (DataLoader): The request's detail loader; a new one if None.
+#
+# Returns:
+#   list: New records holding both the search and the detail fields.
+###########################################################################
+def add_movie_details(records, loader=None):
+    if loader is None:
+        loader = movie_detail_loader()
+    details = loader.load_many(record.get("imdbID") for record in records)
+    return [dict(record, **(detail or {})) for record, detail in zip(records, details)]
+
+
+###########################################################################
+# Purpose:
+#   Fetch the raw OMDb search records of every movie released in a year.
+#
+# Parameters:
+#   year (str): The year of movie releases to search for.
+#   concurrency (int): Maximum number of pages fetched in parallel. Defaults
+#       to `settings.OMDB_PAGE_CONCURRENCY`; 1 walks the pages one by one.
+#
+# Process:
+#   - Fetches page 1 and reads `totalResults` to work out the page count.
+#   - With a concurrency above 1, fetches the remaining pages on a bounded
+#     thread pool, keeping them in page order.
+#   - Otherwise keeps requesting the next page until OMDb reports no more
+#     results or a request fails.
+#   - Never fetches more than `OMDB_MAX_PAGES` pages.
+#   - Concurrent calls for the same year share one run and the same list,
+#     which callers must not modify. The pages served stale during the run
+#     are marked stale for every caller.
+#   - Each run is recorded in the fetch timings store (see
+#     `common/timings.py`): page count, bytes, latency and cache status.
+#   - The records of a run where every page came back are ingested into the
+#     local catalog (see `common/catalog.py`).
+#
+# Returns:
+#   tuple:
+#     - list: The OMDb search records, in page order.
+#     - float: The total time (in seconds) taken to fetch all the pages.
+###########################################################################
+def fetch_search_records(year, concurrency=None):
+    key = ("fetch_search_records", str(year).strip())
+
+    def run():
+        with track_stale() as stale_keys, measure_fetch() as timing:
+            records, time_taken, complete = _fetch_search_records(year, concurrency)
+        record_fetch(year, len(records), timing, time_taken)
+        if complete:
+            ingest_records(year, records)
+        return (records, time_taken), stale_keys
+
+    (result, stale_keys), _ = _flights.do(key, run)
+    for stale_key in stale_keys:
+        mark_stale(stale_key)
+    return result
+
+
+# Fetch the search pages of a year; also returns whether none of them failed.
+def _fetch_search_records(year, concurrency):
+    if concurrency is None:
+        concurrency = settings.OMDB_PAGE_CONCURRENCY
+    start_time = time.time()
+
+    pages = []
+    first_page = fetch_search_page(year, 1)
+    complete = first_page is not None
+    if has_results(first_page):
+        pages.append(first_page)
+        total_pages = page_count(first_page)
+
+        if concurrency > 1 and total_pages > 1:
+            workers = min(concurrency, total_pages - 1)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                pages.extend(executor.map(in_context(lambda page: fetch_search_page(year, page)),
+                                          range(2, total_pages + 1)))
+            complete = None not in pages
+        else:
+            for page in range(2, settings.OMDB_MAX_PAGES + 1):
+                data = fetch_search_page(year, page)
+                if not has_results(data):
+                    complete = data is not None
+                    break
+                pages.append(data)
+
+    records = [movie_data
+               for data in pages if has_results(data)
+               for movie_data in data.get("Search", [])]
+
+    time_taken = time.time() - start_time
+    return records, time_taken, complete
+
+
+###########################################################################
+# Purpose:
+#   Fetch a window of the search records of a year, requesting only the
+#   OMDb pages that hold it.
+#
+# Parameters:
+#   year (int): The release year.
+#   offset (int): Index of the first record wanted, in OMDb order.
+#   limit (int): Number of records wanted.
+#
+# Process:
+#   - Slices the local catalog's copy of the year when it is fresh.
+#   - Otherwise fetches the page holding `offset` and, from its
+#     `totalResults`, the following pages the window needs, in parallel.
+#
+# Returns:
+#   tuple:
+#     - list: Up to `limit` OMDb search records from `offset` on.
+#     - bool: True if the year has no records after them; False when more
+#       are left or a page failed.
+###########################################################################
+def fetch_search_window(year, offset, limit):
+    records = catalog_records(year)
+    if records is not None:
+        return records[offset:offset + limit], offset + limit >= len(records)
+
+    first_page = offset // PAGE_SIZE + 1
+    if first_page > settings.OMDB_MAX_PAGES:
+        return [], True
+    data = fetch_search_page(year, first_page)
+    if not has_results(data):
+        return [], data is not None
+    total_pages = page_count(data)
+    last_page = min(total_pages, (offset + limit - 1) // PAGE_SIZE + 1)
+
+    pages = [data]
+    if last_page > first_page:
+        workers = max(1, min(settings.OMDB_PAGE_CONCURRENCY, last_page - first_page))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pages.extend(executor.map(in_context(lambda page: fetch_search_page(year, page)),
+                                      range(first_page + 1, last_page + 1)))
+    return search_window(pages, offset - (first_page - 1) * PAGE_SIZE, limit, last_page == total_pages)
+
+
+# Cut the window out of the pages fetched for it (see `fetch_search_window`).
+def search_window(pages, start, limit, last_page_fetched):
+    records, exhausted = [], last_page_fetched
+    for data in pages:
+        if not has_results(data):
+            exhausted = data is not None  # no results: the listing ended early
+            break
+        records.extend(data.get("Search", []))
+    return records[start:start + limit], exhausted and start + limit >= len(records)
+
+
+###########################################################################
+# Purpose:
+#   Fetch one page of the movies of several years, as a Relay connection.
+#
+# Parameters:
+#   years (iterable): The release years listed, in order.
+#   limit (int): Movies per page (see `pagination.page_size`).
+#   cursor (str): Cursor of the movie the page starts after; the first movie
+#       of the first year if None.
+#   fields (iterable): Movie item fields to build; all of them if None.
+#   detail_loader (DataLoader): The request's movie detail loader.
+#
+# Process:
+#   - Reads `limit + 1` movies from the cursor on, year after year, with
+#     `fetch_search_window`; the extra movie tells if there is a next page.
+#     Only the OMDb pages of the window are fetched, so the work and the
+#     payload grow with `limit`, not with the number of years.
+#   - Fetches the detail records of the page's movies only.
+#
+# Returns:
+#   dict: `edges` and `pageInfo` (see `pagination.connection`).
+#
+# Raises:
+#   ValueError: The cursor is malformed or points outside of `years`.
+###########################################################################
+def fetch_movies_page(years, limit=None, cursor=None, fields=None, detail_loader=None):
+    years = [int(year) for year in years]
+    limit = page_size(limit)
+    position, offset = start_position(years, cursor)
+
+    entries, exhausted = [], True
+    for year in years[position:]:
+        records, exhausted = fetch_search_window(year, offset, limit + 1 - len(entries))
+        entries.extend((year, offset + index, record) for index, record in enumerate(records))
+        if len(entries) > limit or not exhausted:
+            break  # not exhausted with fewer movies: a page failed, the next page resumes there
+        offset = 0
+
+    has_next_page = len(entries) > limit or not exhausted
+    entries = entries[:limit]
+    records = [record for _, _, record in entries]
+    if needs_details(fields):
+        records = add_movie_details(records, detail_loader)
+    return connection([(year, index, movie_item)
+                       for (year, index, _), movie_item in zip(entries, MovieColumns.from_records(records, fields))],
+                      has_next_page)
+
+
+###########################################################################
+# Purpose:
+#   Fetch a list of movies released in a specified year from the OMDb API.
+#   This function handles paginated results, processes the movie data, and
+#   tracks the time taken for the fetch operation.
+#
+# Parameters:
+#   year (str): The year of movie releases to search for.
+#   concurrency (int): Maximum number of pages fetched in parallel.
+#   fields (iterable): Movie item fields to build; all of them if None. The
+#       detail records are only fetched when a field of `DETAIL_FIELDS` is
+#       requested explicitly.
+#   detail_loader (DataLoader): The request's movie detail loader.
+#
+# Process:
+#   - Serves the year from the local catalog while it holds a fresh copy
+#     (with the details, when they are needed), and records that as a cache
+#     hit in the fetch timings; otherwise fetches it from OMDb, which
+#     ingests and records it, and ingests the details fetched for it.
+#
+# Returns:
+#   tuple:
+#     - MovieColumns: The movie items of the year (see common/columns.py).
+#     - float: The total time (in seconds) taken to fetch all the movies.
+###########################################################################
+def fetch_all_movies(year, concurrency=None, fields=None, detail_loader=None):
+    start_time = time.time()
+    with_details = needs_details(fields)
+    with span("catalog.lookup", year=str(year)) as attributes:
+        records = catalog_records(year, with_details)
+        if attributes is not None:
+            attributes["result"] = "miss" if records is None else "hit"
+    from_catalog = records is not None
+    if not from_catalog:
+        records, _ = fetch_search_records(year, concurrency)
+        if with_details:
+            records = add_movie_details(records, detail_loader)
+            ingest_details(records)
+    movie_items = MovieColumns.from_records(records, fields)
+
+    time_taken = time.time() - start_time
+    if from_catalog:
+        record_catalog_hit(year, records, time_taken)
+    return movie_items, time_taken
+
+
+# Record a year served by the catalog like a fetch whose search pages were
+# all cache hits, so it counts in the timings and their cache hit ratio.
+def record_catalog_hit(year, records, time_taken):
+    timing = FetchTiming()
+    timing.cache_hits = max(1, min(math.ceil(len(records) / PAGE_SIZE), settings.OMDB_MAX_PAGES))
+    record_fetch(year, len(records), timing, time_taken)
+
+
+###########################################################################
+# Purpose:
+#   Fetch the movies of several years at the same time, handing out each
+#   year as soon as it and the years before it are done.
+#
+# Parameters:
+#   years (iterable): The release years to fetch.
+#   concurrency (int): Maximum number of years fetched in parallel. Defaults
+#       to `settings.OMDB_YEAR_CONCURRENCY`; 1 fetches the years one by one.
+#   fields (iterable): Movie item fields to build; all of them if None.
+#   detail_loader (DataLoader): The request's movie detail loader.
+#
+# Process:
+#   - Runs `fetch_all_movies` for at most `concurrency` years at a time on a
+#     bounded thread pool, starting the next year when the oldest one is
+#     handed out, so only that many years are held in memory.
+#   - Yields the years in the order they were given.
+#
+# Returns:
+#   generator: One (year, movie_items, time_taken) tuple per year.
+###########################################################################
+def iter_years(years, concurrency=None, fields=None, detail_loader=None):
+    years = list(years)
+    if concurrency is None:
+        concurrency = settings.OMDB_YEAR_CONCURRENCY
+    if needs_details(fields) and detail_loader is None:
+        detail_loader = movie_detail_loader()
+
+    def fetch_year(year):
+        return fetch_all_movies(year, fields=fields, detail_loader=detail_loader)
+
+    if concurrency <= 1 or len(years) <= 1:
+        for year in years:
+            yield (year, *fetch_year(year))
+        return
+
+    remaining = iter(years)
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(years))) as executor:
+        fetch = in_context(fetch_year)
+        pending = deque((year, executor.submit(fetch, year)) for year in islice(remaining, concurrency))
+        while pending:
+            year, future = pending.popleft()
+            movie_items, time_taken = future.result()
+            for next_year in islice(remaining, 1):
+                pending.append((next_year, executor.submit(fetch, next_year)))
+            yield year, movie_items, time_taken
+
+
+# All the years of `iter_years` at once, as a list.
+def fetch_years(years, concurrency=None, fields=None, detail_loader=None):
+    return list(iter_years(years, concurrency, fields, detail_loader))
+
+
+# The years listed for the last `num_years` years, oldest first.
+def year_range(num_years):
+    return range(LAST_YEAR - int(num_years), LAST_YEAR + 1)
+
+
+# Movie items of the last `num_years` years, oldest year first, yielded year
+# by year for the streaming responses.
+def iter_movies_by_years(num_years, fields=None, detail_loader=None):
+    years = year_range(num_years)
+    for year, movie_items, time_taken in iter_years(years, fields=fields, detail_loader=detail_loader):
+        yield from movie_items
+
+
+###########################################################################
+# Purpose:
+#   Fetch the movies released in the last `num_years` years and combine them
+#   into one list.
+#
+# Parameters:
+#   num_years (str | int): The number of past years to fetch.
+#   fields (iterable): Movie item fields to build; all of them if None.
+#   detail_loader (DataLoader): The request's movie detail loader.
+#
+# Returns:
+#   MovieColumns: The combined movie items of all the years, oldest year first.
+###########################################################################
+def fetch_movies_by_years(num_years, fields=None, detail_loader=None):
+    years = year_range(num_years)
+    return MovieColumns.concat(movie_items for year, movie_items, time_taken
+                               in fetch_years(years, fields=fields, detail_loader=detail_loader))
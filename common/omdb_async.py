@@ -0,0 +1,402 @@
+import asyncio
+import time
+from collections import deque
+from itertools import islice
+
+import httpx
+
+from common.cache import cache_key, get_cache
+from common.catalog import catalog_records, ingest_details, ingest_records
+from common.columns import MovieColumns
+from common.dataloader import AsyncDataLoader
+from common.metrics import OMDB_POOL_IN_USE, OMDB_POOL_REJECTIONS, OMDB_REQUEST_DURATION, omdb_endpoint
+from common.omdb import (PAGE_SIZE, SEARCH_TERM, has_results, lookup_cache, needs_details, page_count,
+                         record_catalog_hit, search_window, year_range)
+from common.pagination import connection, page_size, start_position
+from common.resilience import UpstreamUnavailable, call_with_retries_async, mark_stale, track_stale
+from common.settings import settings
+from common.singleflight import AsyncSingleFlight
+from common.timings import measure_fetch, record_fetch, record_page
+from common.tracing import span
+
+
+###########################################################################
+# asyncio versions of the OMDb helpers in `common/omdb.py`, used by the
+# ASGI deployment of the GraphQL service. They share the response cache and
+# the settings of the threaded helpers, but wait for OMDb on the event loop
+# instead of blocking a worker thread per request.
+###########################################################################
+
+_client = None
+_client_loop = None
+_flights = AsyncSingleFlight()
+# Background refreshes of the responses served stale, by cache key.
+_revalidations = {}
+
+# Errors of a failed OMDb request on the async path, and of a request that
+# found no free connection (not counted against the circuit, not retried).
+REQUEST_ERRORS = (httpx.HTTPError, UpstreamUnavailable)
+POOL_ERRORS = (httpx.PoolTimeout,)
+
+
+###########################################################################
+# Purpose:
+#   Return the async HTTP client of the running event loop, creating it on
+#   first use with a keep-alive pool of `OMDB_POOL_SIZE` connections and the
+#   configured connect/read timeouts. A request waits at most the connect
+#   timeout for a free connection.
+###########################################################################
+def get_async_client():
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        limits = httpx.Limits(max_connections=settings.OMDB_POOL_SIZE,
+                              max_keepalive_connections=settings.OMDB_POOL_SIZE)
+        timeout = httpx.Timeout(settings.OMDB_READ_TIMEOUT, connect=settings.OMDB_CONNECT_TIMEOUT,
+                                pool=settings.OMDB_CONNECT_TIMEOUT)
+        _client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        _client_loop = loop
+    return _client
+
+
+async def close_async_client():
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        _client_loop = None
+
+
+# Call the response cache without blocking the event loop: the backends doing
+# disk I/O (SQLite) are called on a worker thread, the memory cache inline.
+async def _call_cache(function, *args):
+    if get_cache().blocking:
+        return await asyncio.to_thread(function, *args)
+    return function(*args)
+
+
+# Async counterpart of `omdb._cached_get`, serving stale responses while a
+# background task fetches fresh ones.
+async def _cached_get(params):
+    key = cache_key(params)
+    entry = await _call_cache(lookup_cache, key)
+    if entry is not None:
+        data, fresh = entry
+        if not fresh:
+            mark_stale(key)
+            _revalidate(key, params)
+        record_page("hit" if fresh else "stale")
+        return data
+
+    with span("omdb.request", endpoint=omdb_endpoint(params)):
+        data, _ = await _flights.do(key, lambda: _fetch_and_cache(key, params))
+    return data
+
+
+# Send one OMDb request attempt, recording its duration by endpoint like
+# `upstream.omdb_get`; a pool timeout counts as a pool rejection.
+async def _send(params, endpoint):
+    start = time.perf_counter()
+    OMDB_POOL_IN_USE.inc()
+    status = "error"
+    try:
+        response = await get_async_client().get(settings.OMDB_API_URL, params=params)
+        status = response.status_code
+        return response
+    except POOL_ERRORS:
+        OMDB_POOL_REJECTIONS.inc()
+        raise
+    finally:
+        OMDB_POOL_IN_USE.dec()
+        OMDB_REQUEST_DURATION.labels(endpoint, status).observe(time.perf_counter() - start)
+
+
+# Async counterpart of `upstream.omdb_get` and `omdb._fetch_and_cache`. A 200
+# whose body isn't JSON fails like the request itself (as `requests` does on
+# the threaded path), so callers treat it as a failed page.
+async def _fetch_and_cache(key, params):
+    endpoint = omdb_endpoint(params)
+    params = dict(params, apikey=settings.OMDB_API_KEY)
+    response = await call_with_retries_async("omdb", lambda: _send(params, endpoint), REQUEST_ERRORS, POOL_ERRORS)
+    record_page("upstream", len(response.content))
+    if response.status_code != 200:
+        return None
+    try:
+        data = response.json()
+    except ValueError as error:
+        raise httpx.DecodingError(f"OMDb answered with invalid JSON: {error}", request=response.request) from error
+    if has_results(data):
+        await _call_cache(get_cache().set, key, data)
+    return data
+
+
+def _revalidate(key, params):
+    if key in _revalidations:
+        return
+
+    async def run():
+        try:
+            await _flights.do(key, lambda: _fetch_and_cache(key, params))
+        except REQUEST_ERRORS:
+            pass  # the stale response stays until its stale window ends
+        finally:
+            del _revalidations[key]
+
+    _revalidations[key] = asyncio.get_running_loop().create_task(run())
+
+
+async def fetch_movie_data_async(movie_title):
+    return await _cached_get({'t': movie_title})
+
+
+async def fetch_search_page_async(year, page):
+    params = {
+        's': SEARCH_TERM,
+        'y': year,
+        'page': page
+    }
+    with span("omdb.search_page", year=str(year), page=page):
+        try:
+            return await _cached_get(params)
+        except REQUEST_ERRORS:
+            return None
+
+
+# Async counterpart of `omdb.fetch_movie_details`, bounded by `OMDB_DETAIL_CONCURRENCY`.
+async def fetch_movie_details_async(imdb_ids):
+    imdb_ids = list(dict.fromkeys(imdb_id for imdb_id in imdb_ids if imdb_id))
+    semaphore = asyncio.Semaphore(max(1, settings.OMDB_DETAIL_CONCURRENCY))
+
+    async def fetch(imdb_id):
+        async with semaphore:
+            with span("omdb.movie_detail", imdb_id=imdb_id):
+                try:
+                    return await _cached_get({'i': imdb_id})
+                except REQUEST_ERRORS:
+                    return None
+
+    details = await asyncio.gather(*(fetch(imdb_id) for imdb_id in imdb_ids))
+    return {imdb_id: data for imdb_id, data in zip(imdb_ids, details) if has_results(data)}
+
+
+# Per-request loader of movie detail records: the detail loads of every year
+# awaited in the same pass of the event loop go out as one batch.
+def movie_detail_loader_async():
+    return AsyncDataLoader(fetch_movie_details_async)
+
+
+async def add_movie_details_async(records, loader=None):
+    if loader is None:
+        loader = movie_detail_loader_async()
+    details = await loader.load_many(record.get("imdbID") for record in records)
+    return [dict(record, **(detail or {})) for record, detail in zip(records, details)]
+
+
+###########################################################################
+# Purpose:
+#   Fetch the raw OMDb search records of a year, like
+#   `omdb.fetch_search_records`.
+#
+# Process:
+#   - Fetches page 1 to learn the page count, then awaits the remaining
+#     pages together, at most `concurrency` at a time.
+#   - Concurrent calls for the same year share one run, and its stale pages.
+#   - Each run is recorded in the fetch timings store, off the event loop.
+#
+# Returns:
+#   tuple:
+#     - list: The OMDb search records, in page order.
+#     - float: The time (in seconds) taken to fetch them.
+###########################################################################
+async def fetch_search_records_async(year, concurrency=None):
+    key = ("fetch_search_records", str(year).strip())
+
+    async def run():
+        with track_stale() as stale_keys, measure_fetch() as timing:
+            records, time_taken, complete = await _fetch_search_records_async(year, concurrency)
+        await asyncio.to_thread(record_fetch, year, len(records), timing, time_taken)
+        if complete:
+            await asyncio.to_thread(ingest_records, year, records)
+        return (records, time_taken), stale_keys
+
+    (result, stale_keys), _ = await _flights.do(key, run)
+    for stale_key in stale_keys:
+        mark_stale(stale_key)
+    return result
+
+
+async def _fetch_search_records_async(year, concurrency):
+    if concurrency is None:
+        concurrency = settings.OMDB_PAGE_CONCURRENCY
+    start_time = time.time()
+
+    pages = []
+    first_page = await fetch_search_page_async(year, 1)
+    complete = first_page is not None
+    if has_results(first_page):
+        pages.append(first_page)
+        total_pages = page_count(first_page)
+
+        if concurrency > 1 and total_pages > 1:
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def fetch_page(page):
+                async with semaphore:
+                    return await fetch_search_page_async(year, page)
+
+            pages.extend(await asyncio.gather(*(fetch_page(page)
+                                                for page in range(2, total_pages + 1))))
+            complete = None not in pages
+        else:
+            for page in range(2, settings.OMDB_MAX_PAGES + 1):
+                data = await fetch_search_page_async(year, page)
+                if not has_results(data):
+                    complete = data is not None
+                    break
+                pages.append(data)
+
+    records = [movie_data
+               for data in pages if has_results(data)
+               for movie_data in data.get("Search", [])]
+
+    time_taken = time.time() - start_time
+    return records, time_taken, complete
+
+
+# Async counterpart of `omdb.fetch_search_window`: the pages of the window
+# are awaited together.
+async def fetch_search_window_async(year, offset, limit):
+    records = await asyncio.to_thread(catalog_records, year)
+    if records is not None:
+        return records[offset:offset + limit], offset + limit >= len(records)
+
+    first_page = offset // PAGE_SIZE + 1
+    if first_page > settings.OMDB_MAX_PAGES:
+        return [], True
+    data = await fetch_search_page_async(year, first_page)
+    if not has_results(data):
+        return [], data is not None
+    total_pages = page_count(data)
+    last_page = min(total_pages, (offset + limit - 1) // PAGE_SIZE + 1)
+
+    semaphore = asyncio.Semaphore(max(1, settings.OMDB_PAGE_CONCURRENCY))
+
+    async def fetch_page(page):
+        async with semaphore:
+            return await fetch_search_page_async(year, page)
+
+    pages = [data, *await asyncio.gather(*(fetch_page(page) for page in range(first_page + 1, last_page + 1)))]
+    return search_window(pages, offset - (first_page - 1) * PAGE_SIZE, limit, last_page == total_pages)
+
+
+# Async counterpart of `omdb.fetch_movies_page`.
+async def fetch_movies_page_async(years, limit=None, cursor=None, fields=None, detail_loader=None):
+    years = [int(year) for year in years]
+    limit = page_size(limit)
+    position, offset = start_position(years, cursor)
+
+    entries, exhausted = [], True
+    for year in years[position:]:
+        records, exhausted = await fetch_search_window_async(year, offset, limit + 1 - len(entries))
+        entries.extend((year, offset + index, record) for index, record in enumerate(records))
+        if len(entries) > limit or not exhausted:
+            break
+        offset = 0
+
+    has_next_page = len(entries) > limit or not exhausted
+    entries = entries[:limit]
+    records = [record for _, _, record in entries]
+    if needs_details(fields):
+        records = await add_movie_details_async(records, detail_loader)
+    return connection([(year, index, movie_item)
+                       for (year, index, _), movie_item in zip(entries, MovieColumns.from_records(records, fields))],
+                      has_next_page)
+
+
+# Async counterpart of `omdb.fetch_all_movies`; the catalog is read and
+# written on a worker thread.
+async def fetch_all_movies_async(year, concurrency=None, fields=None, detail_loader=None):
+    start_time = time.time()
+    with_details = needs_details(fields)
+    with span("catalog.lookup", year=str(year)) as attributes:
+        records = await asyncio.to_thread(catalog_records, year, with_details)
+        if attributes is not None:
+            attributes["result"] = "miss" if records is None else "hit"
+    from_catalog = records is not None
+    if not from_catalog:
+        records, _ = await fetch_search_records_async(year, concurrency)
+        if with_details:
+            records = await add_movie_details_async(records, detail_loader)
+            await asyncio.to_thread(ingest_details, records)
+    movie_items = MovieColumns.from_records(records, fields)
+
+    time_taken = time.time() - start_time
+    if from_catalog:
+        await asyncio.to_thread(record_catalog_hit, year, records, time_taken)
+    return movie_items, time_taken
+
+
+###########################################################################
+# Purpose:
+#   Fetch several years at once, at most `concurrency` at a time.
+#
+# Returns:
+#   list: One (year, movie_items, time_taken) tuple per year, in the order
+#   the years were given.
+###########################################################################
+async def fetch_years_async(years, concurrency=None, fields=None, detail_loader=None):
+    years = list(years)
+    if concurrency is None:
+        concurrency = settings.OMDB_YEAR_CONCURRENCY
+    if needs_details(fields) and detail_loader is None:
+        detail_loader = movie_detail_loader_async()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch_year(year):
+        async with semaphore:
+            movie_items, time_taken = await fetch_all_movies_async(
+                year, fields=fields, detail_loader=detail_loader)
+        return year, movie_items, time_taken
+
+    return await asyncio.gather(*(fetch_year(year) for year in years))
+
+
+# Async counterpart of `omdb.iter_years`: at most `concurrency` years are
+# fetched (and held) at a time, and handed out in the order given.
+async def iter_years_async(years, concurrency=None, fields=None, detail_loader=None):
+    years = list(years)
+    if concurrency is None:
+        concurrency = settings.OMDB_YEAR_CONCURRENCY
+    if needs_details(fields) and detail_loader is None:
+        detail_loader = movie_detail_loader_async()
+
+    def start(year):
+        return asyncio.ensure_future(fetch_all_movies_async(year, fields=fields, detail_loader=detail_loader))
+
+    remaining = iter(years)
+    pending = deque((year, start(year)) for year in islice(remaining, max(1, concurrency)))
+    try:
+        while pending:
+            year, task = pending[0]
+            movie_items, time_taken = await task
+            pending.popleft()
+            for next_year in islice(remaining, 1):
+                pending.append((next_year, start(next_year)))
+            yield year, movie_items, time_taken
+    finally:
+        for _, task in pending:
+            task.cancel()
+
+
+# Async counterpart of `omdb.iter_movies_by_years`, for `allMovies @stream`.
+async def iter_movies_by_years_async(num_years, fields=None, detail_loader=None):
+    years = year_range(num_years)
+    async for year, movie_items, time_taken in iter_years_async(years, fields=fields, detail_loader=detail_loader):
+        for movie_item in movie_items:
+            yield movie_item
+
+
+async def fetch_movies_by_years_async(num_years, fields=None, detail_loader=None):
+    years = year_range(num_years)
+    return MovieColumns.concat(movie_items for year, movie_items, time_taken
+                               in await fetch_years_async(years, fields=fields, detail_loader=detail_loader))
@@ -0,0 +1,80 @@
+import base64
+import binascii
+
+
+# Movies per page when a client asks for a page without a size, and the
+# largest page it may ask for.
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+# Opaque cursor of the movie at `index` (0-based, in OMDb order) of a year's
+# listing, e.g. "bW92aWU6MjAyMDoxNQ" for the 16th movie of 2020.
+def encode_cursor(year, index):
+    return base64.urlsafe_b64encode(f"movie:{int(year)}:{int(index)}".encode()).decode().rstrip("=")
+
+
+###########################################################################
+# Purpose:
+#   Read back a cursor made by `encode_cursor`.
+#
+# Returns:
+#   tuple: The (year, index) the cursor points at.
+#
+# Raises:
+#   ValueError: The cursor is malformed.
+###########################################################################
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        kind, year, index = base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+        if kind != "movie" or int(index) < 0:
+            raise ValueError
+        return int(year), int(index)
+    except (ValueError, TypeError, AttributeError, binascii.Error, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}") from None
+
+
+# Page size asked for by a client, within 1..MAX_PAGE_SIZE.
+def page_size(limit):
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+###########################################################################
+# Purpose:
+#   Position to start a page of movies at: the first movie of the first
+#   year, or the movie after the cursor.
+#
+# Parameters:
+#   years (list): The years listed, in order.
+#   cursor (str | None): The `after` cursor of the request.
+#
+# Returns:
+#   tuple: The position in `years` of the first year to read, and the index
+#   of the first movie to read in that year.
+#
+# Raises:
+#   ValueError: The cursor is malformed or points at a year not listed.
+###########################################################################
+def start_position(years, cursor):
+    if not cursor:
+        return 0, 0
+    year, index = decode_cursor(cursor)
+    if year not in years:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return years.index(year), index + 1
+
+
+# Shape the movies of a page, as (year, index, movie_item), like a Relay
+# connection: `edges` ({cursor, node}) and `pageInfo`.
+def connection(entries, has_next_page):
+    edges = [{"cursor": encode_cursor(year, index), "node": movie_item} for year, index, movie_item in entries]
+    return {
+        "edges": edges,
+        "pageInfo": {
+            "hasNextPage": has_next_page,
+            "endCursor": edges[-1]["cursor"] if edges else None,
+        },
+    }
@@ -0,0 +1,210 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from common.omdb import LAST_YEAR, fetch_years
+from common.settings import settings
+from common.timings import get_timing_store
+
+
+# Performance of `year` from the fetch timings history: the movie count of
+# its latest fetch and the median time of its uncached fetches (of all its
+# fetches if it was always served from the cache). None if it was never
+# fetched or the history is off.
+def recorded_performance(year):
+    store = get_timing_store()
+    summary = store.year_summary(year) if store is not None else None
+    if summary is None:
+        return None
+    time_taken = summary["upstream_latency"]
+    return {"year": summary["year"], "count": summary["movie_count"],
+            "time_taken": summary["latency"] if time_taken is None else time_taken,
+            "samples": summary["samples"], "cache_hit_ratio": summary["cache_hit_ratio"],
+            "last_fetched": datetime.fromtimestamp(summary["last_fetched"], timezone.utc).isoformat()}
+
+
+###########################################################################
+# Purpose:
+#   Get the movie count and fetch time of each of the last years, the data
+#   shown by the performance plots.
+#
+# Parameters:
+#   num_years (int): The number of past years; covers the same years as
+#       `fetch_movies_by_years`.
+#
+# Process:
+#   - Reads each year from the fetch timings history, so a plot shows the
+#     fetch times recorded by the services instead of timing a new fetch.
+#   - Years never fetched are fetched once (which records them); their
+#     live numbers are used when the history is off.
+#
+# Returns:
+#   list: One {"year", "count", "time_taken", ...} dict per year, oldest first.
+###########################################################################
+def performance_data(num_years):
+    years = range(LAST_YEAR - int(num_years), LAST_YEAR + 1)
+    years_data = {year: recorded_performance(year) for year in years}
+    missing = [year for year, data in years_data.items() if data is None]
+    # only the count is plotted: no movie field needs to be built
+    for year, movie_items, time_taken in fetch_years(missing, fields=()):
+        years_data[year] = recorded_performance(year) or {
+            "year": year, "count": len(movie_items), "time_taken": time_taken}
+    return [years_data[year] for year in years]
+
+
+###########################################################################
+# Purpose:
+#   Draw the performance plot of `years_data` into a PNG file.
+#
+# Process:
+#   - Uses a standalone matplotlib Figure with its own Agg canvas instead of
+#     pyplot, so concurrent renders share no global state.
+#   - Movie counts go on the left y-axis, fetch times on the right one.
+#   - Writes to a temporary file renamed over `path`, so readers never see
+#     a half-written image.
+###########################################################################
+def render_performance_plot(years_data, title, path):
+    years = [data['year'] for data in years_data]
+    movie_counts = [data['count'] for data in years_data]
+    time_taken = [data['time_taken'] for data in years_data]
+
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax1 = fig.add_subplot()
+    ax1.set_xlabel('Year')
+    ax1.set_ylabel('Movie Count', color='tab:blue')
+    ax1.plot(years, movie_counts, color='tab:blue', marker='o', label='Movie Count')
+    ax1.tick_params(axis='y', labelcolor='tab:blue')
+
+    ax2 = ax1.twinx()
+    ax2.set_ylabel('Time Taken (seconds)', color='tab:red')
+    ax2.plot(years, time_taken, color='tab:red', marker='o', label='Time Taken')
+    ax2.tick_params(axis='y', labelcolor='tab:red')
+
+    ax1.set_title(title)
+    fig.tight_layout()
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.{threading.get_ident()}.tmp"
+    fig.savefig(temp_path, format="png")
+    os.replace(temp_path, path)
+    return path
+
+
+###########################################################################
+# Purpose:
+#   A performance plot requested from a PlotRenderer.
+#
+#   id:     content address of the plot (service, years, data version)
+#   status: "pending", "done" or "failed"
+#   url:    where the image is served once done
+###########################################################################
+class PlotJob:
+    def __init__(self, job_id, service, num_years, url):
+        self.id = job_id
+        self.service = service
+        self.num_years = num_years
+        self.url = url
+        self.status = "pending"
+        self.error = None
+        self.created_at = time.time()
+
+    def to_dict(self):
+        return {"job_id": self.id, "status": self.status, "plot_url": self.url,
+                "service": self.service, "num_years": self.num_years, "error": self.error}
+
+
+###########################################################################
+# Purpose:
+#   Render the performance plots of a service off the request thread, and
+#   cache them.
+#
+# Parameters:
+#   service (str): "rest" or "graphql", used in the plot title and file names.
+#   output_dir (str): Folder the PNG files are written to.
+#   url_prefix (str): Url under which `output_dir` is served.
+#   max_plots (int): Number of plots kept; older files are deleted.
+#
+# Process:
+#   - `request_plot(num_years)` returns at once. A plot is addressed by the
+#     hash of (service, years, data version), where the data version is the
+#     latest OMDb fetch of those years in the fetch timings history, so a
+#     plot is drawn again only once new timings were recorded (every
+#     `OMDB_CACHE_TTL` seconds when the history is off). The file name is
+#     that hash, so a finished plot is served from its file without any work.
+#   - Missing plots are queued for a single render worker thread, which
+#     fetches the data and draws it. Repeated requests for a plot being
+#     rendered share its job; a failed job is tried again.
+#   - `get_job(job_id)` returns the job, to poll its status.
+###########################################################################
+class PlotRenderer:
+    def __init__(self, service, output_dir, url_prefix, max_plots=64):
+        self.service = service
+        self.output_dir = output_dir
+        self.url_prefix = url_prefix.rstrip("/")
+        self.max_plots = max_plots
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{service}-plot-render")
+
+    def _job_id(self, num_years):
+        store = get_timing_store()
+        if store is not None:
+            data_version = store.version(range(LAST_YEAR - num_years, LAST_YEAR + 1))
+        else:
+            data_version = int(time.time() // settings.OMDB_CACHE_TTL)
+        content = f"{self.service}:{LAST_YEAR - num_years}-{LAST_YEAR}:{data_version}"
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+    def _path(self, job_id):
+        return os.path.join(self.output_dir, f"{self.service}-{job_id}.png")
+
+    def request_plot(self, num_years):
+        num_years = int(num_years)
+        job_id = self._job_id(num_years)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                self._jobs.move_to_end(job_id)
+                if job.status == "failed":  # try again
+                    job.status, job.error = "pending", None
+                    self._worker.submit(self._render, job)
+                return job
+            job = PlotJob(job_id, self.service, num_years, f"{self.url_prefix}/{self.service}-{job_id}.png")
+            self._jobs[job_id] = job
+            while len(self._jobs) > self.max_plots:
+                _, evicted = self._jobs.popitem(last=False)
+                self._remove(evicted)
+
+        if os.path.exists(self._path(job_id)):
+            job.status = "done"  # rendered before a restart
+        else:
+            self._worker.submit(self._render, job)
+        return job
+
+    def get_job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _render(self, job):
+        try:
+            years_data = performance_data(job.num_years)
+            render_performance_plot(years_data, f'{self.service.capitalize()} API Performance for each Year',
+                                    self._path(job.id))
+            job.status = "done"
+        except Exception as error:
+            job.status = "failed"
+            job.error = str(error)
+
+    def _remove(self, job):
+        try:
+            os.remove(self._path(job.id))
+        except OSError:
+            pass
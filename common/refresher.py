@@ -0,0 +1,183 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+from common.cache import get_cache
+from common.omdb import LAST_YEAR, has_results, page_count, refresh_search_page, search_page_key
+from common.settings import settings
+
+
+# Seconds before a year whose refresh failed is tried again, and longest
+# sleep of the refresher between two checks of its schedule.
+RETRY_DELAY = 60
+MAX_SLEEP = 60
+
+
+def _timestamp(seconds):
+    if seconds is None:
+        return None
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat()
+
+
+###########################################################################
+# Purpose:
+#   Keep the OMDb search pages of the most recent years in the cache, so
+#   requests for those years never wait for the multi-page OMDb walk.
+#
+# Parameters:
+#   num_years (int): Number of years kept warm, counting back from LAST_YEAR.
+#   refresh_ahead (float): Seconds before a cached page expires at which it
+#       is fetched again (capped to half the cache TTL).
+#   rate (float): Maximum number of OMDb requests per second sent by the
+#       refresher, so it never competes with user requests for the quota.
+#
+# Process:
+#   - A daemon thread pre-warms every hot year on start, then wakes up when
+#     the next year is due.
+#   - A year is due when one of its cached pages expires within
+#     `refresh_ahead` seconds, or is missing. Only those pages are fetched
+#     again (page 1 always, as it gives the page count), bypassing the cache
+#     lookup; concurrent user requests for the same page share the fetch.
+#   - A year whose refresh failed is tried again after RETRY_DELAY seconds.
+#   - `status()` returns the schedule and the last refresh of every year.
+###########################################################################
+class YearRefresher:
+    def __init__(self, num_years, refresh_ahead, rate):
+        self.years = list(range(LAST_YEAR - num_years + 1, LAST_YEAR + 1))
+        self.refresh_ahead = min(refresh_ahead, settings.OMDB_CACHE_TTL / 2)
+        self.rate = rate
+        self.requests = 0
+        self._state = {year: {"pages": None, "last_refresh": None, "next_refresh": 0.0,
+                              "last_error": None} for year in self.years}
+        self._next_request = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                for year in self.years:
+                    self._state[year]["next_refresh"] = self._next_refresh(year)
+                self._thread = threading.Thread(target=self._run, name="omdb-refresher", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            for year in self.years:
+                if self._state[year]["next_refresh"] <= time.time():
+                    self._refresh_year(year)
+                if self._stop.is_set():
+                    return
+            due = min(state["next_refresh"] for state in self._state.values())
+            self._stop.wait(min(max(due - time.time(), 1), MAX_SLEEP))
+
+    # Sleep as needed to stay under `rate` requests per second. Returns False
+    # when the refresher is stopped meanwhile.
+    def _throttle(self):
+        now = time.time()
+        wait = self._next_request - now
+        self._next_request = max(now, self._next_request) + 1 / self.rate
+        self.requests += 1
+        return wait <= 0 or not self._stop.wait(wait)
+
+    def _is_due(self, year, page, now):
+        entry = get_cache().peek(search_page_key(year, page))
+        return entry is None or entry[0] - self.refresh_ahead <= now
+
+    def _refresh_year(self, year):
+        state = self._state[year]
+        if not self._throttle():
+            return
+        first_page = refresh_search_page(year, 1)
+        if not has_results(first_page):
+            state["last_error"] = (first_page or {}).get("Error", "OMDb request failed")
+            state["next_refresh"] = time.time() + RETRY_DELAY
+            return
+
+        total_pages = page_count(first_page)
+        failed_pages = 0
+        for page in range(2, total_pages + 1):
+            if self._is_due(year, page, time.time()):
+                if not self._throttle():
+                    return
+                failed_pages += not has_results(refresh_search_page(year, page))
+
+        state["pages"] = total_pages
+        state["last_refresh"] = time.time()
+        if failed_pages:
+            state["last_error"] = f"{failed_pages} of {total_pages} pages failed"
+            state["next_refresh"] = time.time() + RETRY_DELAY
+        else:
+            state["last_error"] = None
+            state["next_refresh"] = self._next_refresh(year)
+
+    # Time at which the first cached page of `year` to expire comes within
+    # `refresh_ahead` of its expiry; now if a page is not cached.
+    def _next_refresh(self, year):
+        first_page = get_cache().peek(search_page_key(year, 1))
+        if first_page is None:
+            return time.time()
+        expires = [first_page[0]]
+        for page in range(2, page_count(first_page[1]) + 1):
+            entry = get_cache().peek(search_page_key(year, page))
+            if entry is None:
+                return time.time()
+            expires.append(entry[0])
+        return min(expires) - self.refresh_ahead
+
+    def status(self):
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "refresh_ahead": self.refresh_ahead,
+            "rate": self.rate,
+            "requests": self.requests,
+            "years": [{"year": year,
+                       "pages": state["pages"],
+                       "last_refresh": _timestamp(state["last_refresh"]),
+                       "next_refresh": _timestamp(state["next_refresh"]),
+                       "last_error": state["last_error"]}
+                      for year, state in self._state.items()]
+        }
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+###########################################################################
+# Purpose:
+#   Start the refresher of the process from the settings, once.
+#
+# Returns:
+#   YearRefresher | None: The running refresher, or None when it is off
+#   (`OMDB_REFRESH_YEARS` is 0 or the cache backend is "none").
+###########################################################################
+def start_refresher():
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None and settings.OMDB_REFRESH_YEARS > 0 and settings.OMDB_CACHE_BACKEND != "none":
+            _refresher = YearRefresher(settings.OMDB_REFRESH_YEARS, settings.OMDB_REFRESH_AHEAD,
+                                       settings.OMDB_REFRESH_RATE).start()
+    return _refresher
+
+
+def stop_refresher():
+    global _refresher
+    with _refresher_lock:
+        if _refresher is not None:
+            _refresher.stop()
+            _refresher = None
+
+
+# Schedule of the refresher, for the services' `/refresher` endpoints.
+def refresher_status():
+    if _refresher is None:
+        return {"running": False, "years": []}
+    return _refresher.status()
@@ -0,0 +1,266 @@
+import asyncio
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+
+import requests
+
+from common.settings import settings
+
+
+###########################################################################
+# Purpose:
+#   Raised instead of calling OMDb when the upstream is known to be down
+#   (open circuit) or every connection to it is busy (full bulkhead, see
+#   `PoolExhausted`).
+#   It derives from `requests.RequestException`, so the callers that already
+#   treat a failed OMDb request as "no data" handle it the same way.
+###########################################################################
+class UpstreamUnavailable(requests.RequestException):
+    pass
+
+
+# Every local connection to the upstream is busy. The request never reached
+# the upstream, so it tells nothing of its health: the circuit breaker
+# doesn't count it and it isn't retried.
+class PoolExhausted(UpstreamUnavailable):
+    pass
+
+
+###########################################################################
+# Purpose:
+#   Circuit breaker of one upstream.
+#
+# Parameters:
+#   name (str): Name of the upstream, shown in `status()`.
+#   failure_threshold (int): Consecutive failures that open the circuit.
+#   reset_timeout (float): Seconds the circuit stays open before one probe
+#       request is let through.
+#
+# Process:
+#   - closed: every request goes through; a success resets the failure count.
+#   - open: requests fail at once with UpstreamUnavailable, so a dead or
+#     throttling OMDb costs callers nothing instead of a timeout each.
+#   - half open: after `reset_timeout`, a single probe goes through; its
+#     success closes the circuit, its failure opens it again.
+###########################################################################
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold, reset_timeout):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open" and time.time() >= self.opened_at + self.reset_timeout:
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    # The request let through never reached the upstream: a half open
+    # circuit lets the next request probe instead.
+    def record_skipped(self):
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.time()
+            self._probing = False
+
+    def status(self):
+        return {"name": self.name, "state": self.state, "failures": self.failures,
+                "rejected": self.rejected}
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+# Circuit breaker of an upstream, created on first use from the settings.
+def get_breaker(name):
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(
+                name, settings.OMDB_BREAKER_FAILURES, settings.OMDB_BREAKER_RESET)
+        return breaker
+
+
+# Every circuit breaker created so far, for the services' metrics.
+def breakers():
+    with _breakers_lock:
+        return list(_breakers.values())
+
+
+# OMDb answers with 401 when the daily request limit of the key is reached;
+# that and server errors count against the circuit. Only server errors and
+# 429 are worth retrying right away.
+def is_failure(status_code):
+    return status_code >= 500 or status_code in (401, 429)
+
+
+def is_retryable(status_code):
+    return status_code >= 500 or status_code == 429
+
+
+# Delays before the retries: exponential backoff from OMDB_RETRY_BACKOFF with
+# full jitter, capped at the read timeout.
+def backoff_delays():
+    for attempt in range(settings.OMDB_RETRIES):
+        yield random.uniform(0, min(settings.OMDB_RETRY_BACKOFF * 2 ** attempt,
+                                    settings.OMDB_READ_TIMEOUT))
+
+
+###########################################################################
+# Purpose:
+#   Send a request through the circuit breaker of `upstream`, with bounded
+#   retries.
+#
+# Parameters:
+#   upstream (str): Name of the upstream (one breaker per name).
+#   send (callable): Sends the request and returns a response with a
+#       `status_code`; raises `errors` when the request fails.
+#   errors (tuple): Exception types of a failed request.
+#   rejections (tuple): Exception types of a request refused before it was
+#       sent, e.g. because the local connection pool is full.
+#
+# Process:
+#   - Fails at once with UpstreamUnavailable while the circuit is open.
+#   - Retries connection errors, timeouts, 5xx and 429 at most
+#     OMDB_RETRIES times with jittered exponential backoff, so a degraded
+#     upstream adds a bounded delay instead of an open-ended one.
+#   - Raises `rejections` at once, without counting them against the
+#     circuit: a burst of local requests doesn't make a healthy upstream
+#     look down.
+#
+# Returns:
+#   The last response; raises the last error if no attempt got a response.
+###########################################################################
+def call_with_retries(upstream, send, errors=(requests.RequestException,), rejections=(PoolExhausted,)):
+    breaker = get_breaker(upstream)
+    delays = backoff_delays()
+    while True:
+        if not breaker.allow():
+            raise UpstreamUnavailable(f"{upstream} circuit is open")
+        try:
+            response = send()
+        except rejections:
+            breaker.record_skipped()
+            raise
+        except errors:
+            breaker.record_failure()
+            delay = next(delays, None)
+            if delay is None:
+                raise
+        else:
+            if not is_failure(response.status_code):
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            delay = next(delays, None)
+            if delay is None or not is_retryable(response.status_code):
+                return response
+        time.sleep(delay)
+
+
+# asyncio counterpart of `call_with_retries`; `send` is a coroutine function.
+async def call_with_retries_async(upstream, send, errors, rejections=(PoolExhausted,)):
+    breaker = get_breaker(upstream)
+    delays = backoff_delays()
+    while True:
+        if not breaker.allow():
+            raise UpstreamUnavailable(f"{upstream} circuit is open")
+        try:
+            response = await send()
+        except rejections:
+            breaker.record_skipped()
+            raise
+        except errors:
+            breaker.record_failure()
+            delay = next(delays, None)
+            if delay is None:
+                raise
+        else:
+            if not is_failure(response.status_code):
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            delay = next(delays, None)
+            if delay is None or not is_retryable(response.status_code):
+                return response
+        await asyncio.sleep(delay)
+
+
+# Cache keys served stale during the current request, or None outside of
+# `track_stale()`.
+_stale_keys = ContextVar("omdb_stale_keys", default=None)
+
+
+###########################################################################
+# Purpose:
+#   Collect the cache keys served stale (past their TTL, while a background
+#   refresh runs) during a request, so the service can flag its response.
+#
+# Process:
+#   - `track_stale()` starts a new collection for the current context and
+#     yields it as a set; `mark_stale(key)` adds to it.
+#   - Thread pools run their work through `in_context(fn)`, so the keys of
+#     pages and years fetched on worker threads land in the same set.
+###########################################################################
+@contextmanager
+def track_stale():
+    keys = set()
+    token = _stale_keys.set(keys)
+    try:
+        yield keys
+    finally:
+        _stale_keys.reset(token)
+
+
+def mark_stale(key):
+    keys = _stale_keys.get()
+    if keys is not None:
+        keys.add(key)
+
+
+# Wrap `fn` so that, called on a worker thread, it runs in a copy of the
+# caller's context (and shares its collection of stale keys).
+def in_context(fn):
+    context = copy_context()
+    return lambda *args: context.copy().run(fn, *args)
+
+
+# Start collecting the stale keys of a request served by a Flask thread; the
+# collection lives until the next call on the same thread.
+def begin_stale_tracking():
+    keys = set()
+    _stale_keys.set(keys)
+    return keys
+
+
+def stale_keys():
+    return _stale_keys.get() or set()
@@ -0,0 +1,79 @@
+import os
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+###########################################################################
+# Purpose:
+#   Hold the runtime settings shared by the REST and GraphQL services.
+#
+# Process:
+#   - Every setting starts from an environment variable of the same name,
+#     falling back to a default.
+#   - A service can override the values from its Flask config by calling
+#     `settings.configure(app.config)`; only known keys are copied.
+###########################################################################
+class Settings:
+    def __init__(self):
+        # Name of the service recorded with its OMDb fetch timings.
+        self.SERVICE_NAME = os.getenv("SERVICE_NAME", "unknown")
+        self.OMDB_API_URL = os.getenv("OMDB_API_URL", "http://www.omdbapi.com")
+        self.OMDB_API_KEY = os.getenv("OMDB_API_KEY", "2a9f78a3")
+        # Number of OMDb result pages fetched in parallel for one year.
+        # 1 keeps the old behaviour of walking the pages one by one.
+        self.OMDB_PAGE_CONCURRENCY = int(os.getenv("OMDB_PAGE_CONCURRENCY", 4))
+        # Number of years fetched in parallel by `fetch_movies_by_years`.
+        self.OMDB_YEAR_CONCURRENCY = int(os.getenv("OMDB_YEAR_CONCURRENCY", 5))
+        # Number of movie detail (`i=`) lookups sent in parallel.
+        self.OMDB_DETAIL_CONCURRENCY = int(os.getenv("OMDB_DETAIL_CONCURRENCY", 8))
+        # Keep-alive connections kept open to OMDb; sized to cover the page
+        # fan-out of every year fetched at once.
+        self.OMDB_POOL_SIZE = int(os.getenv("OMDB_POOL_SIZE", 20))
+        self.OMDB_CONNECT_TIMEOUT = float(os.getenv("OMDB_CONNECT_TIMEOUT", 3.05))
+        self.OMDB_READ_TIMEOUT = float(os.getenv("OMDB_READ_TIMEOUT", 10))
+        # Retries of a failed OMDb request and the base of their exponential
+        # backoff, in seconds.
+        self.OMDB_RETRIES = int(os.getenv("OMDB_RETRIES", 2))
+        self.OMDB_RETRY_BACKOFF = float(os.getenv("OMDB_RETRY_BACKOFF", 0.2))
+        # Consecutive OMDb failures that open the circuit breaker, and seconds
+        # before it lets a probe request through.
+        self.OMDB_BREAKER_FAILURES = int(os.getenv("OMDB_BREAKER_FAILURES", 5))
+        self.OMDB_BREAKER_RESET = float(os.getenv("OMDB_BREAKER_RESET", 30))
+        # Hard cap of the result pages fetched for one year (OMDb serves 100 at most).
+        self.OMDB_MAX_PAGES = int(os.getenv("OMDB_MAX_PAGES", 100))
+        # Cache of OMDb responses: "memory", "sqlite" or "none". The SQLite
+        # file lives in the project root so both services share it.
+        self.OMDB_CACHE_BACKEND = os.getenv("OMDB_CACHE_BACKEND", "memory")
+        self.OMDB_CACHE_TTL = float(os.getenv("OMDB_CACHE_TTL", 3600))
+        # Seconds an expired response is still served (flagged as stale)
+        # while a fresh one is fetched in the background.
+        self.OMDB_CACHE_STALE_TTL = float(os.getenv("OMDB_CACHE_STALE_TTL", 86400))
+        self.OMDB_CACHE_MAX_ENTRIES = int(os.getenv("OMDB_CACHE_MAX_ENTRIES", 2048))
+        self.OMDB_CACHE_PATH = os.getenv("OMDB_CACHE_PATH", os.path.join(PROJECT_ROOT, "data.db"))
+        # SQLite file of the time series of year fetches, shared by both
+        # services; empty to not record them.
+        self.OMDB_TIMINGS_PATH = os.getenv("OMDB_TIMINGS_PATH", os.path.join(PROJECT_ROOT, "timings.db"))
+        # Seconds of fetch history kept (and summarized by the plots); 0 keeps
+        # everything.
+        self.OMDB_TIMINGS_RETENTION = float(os.getenv("OMDB_TIMINGS_RETENTION", 7 * 86400))
+        # Local movie catalog (SQLAlchemy url; empty = off) and seconds an
+        # ingested year is served from it before OMDb is asked again; the
+        # latter follows the cache TTL unless it is set.
+        self.CATALOG_DATABASE_URL = os.getenv(
+            "CATALOG_DATABASE_URL", f"sqlite:///{os.path.join(PROJECT_ROOT, 'catalog.db')}")
+        self.CATALOG_TTL = float(os.getenv("CATALOG_TTL", self.OMDB_CACHE_TTL))
+        # Background refresh of the most recent years' search pages: number
+        # of years kept warm (0 = off), seconds before expiry at which a page
+        # is fetched again, and OMDb requests per second the refresher may send.
+        self.OMDB_REFRESH_YEARS = int(os.getenv("OMDB_REFRESH_YEARS", 0))
+        self.OMDB_REFRESH_AHEAD = float(os.getenv("OMDB_REFRESH_AHEAD", 300))
+        self.OMDB_REFRESH_RATE = float(os.getenv("OMDB_REFRESH_RATE", 2))
+
+    def configure(self, mapping):
+        for key in vars(self):
+            if key in mapping:
+                setattr(self, key, mapping[key])
+
+
+settings = Settings()
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+###########################################################################
+# Purpose:
+#   Coalesce concurrent calls that would fetch the same thing ("single
+#   flight"): while a call for a key is running, other callers for that key
+#   wait for its result instead of starting their own.
+#
+# Process:
+#   - The first caller of a key becomes the leader and runs the function.
+#   - Callers arriving while the leader runs block until it finishes and
+#     get the same result, or the same exception raised again.
+#   - The key is forgotten as soon as the leader finishes, so a later call
+#     runs the function again (results are kept by the cache, not here).
+#
+# Returns (of `do(key, fn)`):
+#   tuple:
+#     - The result of `fn`.
+#     - bool: True if this caller only waited for another caller's run.
+###########################################################################
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class _AsyncCall:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+###########################################################################
+# Purpose:
+#   The asyncio counterpart of `SingleFlight`, for coroutines running on one
+#   event loop: callers of a key that is already running await the running
+#   call instead of starting their own run.
+#
+# Process:
+#   - The first caller of a key starts `fn()` as a task of its own, and every
+#     caller of the key (the first one included) awaits it through
+#     `asyncio.shield`, so cancelling one caller never cancels the others.
+#   - The task is cancelled only when every caller waiting for it has been
+#     cancelled.
+###########################################################################
+class AsyncSingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        call = self._calls.get(key)
+        if call is not None:
+            self.coalesced += 1
+            leader = False
+        else:
+            call = self._calls[key] = _AsyncCall(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(lambda task: self._finish(key, call))
+            leader = True
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task), not leader
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def _finish(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.task.cancelled():
+            call.task.exception()  # mark as retrieved when nobody was waiting
+
+    def in_flight(self):
+        return len(self._calls)
@@ -0,0 +1,245 @@
+import atexit
+import sqlite3
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from common.settings import settings
+
+
+###########################################################################
+# Purpose:
+#   Counters of one year fetch, filled while its pages are looked up.
+###########################################################################
+class FetchTiming:
+    def __init__(self):
+        self.cache_hits = 0
+        self.stale_hits = 0
+        self.upstream_requests = 0
+        self.bytes = 0
+        self.lock = threading.Lock()  # pages may be fetched on worker threads
+
+    @property
+    def pages(self):
+        return self.cache_hits + self.stale_hits + self.upstream_requests
+
+    @property
+    def cache_status(self):
+        if self.upstream_requests:
+            return "miss"
+        return "stale" if self.stale_hits else "hit"
+
+
+_current_timing = ContextVar("omdb_fetch_timing", default=None)
+
+
+# Collect the page lookups of the current context into a new FetchTiming.
+@contextmanager
+def measure_fetch():
+    timing = FetchTiming()
+    token = _current_timing.set(timing)
+    try:
+        yield timing
+    finally:
+        _current_timing.reset(token)
+
+
+# Count one page lookup of the measured fetch: "hit", "stale" or "upstream"
+# (with the size of the OMDb response body).
+def record_page(source, size=0):
+    timing = _current_timing.get()
+    if timing is None:
+        return
+    with timing.lock:
+        if source == "hit":
+            timing.cache_hits += 1
+        elif source == "stale":
+            timing.stale_hits += 1
+        else:
+            timing.upstream_requests += 1
+            timing.bytes += size
+
+
+# Seconds between two writes of the queued fetches, seconds between two
+# deletions of the rows past the retention window, and most recent fetches a
+# year summary is computed from.
+FLUSH_INTERVAL = 1.0
+PRUNE_INTERVAL = 60.0
+SUMMARY_SAMPLES = 500
+
+
+###########################################################################
+# Purpose:
+#   Time-series store of the year fetches of both services, kept in a SQLite
+#   file so the history survives restarts and deployments.
+#
+# Parameters:
+#   path (str): The SQLite file holding the `fetch_timings` table.
+#   retention (float): Seconds of history kept; 0 keeps everything.
+#
+# Process:
+#   - `record` queues one row per year fetch: time, service, year, number
+#     of pages and movies, bytes received from OMDb, latency, and whether
+#     the pages came from the cache ("hit"), partly from OMDb ("miss") or
+#     were served stale ("stale"). A writer thread appends the queued rows
+#     in one transaction every `FLUSH_INTERVAL` seconds, so a fetch never
+#     waits for a commit.
+#   - Rows older than `retention` are deleted by the writes, at most once
+#     every `PRUNE_INTERVAL` seconds, so the file stays bounded.
+#   - The database runs in WAL mode so the REST and GraphQL processes can
+#     append to the same file at once.
+#   - `year_summary` and `version` answer the plots and the
+#     `fetchPerformance` query from that history; they write the queued
+#     rows first, so they see every fetch recorded before them.
+###########################################################################
+class TimingStore:
+    def __init__(self, path, retention=0):
+        self.path = path
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._writer = None
+        self._pruned_at = 0.0
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS fetch_timings ("
+                " id INTEGER PRIMARY KEY,"
+                " ts REAL NOT NULL,"
+                " service TEXT NOT NULL,"
+                " year INTEGER NOT NULL,"
+                " pages INTEGER NOT NULL,"
+                " records INTEGER NOT NULL,"
+                " bytes INTEGER NOT NULL,"
+                " latency REAL NOT NULL,"
+                " cache TEXT NOT NULL)")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_fetch_timings_year_ts ON fetch_timings (year, ts)")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_fetch_timings_ts ON fetch_timings (ts)")
+        atexit.register(self._flush_quietly)
+
+    def record(self, service, year, pages, records, size, latency, cache):
+        row = (time.time(), service, int(year), pages, records, size, latency, cache)
+        with self._pending_lock:
+            self._pending.append(row)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="timings-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            self._flush_quietly()
+
+    # Write the queued rows in one transaction, and delete the rows past the
+    # retention window when it is time to.
+    def flush(self):
+        with self._lock:
+            with self._pending_lock:
+                rows, self._pending = self._pending, []
+            now = time.time()
+            prune = self.retention > 0 and now - self._pruned_at >= PRUNE_INTERVAL
+            if not rows and not prune:
+                return
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO fetch_timings (ts, service, year, pages, records, bytes, latency, cache)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                if prune:
+                    self._conn.execute("DELETE FROM fetch_timings WHERE ts < ?", (now - self.retention,))
+                    self._pruned_at = now
+
+    # Failing to record never fails anything else: the queued rows are dropped.
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except sqlite3.Error:
+            pass
+
+    # The most recent `limit` fetches of `year` within the retention window
+    # (or since `since`), oldest first.
+    def _rows(self, year, service=None, since=None, limit=SUMMARY_SAMPLES):
+        self._flush_quietly()
+        if since is None and self.retention > 0:
+            since = time.time() - self.retention
+        query = "SELECT ts, service, pages, records, bytes, latency, cache FROM fetch_timings WHERE year = ?"
+        params = [int(year)]
+        if service is not None:
+            query += " AND service = ?"
+            params.append(service)
+        if since is not None:
+            query += " AND ts >= ?"
+            params.append(since)
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY ts DESC LIMIT ?", params).fetchall()
+        rows.reverse()
+        return rows
+
+    # Summary of the recent fetches of `year` (see `_rows`): the movie count
+    # of the latest fetch, the median latency of the fetches that went to
+    # OMDb (the cost of an uncached fetch) and of all of them, and the cache
+    # hit ratio. None if the year wasn't fetched in that window.
+    def year_summary(self, year, service=None, since=None):
+        rows = self._rows(year, service, since)
+        if not rows:
+            return None
+        upstream = [latency for ts, _, _, _, _, latency, cache in rows if cache == "miss"]
+        return {
+            "year": int(year),
+            "samples": len(rows),
+            "movie_count": rows[-1][3],
+            "pages": rows[-1][2],
+            "last_fetched": rows[-1][0],
+            "upstream_latency": statistics.median(upstream) if upstream else None,
+            "latency": statistics.median(row[5] for row in rows),
+            "cache_hit_ratio": sum(row[6] != "miss" for row in rows) / len(rows),
+        }
+
+    # Id of the latest fetch of `years` that went to OMDb; changes whenever
+    # the data shown for those years may have changed.
+    def version(self, years, service=None):
+        years = [int(year) for year in years]
+        query = ("SELECT COALESCE(MAX(id), 0) FROM fetch_timings WHERE cache != 'hit'"
+                 f" AND year IN ({', '.join('?' * len(years))})")
+        params = list(years)
+        if service is not None:
+            query += " AND service = ?"
+            params.append(service)
+        self._flush_quietly()
+        with self._lock:
+            (version,) = self._conn.execute(query, params).fetchone()
+        return version
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+# Timing store of the process, opened on first use from `OMDB_TIMINGS_PATH`;
+# None when recording is off (empty path).
+def get_timing_store():
+    global _store
+    if _store is None and settings.OMDB_TIMINGS_PATH:
+        with _store_lock:
+            if _store is None:
+                _store = TimingStore(settings.OMDB_TIMINGS_PATH, settings.OMDB_TIMINGS_RETENTION)
+    return _store
+
+
+# Queue a measured year fetch for the store of the process, if any. Failing
+# to record never fails the fetch itself.
+def record_fetch(year, records, timing, latency):
+    store = get_timing_store()
+    if store is None:
+        return
+    try:
+        store.record(settings.SERVICE_NAME, int(year), timing.pages, records, timing.bytes,
+                     latency, timing.cache_status)
+    except (ValueError, sqlite3.Error):
+        pass
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+###########################################################################
+# Purpose:
+#   Spans of one traced request: the GraphQL resolvers and, nested under
+#   them, the OMDb pages, cache lookups and detail fetches they caused.
+#
+# Process:
+#   - Times are taken with the monotonic `time.perf_counter_ns` clock and
+#     kept as offsets from the start of the trace; the wall clock time of the
+#     start is kept once, to place the trace in time.
+#   - Spans are appended under a lock, as the pages of a year are fetched on
+#     worker threads (see `resilience.in_context`).
+###########################################################################
+class Trace:
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.start_time = time.time()
+        self.start = time.perf_counter_ns()
+        self.end = None
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def offset(self):
+        return time.perf_counter_ns() - self.start
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def finish(self):
+        self.end = time.perf_counter_ns()
+
+
+_current_trace = ContextVar("trace", default=None)
+_current_span = ContextVar("trace_span", default=None)
+
+
+# Start tracing the current context; returns the trace and the token that
+# `end_trace` takes to stop it.
+def begin_trace():
+    trace = Trace()
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(token):
+    trace = _current_trace.get()
+    _current_trace.reset(token)
+    if trace is not None:
+        trace.finish()
+    return trace
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+###########################################################################
+# Purpose:
+#   Record a span of the current trace around a block of code.
+#
+# Parameters:
+#   name (str): Name of the span, e.g. "omdb.search_page".
+#   **attributes: Attributes of the span; the block may add more to the
+#       yielded dict.
+#
+# Process:
+#   - Outside of a traced request it only yields None, so the OMDb helpers
+#     can stay instrumented at the cost of one ContextVar lookup.
+#   - The span is the parent of the spans started inside the block,
+#     including on the worker threads the block hands work to.
+#
+# Returns:
+#   dict | None: The span attributes, or None when nothing is traced.
+###########################################################################
+@contextmanager
+def span(name, **attributes):
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    span_id = os.urandom(8).hex()
+    record = {"name": name, "span_id": span_id, "parent_id": _current_span.get(),
+              "start": trace.offset(), "duration": None, "attributes": attributes}
+    token = _current_span.set(span_id)
+    try:
+        yield attributes
+    except Exception as error:
+        attributes["error"] = str(error)
+        raise
+    finally:
+        _current_span.reset(token)
+        record["duration"] = trace.offset() - record["start"]
+        trace.add(record)
+
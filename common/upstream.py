@@ -0,0 +1,115 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.metrics import (OMDB_POOL_IN_USE, OMDB_POOL_REJECTIONS, OMDB_POOL_WAIT, OMDB_REQUEST_DURATION,
+                            omdb_endpoint)
+from common.resilience import PoolExhausted, call_with_retries
+from common.settings import settings
+
+
+# The shared session and the bulkhead bounding the requests sent through it,
+# as one (session, bulkhead) tuple so they are always created and reset
+# together.
+_pool = None
+_pool_lock = threading.Lock()
+
+
+###########################################################################
+# Purpose:
+#   Return the HTTP session shared by every OMDb call of the process, and
+#   the semaphore of its `OMDB_POOL_SIZE` connections.
+#
+# Process:
+#   - Creates both on first use, guarded by a lock so concurrent page and
+#     year fetches end up with the same session.
+#   - Mounts an adapter whose connection pool holds `OMDB_POOL_SIZE`
+#     keep-alive connections per host; callers beyond that wait for a free
+#     connection instead of opening throwaway ones.
+#
+# Returns:
+#   tuple: The shared requests.Session and its threading.BoundedSemaphore.
+###########################################################################
+def _get_pool():
+    global _pool
+    pool = _pool
+    if pool is None:
+        with _pool_lock:
+            pool = _pool
+            if pool is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4,
+                                      pool_maxsize=settings.OMDB_POOL_SIZE,
+                                      pool_block=True)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                pool = _pool = (session, threading.BoundedSemaphore(settings.OMDB_POOL_SIZE))
+    return pool
+
+
+# The HTTP session shared by every OMDb call of the process.
+def get_session():
+    return _get_pool()[0]
+
+
+# Close the shared session so the next call builds one, with a new bulkhead,
+# from the current settings. Requests in flight finish on the old session and
+# release the old bulkhead.
+def close_session():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool[0].close()
+            _pool = None
+
+
+###########################################################################
+# Purpose:
+#   Send a GET request to the OMDb API through the shared session.
+#
+# Parameters:
+#   params (dict): The OMDb query parameters; the API key is added here.
+#
+# Process:
+#   - Goes through the OMDb circuit breaker, with bounded retries and
+#     backoff (see common/resilience.py).
+#   - Waits at most the connect timeout for one of the `OMDB_POOL_SIZE`
+#     connections, then fails with PoolExhausted, so a slow OMDb can't
+#     hold every worker thread in the connection pool queue. The circuit
+#     breaker doesn't count that as an OMDb failure and it isn't retried.
+#   - Records the pool wait, the connections in use and the duration of
+#     every attempt by OMDb endpoint (see common/metrics.py).
+#
+# Returns:
+#   requests.Response: The raw OMDb response.
+#
+# Raises:
+#   requests.RequestException: The request failed, or OMDb is unavailable.
+###########################################################################
+def omdb_get(params):
+    params = dict(params, apikey=settings.OMDB_API_KEY)
+    timeout = (settings.OMDB_CONNECT_TIMEOUT, settings.OMDB_READ_TIMEOUT)
+    session, bulkhead = _get_pool()
+    endpoint = omdb_endpoint(params)
+
+    def send():
+        wait_start = time.perf_counter()
+        if not bulkhead.acquire(timeout=settings.OMDB_CONNECT_TIMEOUT):
+            OMDB_POOL_REJECTIONS.inc()
+            raise PoolExhausted("all OMDb connections are busy")
+        start = time.perf_counter()
+        OMDB_POOL_WAIT.observe(start - wait_start)
+        OMDB_POOL_IN_USE.inc()
+        status = "error"
+        try:
+            response = session.get(settings.OMDB_API_URL, params=params, timeout=timeout)
+            status = response.status_code
+            return response
+        finally:
+            OMDB_POOL_IN_USE.dec()
+            bulkhead.release()
+            OMDB_REQUEST_DURATION.labels(endpoint, status).observe(time.perf_counter() - start)
+
+    return call_with_retries("omdb", send)
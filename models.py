@@ -9,3 +9,76 @@ class Item(db.Model):
 
     def to_dict(self):
         return {"id": self.id, "name": self.name, "description": self.description}
+
+
+# OMDb detail fields kept on a catalog movie, by OMDb record key.
+MOVIE_DETAIL_COLUMNS = {
+    "Genre": "genre",
+    "Director": "director",
+    "Actors": "actors",
+    "Plot": "plot",
+    "Language": "language",
+    "Country": "country",
+    "Awards": "awards",
+}
+
+
+###########################################################################
+# A movie of the local catalog (see common/catalog.py), as OMDb returned it.
+#
+#   release_year: the year whose search listed the movie, and position its
+#                 rank in that search, so a year reads back in OMDb order
+#   has_details:  whether the detail (`i=`) fields were ingested
+###########################################################################
+class Movie(db.Model):
+    __tablename__ = "movies"
+
+    id = db.Column(db.Integer, primary_key=True)
+    imdb_id = db.Column(db.String(16), nullable=False, unique=True, index=True)
+    title = db.Column(db.String(255), nullable=False, index=True)
+    year = db.Column(db.String(16), nullable=True)
+    release_year = db.Column(db.Integer, nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    type = db.Column(db.String(16), nullable=True)
+    poster = db.Column(db.String(512), nullable=True)
+    genre = db.Column(db.String(255), nullable=True)
+    director = db.Column(db.String(255), nullable=True)
+    actors = db.Column(db.String(512), nullable=True)
+    plot = db.Column(db.Text, nullable=True)
+    language = db.Column(db.String(255), nullable=True)
+    country = db.Column(db.String(255), nullable=True)
+    awards = db.Column(db.String(255), nullable=True)
+    has_details = db.Column(db.Boolean, nullable=False, default=False)
+    updated_at = db.Column(db.Float, nullable=False)
+    ratings = db.relationship("Rating", backref="movie", cascade="all, delete-orphan",
+                              lazy="selectin", order_by="Rating.id")
+
+    __table_args__ = (db.Index("ix_movies_release_year_position", "release_year", "position"),)
+
+    # The movie as an OMDb search (or, with its details, detail) record.
+    def to_record(self):
+        record = {"imdbID": self.imdb_id, "Title": self.title, "Year": self.year,
+                  "Type": self.type, "Poster": self.poster}
+        if self.has_details:
+            for key, column in MOVIE_DETAIL_COLUMNS.items():
+                record[key] = getattr(self, column)
+            record["Ratings"] = [{"Source": rating.source, "Value": rating.value} for rating in self.ratings]
+        return {key: value for key, value in record.items() if value is not None}
+
+
+class Rating(db.Model):
+    __tablename__ = "ratings"
+
+    id = db.Column(db.Integer, primary_key=True)
+    movie_id = db.Column(db.Integer, db.ForeignKey("movies.id", ondelete="CASCADE"), nullable=False, index=True)
+    source = db.Column(db.String(64), nullable=False)
+    value = db.Column(db.String(32), nullable=False)
+
+
+# When the movies of a year were last ingested from OMDb, and how many.
+class CatalogYear(db.Model):
+    __tablename__ = "catalog_years"
+
+    year = db.Column(db.Integer, primary_key=True)
+    movie_count = db.Column(db.Integer, nullable=False)
+    fetched_at = db.Column(db.Float, nullable=False)
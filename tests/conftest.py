@@ -0,0 +1,105 @@
+import importlib
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# The tests never reach OMDb and never write the services' database files:
+# the settings are read from the environment when `common.settings` is
+# first imported.
+os.environ.update({
+    "OMDB_API_URL": "http://omdb.test",
+    "OMDB_API_KEY": "test",
+    "OMDB_CACHE_BACKEND": "memory",
+    "OMDB_TIMINGS_PATH": "",
+    "CATALOG_DATABASE_URL": "",
+    "OMDB_REFRESH_YEARS": "0",
+})
+
+import pytest
+
+from common import omdb, resilience
+from common.cache import reset_cache
+from common.omdb import PAGE_SIZE
+
+
+# OMDb search response of `page` of a year listing `count` movies.
+def search_response(year, page, count):
+    start = (page - 1) * PAGE_SIZE
+    if start >= count:
+        return {"Response": "False", "Error": "Movie not found!"}
+    return {
+        "Response": "True",
+        "totalResults": str(count),
+        "Search": [{"Title": f"Movie {year} {index}", "Year": str(year), "imdbID": f"tt{year}{index:04d}",
+                    "Type": "movie", "Poster": "N/A"}
+                   for index in range(start, min(start + PAGE_SIZE, count))],
+    }
+
+
+###########################################################################
+# Stand-in for `omdb.fetch_search_page`: answers from `counts` (movies per
+# year), returns None (a failed request) for the pages in `failing`, and
+# records every (year, page) asked for.
+###########################################################################
+class FakeSearch:
+    def __init__(self):
+        self.counts = {}
+        self.failing = set()
+        self.calls = []
+
+    def __call__(self, year, page):
+        self.calls.append((int(year), page))
+        if (int(year), page) in self.failing:
+            return None
+        return search_response(int(year), page, self.counts.get(int(year), 0))
+
+    def pages(self, year):
+        return sorted(page for called_year, page in self.calls if called_year == year)
+
+
+# The services import their own modules by plain name (`app`, `config`,
+# `utils`, ...), and those names clash between REST_Service and
+# GraphQL_Service. Import `module` of `service` with the service's folder
+# first on sys.path, after dropping the modules loaded from the other one.
+def import_service(service, module):
+    folder = os.path.join(PROJECT_ROOT, service)
+    for other in ("REST_Service", "GraphQL_Service"):
+        other_folder = os.path.join(PROJECT_ROOT, other)
+        if other_folder == folder:
+            continue
+        while other_folder in sys.path:
+            sys.path.remove(other_folder)
+        for name, loaded in list(sys.modules.items()):
+            if (getattr(loaded, "__file__", None) or "").startswith(other_folder + os.sep):
+                del sys.modules[name]
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+    return importlib.import_module(module)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    reset_cache()
+    yield
+    reset_cache()
+
+
+# Every test starts with closed circuit breakers.
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+
+
+@pytest.fixture
+def fake_search(monkeypatch):
+    fake = FakeSearch()
+    monkeypatch.setattr(omdb, "fetch_search_page", fake)
+    return fake
+
+
+@pytest.fixture
+def service():
+    return import_service
@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pytest
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmark")
+if BENCHMARK_DIR not in sys.path:
+    sys.path.append(BENCHMARK_DIR)
+
+from compare import compare
+from stats import percentile, summarize, t_critical
+
+
+@pytest.mark.parametrize("pct, expected", [(0, 1), (50, 2.5), (95, 3.85), (100, 4)])
+def test_percentile_interpolates_between_ranks(pct, expected):
+    assert percentile([4, 1, 3, 2], pct) == pytest.approx(expected)
+
+
+def test_percentile_of_no_value():
+    assert percentile([], 50) is None
+
+
+@pytest.mark.parametrize("degrees_of_freedom, expected", [(1, 12.706), (20, 2.086), (21, 2.060),
+                                                          (120, 1.980), (500, 1.960)])
+def test_t_critical_rounds_up_to_the_next_tabulated_value(degrees_of_freedom, expected):
+    assert t_critical(degrees_of_freedom) == expected
+
+
+def test_summarize_gives_the_95_percent_interval():
+    summary = summarize([10, 12, None, 14])
+
+    assert (summary["mean"], summary["stdev"], summary["n"]) == (12, 2, 3)
+    assert summary["ci95_high"] - summary["mean"] == pytest.approx(4.303 * 2 / 3 ** 0.5)
+    assert summary["mean"] - summary["ci95_low"] == pytest.approx(summary["ci95_high"] - summary["mean"])
+
+
+def test_summarize_of_one_or_no_value():
+    assert summarize([5]) == {"mean": 5, "stdev": 0.0, "ci95_low": 5, "ci95_high": 5, "n": 1}
+    assert summarize([None])["n"] == 0
+
+
+def run(latencies):
+    return {"results": [{"service": "rest", "scenario": "movies_for_years", "num_years": 1,
+                         "fields": "full", "concurrency": 4,
+                         "summary": {"latency_p95_ms": summarize(latencies),
+                                     "latency_p50_ms": summarize([]),
+                                     "latency_p99_ms": summarize([]),
+                                     "throughput_rps": summarize([]),
+                                     "error_rate": summarize([]),
+                                     "response_bytes": summarize([])}}]}
+
+
+def test_only_changes_outside_the_noise_are_regressions():
+    baseline = run([100, 101, 99])
+
+    assert compare(baseline, run([103, 150, 60]), threshold=5) == []
+    assert compare(baseline, run([100.5, 101, 99.5]), threshold=5) == []
+    [regression] = compare(baseline, run([120, 121, 119]), threshold=5)
+    assert (regression["metric"], regression["change_pct"]) == ("latency_p95_ms", pytest.approx(20))
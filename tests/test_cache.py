@@ -0,0 +1,123 @@
+import pytest
+
+from common import cache, omdb
+from common.cache import MemoryCache, NullCache, SQLiteCache, cache_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    def make(max_entries=3, ttl=10, stale_ttl=0):
+        if request.param == "memory":
+            return MemoryCache(max_entries, ttl, stale_ttl)
+        return SQLiteCache(str(tmp_path / "cache.db"), max_entries, ttl, stale_ttl)
+    return make
+
+
+def test_value_is_served_until_its_ttl(make_cache, clock):
+    store = make_cache(ttl=10)
+    store.set("k", {"Response": "True"})
+
+    clock.now += 9
+    assert store.get("k") == {"Response": "True"}
+    clock.now += 1
+    assert store.get("k") is None
+    assert store.stats.hits == 1 and store.stats.misses == 1
+
+
+def test_set_ttl_overrides_the_default(make_cache, clock):
+    store = make_cache(ttl=10)
+    store.set("k", 1, ttl=100)
+
+    clock.now += 50
+    assert store.get("k") == 1
+
+
+def test_least_recently_used_entry_is_evicted(make_cache, clock):
+    store = make_cache(max_entries=2)
+    store.set("a", 1)
+    clock.now += 1
+    store.set("b", 2)
+    clock.now += 1
+    store.get("a")  # "b" is now the least recently used
+    clock.now += 1
+    store.set("c", 3)
+
+    assert (store.get("a"), store.get("b"), store.get("c")) == (1, None, 3)
+    assert len(store) == 2
+    assert store.stats.evictions == 1
+
+
+def test_expired_entry_is_served_stale_within_its_stale_window(make_cache, clock):
+    store = make_cache(ttl=10, stale_ttl=20)
+    store.set("k", 1)
+
+    clock.now += 15
+    assert store.get_entry("k") == (1, False)
+    assert store.get("k") is None  # `get` never serves stale values
+    clock.now += 15
+    assert store.get_entry("k") is None
+    assert store.stats.stale_hits == 1 and store.stats.expirations == 1
+
+
+def test_peek_ignores_expiry_and_counts_nothing(make_cache, clock):
+    store = make_cache(ttl=10)
+    store.set("k", 1)
+
+    clock.now += 100
+    assert store.peek("k") == (1010.0, 1)
+    assert store.stats.to_dict()["hits"] == 0
+
+
+def test_null_cache_never_hits():
+    store = NullCache()
+    store.set("k", 1)
+
+    assert store.get("k") is None and len(store) == 0
+
+
+def test_cache_key_keeps_the_parameter_order():
+    assert cache_key({"s": "movie", "y": 2023, "page": 1}) == "s=movie&y=2023&page=1"
+
+
+class FakeResponse:
+    def __init__(self, data, status_code=200):
+        self.data = data
+        self.status_code = status_code
+        self.content = b"{}"
+
+    def json(self):
+        return self.data
+
+
+def test_omdb_responses_with_results_are_cached(monkeypatch):
+    calls = []
+    monkeypatch.setattr(omdb, "omdb_get", lambda params: calls.append(params) or FakeResponse({"Response": "True"}))
+
+    assert omdb.fetch_movie_data("Heat") == {"Response": "True"}
+    assert omdb.fetch_movie_data("Heat") == {"Response": "True"}
+    assert len(calls) == 1
+
+
+def test_omdb_errors_are_not_cached(monkeypatch):
+    calls = []
+    error = {"Response": "False", "Error": "Request limit reached!"}
+    monkeypatch.setattr(omdb, "omdb_get", lambda params: calls.append(params) or FakeResponse(error))
+
+    omdb.fetch_movie_data("Heat")
+    omdb.fetch_movie_data("Heat")
+    assert len(calls) == 2
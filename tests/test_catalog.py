@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from common import catalog, omdb, omdb_async, timings
+from common.catalog import Catalog
+from common.settings import Settings
+from common.timings import TimingStore
+
+HEAT = {"imdbID": "tt0113277", "Title": "Heat", "Year": "1995", "Type": "movie", "Poster": "N/A"}
+RAN = {"imdbID": "tt0089881", "Title": "Ran", "Year": "1985", "Type": "movie", "Poster": "N/A"}
+HEAT_DETAILS = dict(HEAT, Plot="A heist.", Director="Michael Mann",
+                    Ratings=[{"Source": "Internet Movie Database", "Value": "8.3/10"}])
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(catalog, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def store(tmp_path, clock):
+    return Catalog(f"sqlite:///{tmp_path / 'catalog.db'}", ttl=60)
+
+
+def test_year_is_read_back_in_omdb_order(store):
+    store.ingest(2020, [RAN, HEAT, {"Title": "no id"}])
+
+    assert store.year_records(2020) == [RAN, HEAT]
+    assert store.year_records(2021) is None
+
+
+def test_year_expires_after_the_ttl(store, clock):
+    store.ingest(2020, [HEAT])
+
+    clock.now += 59
+    assert store.year_records(2020) == [HEAT]
+    clock.now += 1
+    assert store.year_records(2020) is None
+
+
+def test_details_are_kept_across_search_ingests(store):
+    store.ingest(2020, [HEAT, RAN])
+    assert store.year_records(2020, with_details=True) is None
+
+    store.add_details([HEAT_DETAILS, RAN, dict(HEAT_DETAILS, imdbID="tt-unknown")])
+    store.ingest(2020, [HEAT])
+
+    assert store.year_records(2020, with_details=True) == [HEAT_DETAILS]
+
+
+def test_failed_fetch_leaves_the_year_untouched(store):
+    store.ingest(2020, [HEAT])
+    store.ingest(2020, [])
+
+    assert store.year_records(2020) == [HEAT]
+
+
+def test_titles_are_searched_by_word_prefix(store):
+    store.ingest(2020, [HEAT, RAN, dict(RAN, imdbID="tt1", Title="Heat Wave")])
+
+    assert [record["Title"] for record in store.search("hea")] == ["Heat", "Heat Wave"]
+    assert store.search('heat" OR "ran') == []
+    assert store.search("   ") == []
+
+
+def test_catalog_off_is_a_miss():
+    assert catalog.catalog_records(2020) is None
+    catalog.ingest_records(2020, [HEAT])  # nothing to do
+
+
+def test_ingested_year_is_served_without_omdb(store, monkeypatch, fake_search):
+    monkeypatch.setattr(catalog, "_catalog", store)
+    fake_search.counts = {2020: 12}
+
+    first, _ = omdb.fetch_all_movies(2020, fields=["title"])
+    second, _ = omdb.fetch_all_movies(2020, fields=["title"])
+
+    assert [movie.title for movie in second] == [movie.title for movie in first]
+    assert fake_search.pages(2020) == [1, 2]
+
+
+@pytest.fixture
+def timing_store(tmp_path, monkeypatch):
+    store = TimingStore(str(tmp_path / "timings.db"))
+    monkeypatch.setattr(timings, "_store", store)
+    return store
+
+
+@pytest.mark.parametrize("fetch", [
+    omdb.fetch_all_movies,
+    lambda year, fields: asyncio.run(omdb_async.fetch_all_movies_async(year, fields=fields)),
+])
+def test_catalog_hits_are_recorded_in_the_timings(store, timing_store, monkeypatch, fake_search, fetch):
+    monkeypatch.setattr(catalog, "_catalog", store)
+    fake_search.counts = {2020: 12}
+
+    omdb.fetch_all_movies(2020, fields=["title"])
+    fetch(2020, fields=["title"])
+
+    # the fake search pages make no OMDb request, so both fetches are hits
+    summary = timing_store.year_summary(2020)
+    assert summary["samples"] == 2 and summary["movie_count"] == 12
+    assert summary["pages"] == 2 and summary["cache_hit_ratio"] == 1.0
+    assert fake_search.pages(2020) == [1, 2]
+
+
+def test_catalog_ttl_follows_the_cache_ttl(monkeypatch):
+    monkeypatch.setenv("OMDB_CACHE_TTL", "120")
+    monkeypatch.delenv("CATALOG_TTL", raising=False)
+    assert Settings().CATALOG_TTL == 120
+
+    monkeypatch.setenv("CATALOG_TTL", "600")
+    assert Settings().CATALOG_TTL == 600
@@ -0,0 +1,71 @@
+import pytest
+
+from common.columns import MovieColumns
+from common.movies import NO_RATINGS, NOT_AVAILABLE, NOT_AVAILABLE_NAMES, MovieItem, MovieRating, movie_dicts
+
+SEARCH_RECORDS = [
+    {"imdbID": "tt1", "Title": "Heat", "Year": "1995", "Poster": "N/A"},
+    {"imdbID": "tt2", "Title": "Ran", "Year": "1985", "Poster": "ran.jpg"},
+    {"imdbID": "tt3", "Title": "Alien", "Year": "1995"},
+]
+DETAIL_RECORD = {"imdbID": "tt4", "Title": "Jaws", "Year": "1975", "Genre": "Adventure, Thriller",
+                 "Plot": "A shark.", "Ratings": [{"Source": "Metacritic", "Value": "87/100"}]}
+
+
+def test_only_the_requested_columns_are_built():
+    movies = MovieColumns.from_records(SEARCH_RECORDS, ["title", "year", "budget", "title"])
+
+    assert movies.fields == ["title", "year"]
+    assert len(movies) == 3
+
+
+def test_missing_keys_read_as_the_shared_missing_values():
+    movies = MovieColumns.from_records(SEARCH_RECORDS)
+
+    assert movies.columns["plot"] == [NOT_AVAILABLE] * 3
+    assert movies.columns["genre"][0] is NOT_AVAILABLE_NAMES
+    assert movies.columns["ratings"][0] is NO_RATINGS
+    assert movies.columns["poster"] == [NOT_AVAILABLE, "ran.jpg", NOT_AVAILABLE]
+
+
+def test_repeated_values_of_a_shared_column_are_one_object():
+    records = [{"Year": "".join(["19", "95"])} for _ in range(3)]
+
+    years = MovieColumns.from_records(records, ["year"]).columns["year"]
+
+    assert years[0] is years[1] is years[2]
+
+
+def test_rows_read_as_movie_items():
+    movies = MovieColumns.from_records(SEARCH_RECORDS + [DETAIL_RECORD], ["id", "genre", "ratings"])
+
+    assert movies[-1] == MovieItem(id="tt4", genre=("Adventure", "Thriller"),
+                                   ratings=(MovieRating("Metacritic", "87/100"),))
+    assert [movie_item.id for movie_item in movies] == ["tt1", "tt2", "tt3", "tt4"]
+    with pytest.raises(IndexError):
+        movies[4]
+
+
+def test_slices_and_concat_keep_the_columns():
+    movies = MovieColumns.from_records(SEARCH_RECORDS, ["id"])
+
+    assert [movie_item.id for movie_item in movies[1:]] == ["tt2", "tt3"]
+    assert len(movies[::2]) == 2
+    joined = MovieColumns.concat([movies, movies[:1]])
+    assert [movie_item.id for movie_item in joined] == ["tt1", "tt2", "tt3", "tt1"]
+    assert len(MovieColumns.concat([])) == 0
+
+
+def test_to_dicts_matches_the_movie_items():
+    movies = MovieColumns.from_records(SEARCH_RECORDS + [DETAIL_RECORD])
+
+    assert movie_dicts(movies) == [movie_item.to_dict() for movie_item in movies]
+    assert movies.to_dicts()[-1]["ratings"] == [{"source": "Metacritic", "value": "87/100"}]
+
+
+def test_batch_without_fields_still_counts_its_movies():
+    movies = MovieColumns.from_records(SEARCH_RECORDS, ())
+
+    assert len(movies) == 3
+    assert list(movies) == [MovieItem()] * 3
+    assert movies.to_dicts() == [{}, {}, {}]
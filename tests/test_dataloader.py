@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from common import omdb
+from common.dataloader import AsyncDataLoader, DataLoader
+
+
+def test_load_many_sends_the_distinct_missing_keys_in_one_batch():
+    batches = []
+    loader = DataLoader(lambda keys: batches.append(keys) or {key: key.upper() for key in keys if key != "x"})
+
+    assert loader.load_many(["a", "b", "a", "x"]) == ["A", "B", "A", None]
+    assert loader.load_many(["b", "c"]) == ["B", "C"]
+    assert batches == [["a", "b", "x"], ["c"]]
+    assert loader.batches == 2
+
+
+def test_misses_are_memoized_too():
+    batches = []
+    loader = DataLoader(lambda keys: batches.append(keys) or {})
+
+    loader.load("x")
+    assert loader.load("x") is None
+    assert batches == [["x"]]
+
+
+def test_primed_values_are_not_fetched():
+    loader = DataLoader(lambda keys: pytest.fail(f"fetched {keys}"))
+    loader.prime("a", 1)
+
+    assert loader.load("a") == 1
+
+
+def test_async_loads_of_one_pass_go_out_as_one_batch():
+    batches = []
+
+    async def batch_fn(keys):
+        batches.append(keys)
+        return {key: key * 2 for key in keys}
+
+    async def main():
+        loader = AsyncDataLoader(batch_fn)
+        first = await asyncio.gather(loader.load_many([1, 2]), loader.load_many([2, 3]))
+        second = await loader.load_many([3, 4])
+        return first, second
+
+    assert asyncio.run(main()) == ([[2, 4], [4, 6]], [6, 8])
+    assert batches == [[1, 2, 3], [4]]
+
+
+def test_async_batch_error_fails_every_load_of_the_batch():
+    async def batch_fn(keys):
+        raise RuntimeError("upstream down")
+
+    async def main():
+        loader = AsyncDataLoader(batch_fn)
+        return await asyncio.gather(loader.load(1), loader.load(2), return_exceptions=True)
+
+    assert [type(result) for result in asyncio.run(main())] == [RuntimeError, RuntimeError]
+
+
+def test_add_movie_details_merges_details_over_search_records(monkeypatch):
+    lookups = []
+
+    def fetch_movie_details(imdb_ids):
+        lookups.append(imdb_ids)
+        return {"tt1": {"imdbID": "tt1", "Plot": "A heist."}}
+
+    monkeypatch.setattr(omdb, "fetch_movie_details", fetch_movie_details)
+    records = [{"imdbID": "tt1", "Title": "Heat"}, {"imdbID": "tt2", "Title": "Ran"}, {"imdbID": "tt1"}]
+
+    merged = omdb.add_movie_details(records)
+
+    assert merged[0] == {"imdbID": "tt1", "Title": "Heat", "Plot": "A heist."}
+    assert merged[1] == {"imdbID": "tt2", "Title": "Ran"}
+    assert lookups == [["tt1", "tt2"]]
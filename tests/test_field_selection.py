@@ -0,0 +1,106 @@
+import pytest
+from ariadne import graphql_sync
+
+from common import omdb
+from common.columns import MovieColumns
+from common.movies import MovieItem
+from common.omdb import needs_details
+
+
+@pytest.fixture
+def graphql_schema(service, monkeypatch):
+    module = service("GraphQL_Service", "graphql_schema")
+    calls = []
+
+    def fake_fetch_movies_by_years(num_years, fields=None, detail_loader=None):
+        calls.append(fields)
+        return MovieColumns.from_records([{"imdbID": "tt1", "Title": "Heat", "Year": "1995"}], fields)
+
+    def fake_fetch_movies_page(years, first=None, after=None, fields=None, detail_loader=None):
+        calls.append(fields)
+        return {"edges": [], "pageInfo": {"hasNextPage": False, "endCursor": None}}
+
+    monkeypatch.setattr(module, "fetch_movies_by_years", fake_fetch_movies_by_years)
+    monkeypatch.setattr(module, "fetch_movies_page", fake_fetch_movies_page)
+    module.calls = calls
+    return module
+
+
+def execute(module, query):
+    ok, result = graphql_sync(module.schema, {"query": query})
+    assert ok and "errors" not in result, result
+    return result["data"]
+
+
+def test_all_movies_builds_only_the_selected_fields(graphql_schema):
+    data = execute(graphql_schema, "{ allMovies(num_years: 1) { title year __typename } }")
+
+    assert graphql_schema.calls == [{"title", "year"}]
+    assert data["allMovies"] == [{"title": "Heat", "year": "1995", "__typename": "Movie"}]
+
+
+def test_fragments_are_followed(graphql_schema):
+    execute(graphql_schema, """
+        query { allMovies(num_years: 1) { id ...Details ... on Movie { poster } } }
+        fragment Details on Movie { plot ratings { source } }
+    """)
+
+    assert graphql_schema.calls == [{"id", "plot", "ratings", "poster"}]
+
+
+def test_connection_fields_are_read_below_edges_node(graphql_schema):
+    execute(graphql_schema, "{ allMoviesConnection(num_years: 1) { edges { cursor node { title genre } } } }")
+
+    assert graphql_schema.calls == [{"title", "genre"}]
+
+
+@pytest.mark.parametrize("fields, expected", [
+    (None, False),
+    ({"id", "title", "year", "poster"}, False),
+    ({"title", "plot"}, True),
+    ({"ratings"}, True),
+])
+def test_details_are_needed_only_for_detail_fields(fields, expected):
+    assert needs_details(fields) is expected
+
+
+@pytest.fixture
+def details(monkeypatch):
+    lookups = []
+
+    def fake_cached_get(params):
+        lookups.append(params["i"])
+        return {"Response": "True", "imdbID": params["i"], "Plot": f"Plot of {params['i']}"}
+
+    monkeypatch.setattr(omdb, "_cached_get", fake_cached_get)
+    return lookups
+
+
+def test_summary_fields_are_built_without_detail_lookups(fake_search, details):
+    fake_search.counts = {2020: 3}
+
+    movie_items, _ = omdb.fetch_all_movies(2020, fields={"id", "title"})
+
+    assert list(movie_items)[0] == MovieItem(id="tt20200000", title="Movie 2020 0")
+    assert details == []
+
+
+def test_detail_fields_are_looked_up_once_per_movie(fake_search, details):
+    fake_search.counts = {2020: 3}
+
+    movie_items, _ = omdb.fetch_all_movies(2020, fields={"id", "plot"})
+
+    assert [movie_item.plot for movie_item in movie_items] == [
+        f"Plot of tt2020{index:04d}" for index in range(3)]
+    assert sorted(details) == ["tt20200000", "tt20200001", "tt20200002"]
+
+
+def test_movies_page_selects_only_summary_fields(graphql_schema, service):
+    client = service("GraphQL_Service", "app").app.test_client()
+
+    response = client.get("/showmovies")
+
+    assert response.status_code == 200
+    assert graphql_schema.calls == [{"id", "title", "year", "poster"}]
+    assert "Heat" in response.get_data(as_text=True)
+    assert "N/A" in response.get_data(as_text=True)
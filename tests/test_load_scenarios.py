@@ -0,0 +1,93 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmark")
+if BENCHMARK_DIR not in sys.path:
+    sys.path.append(BENCHMARK_DIR)
+
+from workloads import ALL_MOVIES_QUERY, FIELD_SETS, SCENARIOS, build_workloads
+
+
+@pytest.fixture(scope="module")
+def load_scenarios():
+    # gevent's monkey patching would change threads and sockets for every
+    # other test of the session
+    os.environ.setdefault("LOCUST_SKIP_MONKEY_PATCH", "1")
+    pytest.importorskip("locust")
+    import load_scenarios
+    return load_scenarios
+
+
+def slo_options(p95=0, p99=0, fail_ratio=0.01):
+    return SimpleNamespace(slo_p95_ms=p95, slo_p99_ms=p99, slo_fail_ratio=fail_ratio)
+
+
+def run_with_stats(load_scenarios, options, requests):
+    from locust.env import Environment
+
+    environment = Environment(parsed_options=options)
+    for name, response_time, failed in requests:
+        environment.stats.log_request("GET", name, response_time, 100)
+        if failed:
+            environment.stats.log_error("GET", name, "HTTP 503")
+    load_scenarios.check_slos(environment)
+    return environment.process_exit_code
+
+
+def test_both_services_get_one_request_per_cell():
+    workloads = build_workloads(list(SCENARIOS), [0, 2], list(FIELD_SETS))
+
+    assert len(workloads) == len(SCENARIOS) * 2 * len(FIELD_SETS)
+    for workload in workloads:
+        assert set(workload["requests"]) == {"rest", "graphql"}
+
+
+def test_graphql_request_selects_the_fields_of_the_cell():
+    request = SCENARIOS["movies_for_years"]["graphql"](2, FIELD_SETS["summary"])
+
+    assert request.json["variables"] == {"num_years": 2}
+    assert "poster" in request.json["query"] and "plot" not in request.json["query"]
+    assert SCENARIOS["movies_for_years_json"]["rest"](2, ["title", "year"]).path == \
+        "/api/moviesforyears/2?fields=title,year"
+
+
+def test_benchmark_compares_like_for_like_by_default():
+    from run import parse_args
+
+    assert parse_args([]).scenarios == ["movies_for_years_json"]
+    assert parse_args(["--scenarios", "movies_for_years"]).scenarios == ["movies_for_years"]
+
+
+def test_task_names_of_both_services_line_up(load_scenarios):
+    names = {service: sorted(task.__name__.split("_", 1)[1] for task in load_scenarios.make_tasks(service))
+             for service in ("rest", "graphql")}
+
+    assert names["rest"] == names["graphql"]
+    assert len(names["rest"]) == len(load_scenarios.MIX)
+
+
+def test_both_services_are_asked_for_the_same_fields(load_scenarios):
+    for entry in load_scenarios.MIX:
+        fields = FIELD_SETS[entry["fields"]]
+        rest = SCENARIOS[entry["scenario"]]["rest"](entry["num_years"], fields)
+        graphql = SCENARIOS[entry["scenario"]]["graphql"](entry["num_years"], fields)
+
+        assert rest.path.endswith("?fields=" + ",".join(fields))
+        assert graphql.json["query"].split() == (ALL_MOVIES_QUERY % " ".join(fields)).split()
+
+
+def test_run_within_its_slos_passes(load_scenarios):
+    requests = [("rest movies", 100, False)] * 99 + [("graphql movies", 120, False)]
+
+    assert run_with_stats(load_scenarios, slo_options(p95=500), requests) is None
+
+
+def test_breached_slo_fails_the_run(load_scenarios, capsys):
+    requests = [("rest movies", 100, False)] * 90 + [("graphql movies", 3000, True)] * 10
+
+    assert run_with_stats(load_scenarios, slo_options(p95=500), requests) == 1
+    output = capsys.readouterr().out
+    assert "graphql p95" in output and "graphql failure ratio" in output and "rest" not in output
@@ -0,0 +1,90 @@
+import asyncio
+
+import httpx
+import pytest
+from flask import Flask
+
+from common import metrics
+from common.metrics import (HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT, Counter, Gauge, Histogram,
+                            MetricsMiddleware, instrument_flask, render_metrics)
+from common.resilience import get_breaker
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(metrics, "_metrics", [])
+
+
+# Count of the requests recorded for `route` with `status`.
+def request_count(method, route, status):
+    return HTTP_REQUEST_DURATION.labels(method, route, status).snapshot()[2]
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = Histogram("work_seconds", "Work", buckets=(1.0, 0.1))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.labels().snapshot() == ([2, 3, 4], pytest.approx(2.65), 4)
+
+
+def test_exposition_format(registry):
+    counter = Counter("jobs_total", "Jobs done", ["queue"])
+    counter.labels('say "hi"\n').inc(2)
+    gauge = Gauge("workers", "Busy workers")
+    gauge.inc(3)
+    gauge.dec()
+    Histogram("wait_seconds", "Wait", buckets=(0.5,)).observe(0.2)
+
+    lines = render_metrics().splitlines()
+
+    assert lines[:3] == ["# HELP jobs_total Jobs done", "# TYPE jobs_total counter",
+                         'jobs_total{queue="say \\"hi\\"\\n"} 2.0']
+    assert "workers 2.0" in lines
+    assert 'wait_seconds_bucket{le="0.5"} 1.0' in lines and 'wait_seconds_bucket{le="+Inf"} 1.0' in lines
+    assert "wait_seconds_count 1.0" in lines
+
+
+def test_client_state_is_read_at_scrape_time(registry):
+    breaker = get_breaker("omdb")
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+    output = render_metrics()
+
+    assert 'circuit_breaker_open{upstream="omdb"} 1.0' in output
+    assert 'omdb_cache_lookups_total{result="hit"} 0.0' in output
+
+
+def test_flask_requests_are_recorded_by_route():
+    app = instrument_flask(Flask(__name__))
+    app.add_url_rule("/metrics-test/<year>", "year", lambda year: year)
+    app.add_url_rule("/metrics-test-error", "error", lambda: 1 / 0)
+    before = (request_count("GET", "/metrics-test/<year>", 200), request_count("GET", "/metrics-test-error", 500))
+
+    client = app.test_client()
+    client.get("/metrics-test/2020")
+    client.get("/metrics-test/2021")
+    client.get("/metrics-test-error")
+
+    assert request_count("GET", "/metrics-test/<year>", 200) == before[0] + 2
+    assert request_count("GET", "/metrics-test-error", 500) == before[1] + 1
+    assert HTTP_REQUESTS_IN_FLIGHT.labels().value == 0
+
+
+def test_asgi_requests_are_recorded_by_route():
+    from starlette.applications import Starlette
+    from starlette.responses import PlainTextResponse
+    from starlette.routing import Route
+
+    app = MetricsMiddleware(Starlette(routes=[
+        Route("/metrics-test/{year}", lambda request: PlainTextResponse("ok", status_code=201))]))
+    before = request_count("GET", "/metrics-test/{year}", 201)
+
+    async def get(path):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://test") as client:
+            await client.get(path)
+
+    asyncio.run(get("/metrics-test/2020"))
+
+    assert request_count("GET", "/metrics-test/{year}", 201) == before + 1
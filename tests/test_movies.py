@@ -0,0 +1,46 @@
+import pytest
+
+from common.movies import (NO_RATINGS, NOT_AVAILABLE, NOT_AVAILABLE_NAMES, MovieItem, MovieRating, movie_dicts,
+                           split_names, to_ratings)
+
+
+def test_names_are_split_into_shared_tuples():
+    names = split_names("Drama, Action")
+
+    assert names == ("Drama", "Action")
+    assert split_names(", ".join(["Drama", "Action"])) is names
+    assert split_names("N/A") is NOT_AVAILABLE_NAMES and split_names(None) is NOT_AVAILABLE_NAMES
+
+
+def test_ratings_are_tuples():
+    ratings = to_ratings([{"Source": "Rotten Tomatoes", "Value": "87%"}])
+
+    assert ratings == (MovieRating("Rotten Tomatoes", "87%"),)
+    assert ratings[0].source == "Rotten Tomatoes"
+    assert to_ratings(None) is NO_RATINGS and to_ratings([]) is NO_RATINGS
+
+
+def test_movie_item_has_no_instance_dict():
+    movie_item = MovieItem(id="tt1", title="Heat")
+
+    assert not hasattr(movie_item, "__dict__")
+    with pytest.raises(AttributeError):
+        movie_item.budget = 1
+    with pytest.raises(AttributeError):
+        movie_item.plot  # not requested
+
+
+def test_to_dict_gives_the_json_shape_of_the_requested_fields():
+    movie_item = MovieItem(title="Heat", genre=("Crime", "Drama"), plot=NOT_AVAILABLE,
+                           ratings=(MovieRating("Metacritic", "76/100"),))
+
+    assert movie_item.to_dict() == {"title": "Heat", "genre": ["Crime", "Drama"], "plot": "N/A",
+                                    "ratings": [{"source": "Metacritic", "value": "76/100"}]}
+    assert movie_item == MovieItem(title="Heat", genre=("Crime", "Drama"), plot="N/A",
+                                   ratings=(MovieRating("Metacritic", "76/100"),))
+    assert movie_item != MovieItem(title="Heat")
+
+
+def test_movie_dicts_of_plain_movie_items():
+    assert movie_dicts([MovieItem(id="tt1"), MovieItem(id="tt2", year="1995")]) == \
+        [{"id": "tt1"}, {"id": "tt2", "year": "1995"}]
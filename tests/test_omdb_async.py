@@ -0,0 +1,135 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from common import omdb_async, resilience
+from common.omdb import PAGE_SIZE, year_range
+
+
+# Mock OMDb answering the search pages of `counts` (movies per year), 10 per
+# page, and recording the (year, page) of every request.
+class MockOmdb:
+    def __init__(self, counts):
+        self.counts = counts
+        self.calls = []
+
+    def __call__(self, request):
+        year, page = int(request.url.params["y"]), int(request.url.params.get("page", 1))
+        self.calls.append((year, page))
+        count = self.counts.get(year, 0)
+        start = (page - 1) * PAGE_SIZE
+        if start >= count:
+            return httpx.Response(200, json={"Response": "False", "Error": "Movie not found!"})
+        return httpx.Response(200, json={
+            "Response": "True",
+            "totalResults": str(count),
+            "Search": [{"Title": f"Movie {year} {index}", "Year": str(year), "imdbID": f"tt{year}{index:04d}"}
+                       for index in range(start, min(start + PAGE_SIZE, count))],
+        })
+
+
+# Run `coroutine_fn()` on a new event loop, with the async OMDb client
+# talking to `handler`.
+def run_with_omdb(monkeypatch, handler, coroutine_fn):
+    async def main():
+        monkeypatch.setattr(omdb_async, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        monkeypatch.setattr(omdb_async, "_client_loop", asyncio.get_running_loop())
+        try:
+            return await coroutine_fn()
+        finally:
+            await omdb_async.close_async_client()
+    return asyncio.run(main())
+
+
+def test_fetch_all_movies_async_keeps_page_order(monkeypatch):
+    mock = MockOmdb({2020: 35})
+
+    movie_items, _ = run_with_omdb(monkeypatch, mock, lambda: omdb_async.fetch_all_movies_async(2020, 4))
+
+    assert [movie_item.id for movie_item in movie_items] == [f"tt2020{index:04d}" for index in range(35)]
+    assert sorted(mock.calls) == [(2020, 1), (2020, 2), (2020, 3), (2020, 4)]
+
+
+def test_pages_are_served_from_the_cache_the_second_time(monkeypatch):
+    mock = MockOmdb({2020: 15})
+
+    async def twice():
+        await omdb_async.fetch_all_movies_async(2020)
+        return await omdb_async.fetch_all_movies_async(2020)
+
+    movie_items, _ = run_with_omdb(monkeypatch, mock, twice)
+
+    assert len(movie_items) == 15
+    assert len(mock.calls) == 2
+
+
+def test_fetch_movies_by_years_async_joins_the_years_oldest_first(monkeypatch):
+    mock = MockOmdb({2022: 3, 2023: 2})
+
+    movie_items = run_with_omdb(monkeypatch, mock, lambda: omdb_async.fetch_movies_by_years_async(1))
+
+    assert [movie_item.year for movie_item in movie_items] == ["2022"] * 3 + ["2023"] * 2
+
+
+def test_async_year_list_rejects_a_bad_number_of_years():
+    with pytest.raises(ValueError):
+        asyncio.run(omdb_async.fetch_movies_by_years_async("abc"))
+
+
+def test_async_helpers_read_the_years_like_the_threaded_ones(monkeypatch):
+    mock = MockOmdb({year: 1 for year in year_range("2")})
+
+    async def both():
+        streamed = [movie_item.year async for movie_item in omdb_async.iter_movies_by_years_async("2")]
+        fetched = [movie_item.year for movie_item in await omdb_async.fetch_movies_by_years_async("2")]
+        return streamed, fetched
+
+    streamed, fetched = run_with_omdb(monkeypatch, mock, both)
+
+    assert streamed == fetched == [str(year) for year in year_range(2)]
+
+
+# Cache backend recording the thread each call runs on.
+class RecordingCache:
+    def __init__(self, blocking):
+        self.blocking = blocking
+        self.threads = []
+
+    def get_entry(self, key):
+        self.threads.append(threading.current_thread())
+        return None
+
+
+@pytest.mark.parametrize("blocking", [True, False])
+def test_blocking_cache_backends_are_called_off_the_event_loop(monkeypatch, blocking):
+    store = RecordingCache(blocking)
+    monkeypatch.setattr(omdb_async, "get_cache", lambda: store)
+
+    asyncio.run(omdb_async._call_cache(store.get_entry, "key"))
+
+    assert (store.threads[0] is threading.main_thread()) is not blocking
+
+
+def test_pool_timeout_is_neither_counted_nor_retried(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise httpx.PoolTimeout("no free connection", request=request)
+
+    page = run_with_omdb(monkeypatch, handler, lambda: omdb_async.fetch_search_page_async(2020, 1))
+
+    assert page is None and len(calls) == 1
+    assert resilience.get_breaker("omdb").failures == 0
+
+
+def test_non_json_page_is_a_failed_page(monkeypatch):
+    def handler(request):
+        return httpx.Response(200, text="<html>maintenance</html>")
+
+    page = run_with_omdb(monkeypatch, handler, lambda: omdb_async.fetch_search_page_async(2020, 1))
+
+    assert page is None
+    assert resilience.get_breaker("omdb").state == "closed"
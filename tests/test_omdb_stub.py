@@ -0,0 +1,89 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+from common.omdb import PAGE_SIZE, page_count
+
+STUB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "OMDb_Service")
+
+
+@pytest.fixture(scope="module")
+def stub():
+    if STUB_DIR not in sys.path:
+        sys.path.append(STUB_DIR)
+    # loaded under its own name: `app` is also the services' module name
+    spec = importlib.util.spec_from_file_location("omdb_stub_app", os.path.join(STUB_DIR, "app.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def client(stub):
+    config = dict(stub.app.config)
+    yield stub.app.test_client()
+    stub.app.config.update(config)
+    stub.build_catalog()
+
+
+def all_pages(client, year):
+    first = client.get(f"/?s=movie&y={year}&page=1").get_json()
+    pages = [first] + [client.get(f"/?s=movie&y={year}&page={page}").get_json()
+                       for page in range(2, page_count(first) + 1)]
+    return first, [movie for data in pages for movie in data["Search"]]
+
+
+def test_search_pages_hold_the_whole_year_once(client):
+    first, movies = all_pages(client, 2020)
+
+    assert len(first["Search"]) == PAGE_SIZE
+    assert len(movies) == int(first["totalResults"])
+    assert len({movie["imdbID"] for movie in movies}) == len(movies)
+
+
+def test_page_past_the_last_one_has_no_results(client):
+    first = client.get("/?s=movie&y=2020&page=1").get_json()
+
+    data = client.get(f"/?s=movie&y=2020&page={page_count(first) + 1}").get_json()
+
+    assert data == {"Response": "False", "Error": "Movie not found!"}
+
+
+def test_the_same_seed_gives_the_same_catalog(stub):
+    first, second = stub.Catalog(seed=7), stub.Catalog(seed=7)
+    second._year(2021)  # generation order doesn't matter
+
+    assert first.search("movie", 2020, 1) == second.search("movie", 2020, 1)
+    assert first.search("movie", 2020, 1) != stub.Catalog(seed=8).search("movie", 2020, 1)
+
+
+def test_detail_lookups_match_the_search_results(client):
+    movie = client.get("/?s=movie&y=2020&page=1").get_json()["Search"][0]
+
+    by_id = client.get(f"/?i={movie['imdbID']}").get_json()
+    by_title = client.get(f"/?t={movie['Title']}&y=2020").get_json()
+
+    assert by_id["Title"] == movie["Title"] and by_id["Plot"]
+    assert by_title["imdbID"] == movie["imdbID"]
+
+
+def test_injected_errors(stub, client):
+    stub.app.config.update(OMDB_STUB_ERROR_RATE=1.0)
+    assert client.get("/?s=movie&y=2020").status_code == 503
+
+    stub.app.config.update(OMDB_STUB_ERROR_RATE=0.0, OMDB_STUB_LIMIT_RATE=1.0)
+    response = client.get("/?s=movie&y=2020")
+    assert response.status_code == 401 and response.get_json()["Error"] == "Request limit reached!"
+
+
+def test_request_without_a_query_is_refused(client):
+    assert client.get("/").status_code == 401
+
+
+def test_pages_have_the_services_page_size(stub):
+    catalog = sys.modules[stub.Catalog.__module__]
+
+    assert catalog.PAGE_SIZE == PAGE_SIZE
+    assert len(stub.Catalog(min_movies=25, max_movies=25).search("movie", 2020, 3)["Search"]) == 25 - 2 * PAGE_SIZE
@@ -0,0 +1,172 @@
+import json
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from common import omdb, omdb_async
+from common.omdb import PAGE_SIZE, fetch_movies_page, fetch_search_window, search_window
+from common.pagination import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, connection, decode_cursor, encode_cursor,
+                               page_size, start_position)
+from conftest import search_response
+from test_omdb_async import MockOmdb, run_with_omdb
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(2020, 15)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (2020, 15)
+
+
+@pytest.mark.parametrize("cursor", ["", "abc", "!!!", encode_cursor(2020, 1)[:-2],
+                                    "bW92aWU6MjAyMA", "Ym9vazoyMDIwOjE", "bW92aWU6MjAyMDotMQ"])
+def test_malformed_cursors_are_refused(cursor):
+    # the last three decode to "movie:2020", "book:2020:1" and "movie:2020:-1"
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize("limit, size", [(None, DEFAULT_PAGE_SIZE), (0, 1), (-5, 1), ("7", 7), (1000, MAX_PAGE_SIZE)])
+def test_page_size_is_clamped(limit, size):
+    assert page_size(limit) == size
+
+
+def test_start_position_is_the_movie_after_the_cursor():
+    years = [2019, 2020, 2021]
+
+    assert start_position(years, None) == (0, 0)
+    assert start_position(years, encode_cursor(2020, 9)) == (1, 10)
+    with pytest.raises(ValueError):
+        start_position(years, encode_cursor(2018, 0))
+
+
+def test_connection_ends_at_the_last_edge():
+    page = connection([(2020, 3, "a"), (2020, 4, "b")], True)
+
+    assert [edge["node"] for edge in page["edges"]] == ["a", "b"]
+    assert page["pageInfo"] == {"hasNextPage": True, "endCursor": encode_cursor(2020, 4)}
+    assert connection([], False)["pageInfo"] == {"hasNextPage": False, "endCursor": None}
+
+
+@pytest.mark.parametrize("start, limit, last_page_fetched, count, exhausted", [
+    (5, 10, True, 10, False),   # 25 movies: 5..14 leaves 15..24
+    (15, 10, True, 10, True),   # 15..24 is the end
+    (15, 20, True, 10, True),   # short window at the end
+    (15, 10, False, 10, False), # more pages after the ones fetched
+])
+def test_search_window_cuts_the_pages(start, limit, last_page_fetched, count, exhausted):
+    pages = [search_response(2020, page, 25) for page in (1, 2, 3)]
+
+    records, is_exhausted = search_window(pages, start, limit, last_page_fetched)
+
+    assert [record["imdbID"] for record in records] == [f"tt2020{index:04d}" for index in range(start, start + count)]
+    assert is_exhausted is exhausted
+
+
+def test_failed_page_is_not_the_end_of_the_year():
+    pages = [search_response(2020, 1, 25), None]
+
+    records, exhausted = search_window(pages, 5, 10, True)
+
+    assert len(records) == 5 and not exhausted
+
+
+def test_search_window_fetches_only_the_pages_it_needs(fake_search):
+    fake_search.counts = {2020: 45}
+
+    records, exhausted = fetch_search_window(2020, 15, 10)
+
+    assert [record["imdbID"] for record in records] == [f"tt2020{index:04d}" for index in range(15, 25)]
+    assert fake_search.pages(2020) == [2, 3] and not exhausted
+    assert fetch_search_window(2020, 40, 10)[1]
+    assert fetch_search_window(2020, 45, 10) == ([], True)
+
+
+# Every movie of `years`, read page by page through the cursors.
+def all_pages(years, limit):
+    ids, cursor, pages = [], None, 0
+    while True:
+        page = fetch_movies_page(years, limit, cursor, fields=["id"])
+        ids += [edge["node"].id for edge in page["edges"]]
+        pages += 1
+        if not page["pageInfo"]["hasNextPage"]:
+            return ids, pages
+        cursor = page["pageInfo"]["endCursor"]
+
+
+@pytest.mark.parametrize("limit", [1, 7, 10, 13, 100])
+def test_pages_cover_every_year_once(fake_search, limit):
+    fake_search.counts = {2019: 12, 2020: 0, 2021: 20, 2022: 3}
+    expected = [f"tt{year}{index:04d}" for year in (2019, 2021, 2022) for index in range(fake_search.counts[year])]
+
+    ids, pages = all_pages([2019, 2020, 2021, 2022], limit)
+
+    assert ids == expected
+    assert pages == max(1, -(-len(expected) // limit))
+
+
+def test_failed_page_is_resumed_by_the_next_request(fake_search):
+    fake_search.counts = {2020: 25}
+    fake_search.failing.add((2020, 2))
+
+    page = fetch_movies_page([2020], 20)
+    assert len(page["edges"]) == PAGE_SIZE and page["pageInfo"]["hasNextPage"]
+
+    fake_search.failing.clear()
+    rest = fetch_movies_page([2020], 20, page["pageInfo"]["endCursor"])
+    assert [edge["node"].id for edge in rest["edges"]] == [f"tt2020{index:04d}" for index in range(10, 25)]
+    assert not rest["pageInfo"]["hasNextPage"]
+
+
+def test_cursor_of_another_year_list_is_refused(fake_search):
+    with pytest.raises(ValueError):
+        fetch_movies_page([2021], 5, encode_cursor(2020, 3))
+
+
+@pytest.fixture
+def rest_client(service, monkeypatch, fake_search):
+    monkeypatch.setattr(omdb, "fetch_movie_details", lambda imdb_ids: {})
+    return service("REST_Service", "app").app.test_client()
+
+
+def test_rest_pages_link_to_the_next_one(rest_client, fake_search):
+    fake_search.counts = {2020: 12}
+    ids, url = [], "/movies/2020?limit=5&format=ndjson"
+    while url:
+        response = rest_client.get(url)
+        ids += [json.loads(line)["id"] for line in response.get_data(as_text=True).splitlines()]
+        link = response.headers.get("Link")
+        url = link[1:link.index(">")] if link else None
+        if url:
+            assert parse_qs(urlparse(url).query)["limit"] == ["5"]
+
+    assert ids == [f"tt2020{index:04d}" for index in range(12)]
+
+
+@pytest.mark.parametrize("url, error", [
+    ("/movies/abc?limit=3", "Invalid year: 'abc'"),
+    ("/movies/2020?cursor=nope", "Invalid cursor: 'nope'"),
+    ("/moviesforyears/abc?limit=3", "Invalid number of years: 'abc'"),
+])
+def test_rest_refuses_bad_pages(rest_client, url, error):
+    response = rest_client.get(url)
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": error}
+
+
+def test_async_pages_cover_every_year_once(monkeypatch):
+    mock = MockOmdb({2019: 12, 2021: 20})
+
+    async def read_all():
+        ids, cursor = [], None
+        while True:
+            page = await omdb_async.fetch_movies_page_async([2019, 2020, 2021], 7, cursor, fields=["id"])
+            ids += [edge["node"].id for edge in page["edges"]]
+            if not page["pageInfo"]["hasNextPage"]:
+                return ids
+            cursor = page["pageInfo"]["endCursor"]
+
+    ids = run_with_omdb(monkeypatch, mock, read_all)
+
+    assert ids == [f"tt{year}{index:04d}" for year, count in ((2019, 12), (2021, 20)) for index in range(count)]
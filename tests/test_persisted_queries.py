@@ -0,0 +1,83 @@
+import pytest
+from graphql import build_schema
+from graphql.validation import specified_rules
+
+QUERY = "{ hello }"
+SCHEMA = build_schema("type Query { hello: String }")
+
+
+@pytest.fixture
+def persisted_queries(service):
+    return service("GraphQL_Service", "persisted_queries")
+
+
+def apq(sha256_hash, query=None, version=1):
+    data = {"extensions": {"persistedQuery": {"version": version, "sha256Hash": sha256_hash}}}
+    if query is not None:
+        data["query"] = query
+    return data
+
+
+def error_code(persisted_queries, store, data):
+    with pytest.raises(persisted_queries.PersistedQueryError) as error:
+        store.resolve(data)
+    return error.value.code
+
+
+def test_request_without_persisted_query_is_unchanged(persisted_queries):
+    data = {"query": QUERY}
+
+    assert persisted_queries.PersistedQueryStore(10).resolve(data) is data
+
+
+def test_registered_query_is_served_by_hash(persisted_queries):
+    store = persisted_queries.PersistedQueryStore(10)
+    sha256_hash = persisted_queries.query_hash(QUERY)
+
+    assert error_code(persisted_queries, store, apq(sha256_hash)) == "PERSISTED_QUERY_NOT_FOUND"
+    store.resolve(apq(sha256_hash, QUERY))
+    assert store.resolve(apq(sha256_hash))["query"] == QUERY
+
+
+def test_query_not_matching_its_hash_is_refused(persisted_queries):
+    store = persisted_queries.PersistedQueryStore(10)
+
+    assert error_code(persisted_queries, store, apq("0" * 64, QUERY)) == "BAD_REQUEST"
+    assert error_code(persisted_queries, store, apq("0" * 64)) == "PERSISTED_QUERY_NOT_FOUND"
+
+
+def test_unknown_version_is_not_supported(persisted_queries):
+    store = persisted_queries.PersistedQueryStore(10)
+
+    assert error_code(persisted_queries, store, apq("0" * 64, version=2)) == "PERSISTED_QUERY_NOT_SUPPORTED"
+
+
+def test_document_cache_parses_a_query_text_once(persisted_queries):
+    documents = persisted_queries.DocumentCache(10)
+
+    first = documents.parse_query(None, {"query": QUERY})
+    second = documents.parse_query(None, {"query": QUERY})
+
+    assert first is second
+    assert (documents.hits, documents.misses) == (1, 1)
+
+
+def test_document_cache_evicts_the_least_recently_used_document(persisted_queries):
+    documents = persisted_queries.DocumentCache(1)
+    first = documents.parse_query(None, {"query": QUERY})
+    documents.parse_query(None, {"query": "{ __typename }"})
+
+    assert documents.parse_query(None, {"query": QUERY}) is not first
+
+
+def test_document_cache_remembers_validation_per_document(persisted_queries, monkeypatch):
+    documents = persisted_queries.DocumentCache(10)
+    document = documents.parse_query(None, {"query": "{ missing }"})
+    calls = []
+    validate = persisted_queries.validate
+    monkeypatch.setattr(persisted_queries, "validate",
+                        lambda *args, **kwargs: calls.append(1) or validate(*args, **kwargs))
+
+    errors = documents.validate_query(SCHEMA, document, specified_rules)
+    assert documents.validate_query(SCHEMA, document, specified_rules) is errors
+    assert len(errors) == 1 and len(calls) == 1
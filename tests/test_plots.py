@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+from common import plots
+from common.omdb import LAST_YEAR
+from common.plots import PlotRenderer
+
+YEARS_DATA = [{"year": 2022, "count": 30, "time_taken": 0.5}, {"year": 2023, "count": 25, "time_taken": 0.4}]
+
+
+# Stand-in for `plots.performance_data`, recording the years of every render.
+class Renders(list):
+    fail = False
+
+    def __call__(self, num_years):
+        self.append(num_years)
+        if self.fail:
+            raise RuntimeError("OMDb is down")
+        return YEARS_DATA
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    renders = Renders()
+    monkeypatch.setattr(plots, "performance_data", renders)
+    return renders
+
+
+# Wait for the jobs queued so far: the renderer has a single worker thread.
+def drain(renderer):
+    renderer._worker.submit(lambda: None).result(timeout=30)
+
+
+def test_plot_is_rendered_once_off_the_request_thread(renders, tmp_path):
+    renderer = PlotRenderer("rest", str(tmp_path), "/static/plots/")
+    job = renderer.request_plot("1")
+
+    assert job.status == "pending" and job.url == f"/static/plots/rest-{job.id}.png"
+    drain(renderer)
+    assert renderer.request_plot(1) is job
+    assert job.status == "done" and renders == [1]
+    assert os.path.exists(tmp_path / f"rest-{job.id}.png")
+    assert renderer.get_job(job.id).to_dict()["status"] == "done"
+
+
+def test_failed_plot_is_rendered_again_when_requested(renders, tmp_path):
+    renderer = PlotRenderer("rest", str(tmp_path), "/plots")
+    renders.fail = True
+    job = renderer.request_plot(1)
+    drain(renderer)
+    assert (job.status, job.error) == ("failed", "OMDb is down")
+
+    renders.fail = False
+    renderer.request_plot(1)
+    drain(renderer)
+    assert job.status == "done" and renders == [1, 1]
+
+
+def test_plot_file_outlives_a_restart(renders, tmp_path):
+    first = PlotRenderer("graphql", str(tmp_path), "/plots")
+    first.request_plot(2)
+    drain(first)
+
+    assert PlotRenderer("graphql", str(tmp_path), "/plots").request_plot(2).status == "done"
+    assert renders == [2]
+
+
+def test_oldest_plots_are_removed(renders, tmp_path):
+    renderer = PlotRenderer("rest", str(tmp_path), "/plots", max_plots=1)
+    first = renderer.request_plot(1)
+    drain(renderer)
+    renderer.request_plot(2)
+    drain(renderer)
+
+    assert renderer.get_job(first.id) is None
+    assert [path.name for path in tmp_path.iterdir()] == [f"rest-{renderer.request_plot(2).id}.png"]
+
+
+def test_plot_id_changes_with_the_data_version(monkeypatch, tmp_path):
+    renderer = PlotRenderer("rest", str(tmp_path), "/plots")
+    job_id = renderer._job_id(1)
+    monkeypatch.setattr(plots.time, "time", lambda: 10 * plots.settings.OMDB_CACHE_TTL)
+
+    assert renderer._job_id(1) != job_id
+    assert renderer._job_id(1) != PlotRenderer("graphql", str(tmp_path), "/plots")._job_id(1)
+
+
+def test_performance_data_fetches_the_years_without_history(monkeypatch):
+    fetched = []
+
+    def fetch_years(years, fields=None):
+        fetched.append((list(years), fields))
+        return [(year, [None] * 3, 0.25) for year in years]
+
+    monkeypatch.setattr(plots, "fetch_years", fetch_years)
+
+    data = plots.performance_data(1)
+
+    assert fetched == [([LAST_YEAR - 1, LAST_YEAR], ())]
+    assert data == [{"year": LAST_YEAR - 1, "count": 3, "time_taken": 0.25},
+                    {"year": LAST_YEAR, "count": 3, "time_taken": 0.25}]
@@ -0,0 +1,100 @@
+import pytest
+from graphql import parse
+
+
+@pytest.fixture
+def query_cost(service):
+    return service("GraphQL_Service", "query_cost")
+
+
+@pytest.fixture
+def schema(service):
+    return service("GraphQL_Service", "graphql_schema").schema
+
+
+def report(query_cost, schema, query, variables=None, max_cost=100000, max_depth=10):
+    data = {"query": query, "variables": variables}
+    return query_cost.check_query_cost(schema, parse(query), data, max_cost, max_depth)
+
+
+@pytest.mark.parametrize("query, cost, depth", [
+    # 2 years x 100 pages (OMDB_MAX_PAGES); search fields need no detail lookup
+    ("{ allMovies(num_years: 1) { title year } }", 200, 2),
+    # plus one detail lookup for each of the 2 x 1000 estimated movies
+    ("{ allMovies(num_years: 1) { title plot } }", 2200, 2),
+    ("{ fetchPerformance(year: 2020) { movie_count } }", 100, 2),
+    # 3 years x 100 pages plus the render
+    ("{ performancePlot(numYear: 2) { plot_url } }", 310, 2),
+])
+def test_query_cost_and_depth(query_cost, schema, query, cost, depth):
+    result = report(query_cost, schema, query)
+
+    assert (result["requestedQueryCost"], result["depth"]) == (cost, depth)
+
+
+@pytest.mark.parametrize("first, pages", [(None, 4), (9, 2), (10, 3), (19, 3), (100, 12), (500, 12)])
+def test_connection_costs_the_pages_of_its_window(query_cost, schema, first, pages):
+    argument = "" if first is None else f", first: {first}"
+    query = f"{{ allMoviesConnection(num_years: 5{argument}) {{ edges {{ node {{ title }} }} }} }}"
+
+    assert report(query_cost, schema, query)["requestedQueryCost"] == pages
+
+
+def test_connection_detail_lookups_scale_with_the_page_size(query_cost, schema):
+    query = "{ allMoviesConnection(num_years: 5, first: 20) { edges { node { plot } } } }"
+
+    result = report(query_cost, schema, query)
+
+    assert (result["requestedQueryCost"], result["depth"]) == (4 + 20, 4)
+
+
+def test_variables_and_fragments_are_counted(query_cost, schema):
+    query = """
+        query Movies($years: Int) { allMovies(num_years: $years) { ...Fields } }
+        fragment Fields on Movie { title ratings { source } }
+    """
+
+    result = report(query_cost, schema, query, {"years": 4})
+
+    assert (result["requestedQueryCost"], result["depth"]) == (500 + 5000, 3)
+
+
+def test_query_over_the_cost_budget_is_rejected(query_cost, schema):
+    with pytest.raises(query_cost.QueryCostError) as error:
+        report(query_cost, schema, "{ allMovies(num_years: 1) { plot } }", max_cost=100)
+
+    assert error.value.to_result()["errors"][0]["extensions"]["code"] == "QUERY_TOO_EXPENSIVE"
+    assert error.value.report["requestedQueryCost"] == 2200
+
+
+def test_year_estimate_follows_the_page_cap(query_cost, schema, monkeypatch):
+    monkeypatch.setattr(query_cost.settings, "OMDB_MAX_PAGES", 3)
+
+    assert report(query_cost, schema, "{ allMovies(num_years: 1) { title } }")["requestedQueryCost"] == 6
+
+
+@pytest.mark.parametrize("query, accepted", [
+    ("{ allMovies(num_years: 5) { id title year poster } }", True),
+    ("{ allMovies(num_years: 50) { title } }", False),
+    ("{ allMovies(num_years: 0) { plot } }", False),
+    ("{ allMoviesConnection(num_years: 50, first: 20) { edges { node { plot } } } }", True),
+])
+def test_default_budget(service, query_cost, schema, query, accepted):
+    config = service("GraphQL_Service", "config").Config
+
+    try:
+        report(query_cost, schema, query, max_cost=config.GRAPHQL_MAX_COST, max_depth=config.GRAPHQL_MAX_DEPTH)
+    except query_cost.QueryCostError:
+        assert not accepted
+    else:
+        assert accepted
+
+
+def test_query_over_the_depth_budget_is_rejected(query_cost, schema):
+    with pytest.raises(query_cost.QueryCostError):
+        report(query_cost, schema, "{ allMovies(num_years: 1) { ratings { source } } }", max_depth=2)
+
+
+def test_unparsable_query_is_left_to_ariadne(query_cost, schema):
+    assert query_cost.analyze_request(schema, {"query": "{ allMovies("}, lambda _, data: parse(data["query"]),
+                                      1, 1) is None
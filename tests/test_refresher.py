@@ -0,0 +1,100 @@
+import time
+
+import pytest
+
+from common import refresher
+from common.cache import get_cache
+from common.omdb import LAST_YEAR, search_page_key
+from common.refresher import RETRY_DELAY, YearRefresher
+from conftest import search_response
+
+
+# Stand-in for `refresh_search_page`: caches the page like the real one and
+# records every (year, page) fetched.
+@pytest.fixture
+def refreshed(monkeypatch):
+    calls = []
+    failing = set()
+
+    def refresh_search_page(year, page):
+        calls.append((year, page))
+        if (year, page) in failing:
+            return None
+        data = search_response(year, page, 25)
+        get_cache().set(search_page_key(year, page), data)
+        return data
+
+    monkeypatch.setattr(refresher, "refresh_search_page", refresh_search_page)
+    refresh_search_page.calls = calls
+    refresh_search_page.failing = failing
+    return refresh_search_page
+
+
+def cache_year(year, ttls):
+    for page, ttl in enumerate(ttls, 1):
+        get_cache().set(search_page_key(year, page), search_response(year, page, 25), ttl=ttl)
+
+
+def test_hot_years_count_back_from_the_last_year():
+    assert YearRefresher(3, 60, 100).years == [LAST_YEAR - 2, LAST_YEAR - 1, LAST_YEAR]
+
+
+def test_uncached_year_is_fetched_whole(refreshed):
+    worker = YearRefresher(1, 60, 1000)
+
+    worker._refresh_year(LAST_YEAR)
+
+    assert refreshed.calls == [(LAST_YEAR, 1), (LAST_YEAR, 2), (LAST_YEAR, 3)]
+    status = worker.status()["years"][0]
+    assert (status["pages"], status["last_error"]) == (3, None)
+    assert worker.requests == 3
+
+
+def test_only_pages_about_to_expire_are_fetched_again(refreshed):
+    cache_year(LAST_YEAR, [1000, 1000, 30])
+    worker = YearRefresher(1, 60, 1000)
+
+    worker._refresh_year(LAST_YEAR)
+
+    assert refreshed.calls == [(LAST_YEAR, 1), (LAST_YEAR, 3)]
+
+
+def test_next_refresh_comes_before_the_first_page_to_expire():
+    cache_year(LAST_YEAR, [1000, 500, 800])
+    worker = YearRefresher(1, 60, 1000)
+
+    assert worker._next_refresh(LAST_YEAR) == pytest.approx(time.time() + 500 - 60, abs=1)
+    get_cache().clear()
+    cache_year(LAST_YEAR, [1000, 1000])  # page 3 is missing
+    assert worker._next_refresh(LAST_YEAR) <= time.time()
+
+
+def test_failed_refresh_is_tried_again_later(refreshed):
+    refreshed.failing.add((LAST_YEAR, 2))
+    worker = YearRefresher(1, 60, 1000)
+
+    worker._refresh_year(LAST_YEAR)
+
+    state = worker._state[LAST_YEAR]
+    assert state["last_error"] == "1 of 3 pages failed"
+    assert state["next_refresh"] == pytest.approx(time.time() + RETRY_DELAY, abs=1)
+
+
+def test_refresh_ahead_is_capped_to_half_the_ttl(monkeypatch):
+    monkeypatch.setattr(refresher.settings, "OMDB_CACHE_TTL", 100)
+
+    assert YearRefresher(1, 300, 1).refresh_ahead == 50
+
+
+def test_requests_are_spaced_by_the_rate(monkeypatch):
+    worker = YearRefresher(1, 60, 2)
+    waits = []
+    monkeypatch.setattr(worker._stop, "wait", lambda seconds: waits.append(seconds) or False)
+
+    assert all(worker._throttle() for _ in range(3))
+    assert waits == [pytest.approx(0.5, abs=0.05), pytest.approx(1.0, abs=0.05)]
+
+
+def test_refresher_is_off_by_default():
+    assert refresher.start_refresher() is None
+    assert refresher.refresher_status() == {"running": False, "years": []}
@@ -0,0 +1,191 @@
+import time
+
+import pytest
+import requests
+
+from common import omdb, resilience
+from common.cache import get_cache
+from common.resilience import (CircuitBreaker, PoolExhausted, UpstreamUnavailable, call_with_retries,
+                               get_breaker, track_stale)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience, "time", clock)
+    return clock
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, data=None):
+        self.status_code = status_code
+        self.content = b"{}"
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+# `send` of `call_with_retries` answering with `outcomes` in turn: a status
+# code, or an exception to raise.
+def sender(*outcomes):
+    def send():
+        outcome = outcomes[len(send.calls)]
+        send.calls.append(outcome)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome)
+    send.calls = []
+    return send
+
+
+def test_circuit_opens_after_the_failure_threshold(clock):
+    breaker = CircuitBreaker("omdb", failure_threshold=3, reset_timeout=30)
+
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.allow() and breaker.state == "closed"
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.status() == {"name": "omdb", "state": "open", "failures": 3, "rejected": 1}
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker("omdb", failure_threshold=2, reset_timeout=30)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == "closed"
+
+
+def test_half_open_circuit_lets_a_single_probe_through(clock):
+    breaker = CircuitBreaker("omdb", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_failed_probe_opens_the_circuit_again(clock):
+    breaker = CircuitBreaker("omdb", failure_threshold=5, reset_timeout=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == "open" and breaker.opened_at == clock.now
+    assert not breaker.allow()
+
+
+def test_skipped_probe_lets_the_next_request_probe(clock):
+    breaker = CircuitBreaker("omdb", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+
+    breaker.record_skipped()
+
+    assert breaker.state == "half_open" and breaker.allow()
+
+
+def test_server_errors_are_retried_with_backoff(clock, monkeypatch):
+    monkeypatch.setattr(resilience, "backoff_delays", lambda: iter([0.1, 0.2]))
+    send = sender(503, 429, 200)
+
+    assert call_with_retries("omdb", send).status_code == 200
+    assert clock.sleeps == [0.1, 0.2]
+    assert get_breaker("omdb").failures == 0
+
+
+@pytest.mark.parametrize("status_code", [401, 404])
+def test_client_errors_are_not_retried(clock, status_code):
+    send = sender(status_code, 200)
+
+    assert call_with_retries("omdb", send).status_code == status_code
+    assert len(send.calls) == 1
+
+
+def test_retries_are_bounded(clock, monkeypatch):
+    monkeypatch.setattr(resilience.settings, "OMDB_RETRIES", 2)
+    send = sender(503, 503, 503, 200)
+
+    assert call_with_retries("omdb", send).status_code == 503
+    assert len(send.calls) == 3
+
+    error = requests.ConnectionError("refused")
+    with pytest.raises(requests.ConnectionError):
+        call_with_retries("other", sender(error, error, error, 200))
+
+
+def test_backoff_is_capped_at_the_read_timeout(monkeypatch):
+    monkeypatch.setattr(resilience.settings, "OMDB_RETRIES", 6)
+    monkeypatch.setattr(resilience.settings, "OMDB_RETRY_BACKOFF", 1)
+    monkeypatch.setattr(resilience.settings, "OMDB_READ_TIMEOUT", 5)
+
+    delays = list(resilience.backoff_delays())
+
+    assert len(delays) == 6 and all(0 <= delay <= 5 for delay in delays)
+
+
+def test_open_circuit_fails_without_sending(clock, monkeypatch):
+    monkeypatch.setattr(resilience.settings, "OMDB_BREAKER_FAILURES", 1)
+    monkeypatch.setattr(resilience.settings, "OMDB_RETRIES", 0)
+    call_with_retries("omdb", sender(503))
+    send = sender(200)
+
+    with pytest.raises(UpstreamUnavailable):
+        call_with_retries("omdb", send)
+    assert send.calls == []
+
+
+def test_full_pool_is_neither_counted_nor_retried(clock, monkeypatch):
+    monkeypatch.setattr(resilience.settings, "OMDB_BREAKER_FAILURES", 1)
+    send = sender(PoolExhausted("busy"), 200)
+
+    with pytest.raises(PoolExhausted):
+        call_with_retries("omdb", send)
+
+    assert len(send.calls) == 1
+    assert get_breaker("omdb").state == "closed" and get_breaker("omdb").failures == 0
+
+
+def test_expired_page_is_served_stale_while_it_is_fetched_again(monkeypatch):
+    fresh = {"Response": "True", "totalResults": "1", "Search": [{"Title": "New"}]}
+    monkeypatch.setattr(omdb, "omdb_get", lambda params: FakeResponse(200, fresh))
+    key = omdb.search_page_key(2020, 1)
+    stale = {"Response": "True", "totalResults": "1", "Search": [{"Title": "Old"}]}
+    get_cache().set(key, stale, ttl=-1)
+
+    with track_stale() as stale_keys:
+        assert omdb.fetch_search_page(2020, 1) == stale
+    assert stale_keys == {key}
+
+    deadline = time.monotonic() + 5
+    while get_cache().get(key) != fresh:
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
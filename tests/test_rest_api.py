@@ -0,0 +1,82 @@
+import pytest
+from ariadne import graphql_sync
+
+from common import omdb
+from common.omdb import LAST_YEAR
+
+
+@pytest.fixture
+def controllers(service):
+    return service("REST_Service", "controllers")
+
+
+@pytest.fixture
+def details(monkeypatch):
+    lookups = []
+
+    def fetch_movie_details(imdb_ids):
+        lookups.append(list(imdb_ids))
+        return {imdb_id: {"imdbID": imdb_id, "Plot": f"Plot of {imdb_id}"} for imdb_id in imdb_ids}
+
+    monkeypatch.setattr(omdb, "fetch_movie_details", fetch_movie_details)
+    return lookups
+
+
+@pytest.fixture
+def client(service, fake_search, details):
+    fake_search.counts = {LAST_YEAR - 1: 4, LAST_YEAR: 3, 2020: 12}
+    return service("REST_Service", "app").app.test_client()
+
+
+@pytest.mark.parametrize("param, fields", [
+    (None, None),
+    (" , ", None),
+    ("title, year,title", ["title", "year"]),
+    ("poster,id", ["poster", "id"]),
+])
+def test_fields_are_read_in_order_once(controllers, param, fields):
+    assert controllers.parse_fields(param) == fields
+
+
+def test_unknown_field_is_refused(controllers):
+    with pytest.raises(ValueError, match="Unknown fields: budget"):
+        controllers.parse_fields("title,budget")
+
+
+def test_only_the_requested_fields_are_returned(client, details):
+    data = client.get("/api/movies/2020?fields=title,year").get_json()
+
+    assert data["count"] == 12
+    assert data["movies"][0] == {"title": "Movie 2020 0", "year": "2020"}
+    assert details == []
+
+
+def test_detail_fields_fetch_the_details(client, details):
+    data = client.get("/api/movies/2020?fields=id,plot").get_json()
+
+    assert data["movies"][0] == {"id": "tt20200000", "plot": "Plot of tt20200000"}
+    assert len(details) == 1 and len(details[0]) == 12
+
+
+def test_api_pages_carry_the_next_cursor(client):
+    first = client.get("/api/moviesforyears/1?fields=id&limit=5").get_json()
+    second = client.get(f"/api/moviesforyears/1?fields=id&limit=5&cursor={first['next_cursor']}").get_json()
+
+    assert (first["count"], second["count"]) == (5, 2)
+    assert second["next_cursor"] is None
+
+
+@pytest.mark.parametrize("url", ["/api/movies/2020?fields=budget", "/api/moviesforyears/abc?fields=title"])
+def test_bad_requests_are_refused(client, url):
+    response = client.get(url)
+
+    assert response.status_code == 400 and "error" in response.get_json()
+
+
+def test_rest_answers_like_graphql(client, service):
+    rest = client.get("/api/moviesforyears/1?fields=title,year,poster").get_json()["movies"]
+    schema = service("GraphQL_Service", "graphql_schema").schema
+
+    ok, result = graphql_sync(schema, {"query": "{ allMovies(num_years: 1) { title year poster } }"})
+
+    assert ok and result["data"]["allMovies"] == rest
@@ -0,0 +1,68 @@
+import pytest
+
+from common import omdb
+from common.settings import settings
+
+
+@pytest.mark.parametrize("total, pages", [("0", 1), ("1", 1), ("10", 1), ("11", 2), ("95", 10), ("oops", 1)])
+def test_page_count_rounds_up_total_results(total, pages):
+    assert omdb.page_count({"totalResults": total}) == pages
+
+
+def test_page_count_is_capped_at_max_pages(monkeypatch):
+    monkeypatch.setattr(settings, "OMDB_MAX_PAGES", 3)
+    assert omdb.page_count({"totalResults": "1000"}) == 3
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_fetch_search_records_keeps_page_order(fake_search, concurrency):
+    fake_search.counts[2020] = 35
+
+    records, _, complete = omdb._fetch_search_records(2020, concurrency)
+
+    assert [record["imdbID"] for record in records] == [f"tt2020{index:04d}" for index in range(35)]
+    assert complete
+
+
+def test_fetch_search_records_fans_out_only_the_listed_pages(fake_search):
+    fake_search.counts[2020] = 35
+
+    omdb._fetch_search_records(2020, concurrency=4)
+
+    assert fake_search.pages(2020) == [1, 2, 3, 4]
+
+
+def test_sequential_fetch_stops_at_the_first_empty_page(fake_search):
+    fake_search.counts[2020] = 20
+
+    omdb._fetch_search_records(2020, concurrency=1)
+
+    assert fake_search.pages(2020) == [1, 2, 3]
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_failed_page_makes_the_fetch_incomplete(fake_search, concurrency):
+    fake_search.counts[2020] = 35
+    fake_search.failing.add((2020, 2))
+
+    records, _, complete = omdb._fetch_search_records(2020, concurrency)
+
+    assert not complete
+    assert "tt20200010" not in [record["imdbID"] for record in records]
+
+
+def test_year_without_movies_is_complete_and_empty(fake_search):
+    records, _, complete = omdb._fetch_search_records(1900, concurrency=4)
+
+    assert records == []
+    assert complete
+    assert fake_search.pages(1900) == [1]
+
+
+def test_failed_first_page_is_incomplete(fake_search):
+    fake_search.counts[2020] = 35
+    fake_search.failing.add((2020, 1))
+
+    records, _, complete = omdb._fetch_search_records(2020, concurrency=4)
+
+    assert (records, complete) == ([], False)
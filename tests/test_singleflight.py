@@ -0,0 +1,179 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from common.singleflight import AsyncSingleFlight, SingleFlight
+
+
+# Wait (at most 5 seconds) for `predicate` to hold.
+def wait_until(predicate):
+    deadline = time.monotonic() + 5
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_of_a_key_share_one_run():
+    flights = SingleFlight()
+    release = threading.Event()
+    runs, results = [], []
+
+    def fetch():
+        runs.append(1)
+        release.wait(timeout=5)
+        return "page"
+
+    def call():
+        results.append(flights.do("key", fetch))
+
+    threads = [threading.Thread(target=call) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: flights.coalesced == 4)  # every follower waits for the leader
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert len(runs) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert {result for result, _ in results} == {"page"}
+    assert flights.in_flight() == 0
+
+
+def test_later_call_runs_again():
+    flights = SingleFlight()
+
+    assert flights.do("key", lambda: 1) == (1, False)
+    assert flights.do("key", lambda: 2) == (2, False)
+
+
+def test_leader_error_is_raised_to_every_caller():
+    flights = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def fetch():
+        release.wait(timeout=5)
+        raise RuntimeError("upstream down")
+
+    def call():
+        try:
+            flights.do("key", fetch)
+        except RuntimeError as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: flights.coalesced == 2)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert len(errors) == 3
+    assert flights.in_flight() == 0
+
+
+def test_async_callers_of_a_key_share_one_run():
+    flights = AsyncSingleFlight()
+    runs = []
+
+    async def fetch():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return "page"
+
+    async def main():
+        return await asyncio.gather(*(flights.do("key", fetch) for _ in range(4)))
+
+    results = asyncio.run(main())
+
+    assert len(runs) == 1
+    assert [result for result, _ in results] == ["page"] * 4
+    assert sum(shared for _, shared in results) == 3
+    assert flights.in_flight() == 0
+
+
+def test_async_leader_error_is_raised_to_every_caller():
+    flights = AsyncSingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def main():
+        return await asyncio.gather(*(flights.do("key", fetch) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flights.in_flight() == 0
+
+
+def test_cancelled_async_leader_leaves_the_run_to_the_others():
+    flights = AsyncSingleFlight()
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return "page"
+
+    async def main():
+        leader = asyncio.ensure_future(flights.do("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return await follower, leader.cancelled()
+
+    assert asyncio.run(main()) == (("page", True), True)
+    assert flights.in_flight() == 0
+
+
+def test_async_run_is_cancelled_with_its_last_caller():
+    flights = AsyncSingleFlight()
+    runs = []
+
+    async def fetch():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            runs.append("cancelled")
+            raise
+
+    async def main():
+        callers = [asyncio.ensure_future(flights.do("key", fetch)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+
+    assert runs == ["cancelled"]
+    assert flights.in_flight() == 0
+
+
+def test_async_keys_run_separately():
+    flights = AsyncSingleFlight()
+
+    async def main():
+        return await asyncio.gather(flights.do("a", _value("a")), flights.do("b", _value("b")))
+
+    assert asyncio.run(main()) == [("a", False), ("b", False)]
+
+
+def _value(value):
+    async def fetch():
+        return value
+    return fetch
+
+
+@pytest.mark.parametrize("key", ["s=movie&y=2020&page=1", ("fetch_search_records", "2020")])
+def test_any_hashable_key_is_accepted(key):
+    assert SingleFlight().do(key, lambda: key) == (key, False)
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import pytest
+
+from common import omdb
+from common.columns import MovieColumns
+from common.omdb import LAST_YEAR
+
+
+def movies_of(year, count):
+    return MovieColumns.from_records([{"imdbID": f"tt{year}{index}", "Title": f"Movie {index}", "Year": str(year)}
+                                      for index in range(count)])
+
+
+def test_years_are_handed_out_in_order_with_bounded_concurrency(monkeypatch):
+    in_flight, peak = [], []
+    lock = threading.Lock()
+
+    def fetch_all_movies(year, fields=None, detail_loader=None):
+        with lock:
+            in_flight.append(year)
+            peak.append(len(in_flight))
+        time.sleep(0.01 * (2025 - year))  # older years take longer
+        with lock:
+            in_flight.remove(year)
+        return movies_of(year, 1), 0.1
+
+    monkeypatch.setattr(omdb, "fetch_all_movies", fetch_all_movies)
+
+    years = [year for year, _, _ in omdb.iter_years(range(2018, 2024), concurrency=2)]
+
+    assert years == list(range(2018, 2024))
+    assert max(peak) == 2
+
+
+def test_rest_movie_list_streams_ndjson(service, fake_search, monkeypatch):
+    app = service("REST_Service", "app").app
+    monkeypatch.setattr(omdb, "fetch_movie_details", lambda imdb_ids: {})
+    fake_search.counts = {LAST_YEAR - 1: 12, LAST_YEAR: 3}
+
+    for path, headers in [("/moviesforyears/1?format=ndjson", {}),
+                          ("/moviesforyears/1", {"Accept": "application/x-ndjson"})]:
+        with app.test_client().get(path, headers=headers) as response:
+            assert response.mimetype == "application/x-ndjson"
+            movies = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert [movie["year"] for movie in movies] == [str(LAST_YEAR - 1)] * 12 + [str(LAST_YEAR)] * 3
+
+
+@pytest.fixture
+def graphql_schema(service, monkeypatch):
+    module = service("GraphQL_Service", "graphql_schema")
+
+    async def iter_movies_by_years_async(num_years, fields=None, detail_loader=None):
+        for year in (LAST_YEAR - 1, LAST_YEAR):
+            for movie_item in movies_of(year, 2):
+                yield movie_item
+
+    monkeypatch.setattr(module, "iter_movies_by_years_async", iter_movies_by_years_async)
+    return module
+
+
+def stream(service, graphql_schema, query):
+    incremental = service("GraphQL_Service", "incremental")
+    documents = service("GraphQL_Service", "persisted_queries").DocumentCache(10)
+
+    async def collect():
+        payloads = incremental.incremental_payloads(graphql_schema.incremental_schema, {"query": query}, {},
+                                                    documents.parse_query, documents.validate_query)
+        return [payload async for payload in payloads]
+
+    return asyncio.run(collect())
+
+
+def test_streamed_movies_are_sent_as_incremental_payloads(service, graphql_schema):
+    payloads = stream(service, graphql_schema, "{ allMovies(num_years: 1) @stream(initialCount: 1) { year } }")
+
+    assert payloads[0]["data"] == {"allMovies": [{"year": str(LAST_YEAR - 1)}]} and payloads[0]["hasNext"]
+    assert not payloads[-1]["hasNext"]
+    streamed = [item for payload in payloads[1:] for incremental in payload.get("incremental", [])
+                for item in incremental["items"]]
+    assert [item["year"] for item in streamed] == [str(LAST_YEAR - 1), str(LAST_YEAR), str(LAST_YEAR)]
+
+
+def test_query_without_stream_is_one_result(service, graphql_schema, monkeypatch):
+    async def fetch_movies_by_years_async(num_years, fields=None, detail_loader=None):
+        return movies_of(LAST_YEAR, 1)
+
+    monkeypatch.setattr(graphql_schema, "fetch_movies_by_years_async", fetch_movies_by_years_async)
+
+    assert stream(service, graphql_schema, "{ allMovies(num_years: 0) { year } }") == \
+        [{"data": {"allMovies": [{"year": str(LAST_YEAR)}]}}]
+    assert "errors" in stream(service, graphql_schema, "{ allMovies(")[0]
+
+
+def test_multipart_body_frames_every_payload(service):
+    incremental = service("GraphQL_Service", "incremental")
+
+    async def payloads():
+        yield {"data": {}, "hasNext": True}
+        yield {"hasNext": False}
+
+    async def collect():
+        return b"".join([part async for part in incremental.multipart_body(payloads())]).decode()
+
+    body = asyncio.run(collect())
+    assert body.count("\r\n---\r\nContent-Type: application/json; charset=utf-8\r\n\r\n") == 2
+    assert body.endswith('{"hasNext": false}\r\n-----\r\n')
+
+
+def test_traced_incremental_response_carries_the_trace_in_its_last_payload(service, graphql_schema, monkeypatch):
+    asgi = service("GraphQL_Service", "asgi")
+    monkeypatch.setattr(asgi.Config, "GRAPHQL_TRACING", "header")
+    query = "{ allMovies(num_years: 1) @stream(initialCount: 1) { year } }"
+
+    async def post(headers):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(asgi.app), base_url="http://test") as client:
+            response = await client.post("/graphql", json={"query": query},
+                                         headers=dict(headers, Accept="multipart/mixed"))
+        return [json.loads(part.split("\r\n\r\n", 1)[1])
+                for part in response.text.removesuffix("\r\n-----\r\n").split("\r\n---\r\n")[1:]]
+
+    payloads = asyncio.run(post({"X-GraphQL-Tracing": "1"}))
+
+    assert not payloads[-1]["hasNext"]
+    assert [payload for payload in payloads if "tracing" in payload.get("extensions", {})] == payloads[-1:]
+    resolvers = payloads[-1]["extensions"]["tracing"]["execution"]["resolvers"]
+    assert [resolver["fieldName"] for resolver in resolvers] == ["allMovies"]
+    assert not any("tracing" in payload.get("extensions", {}) for payload in asyncio.run(post({})))
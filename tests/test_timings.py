@@ -0,0 +1,105 @@
+import sqlite3
+import time as real_time
+
+import pytest
+
+from common import timings
+from common.timings import TimingStore, measure_fetch, record_page
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100000.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        real_time.sleep(seconds)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(timings, "time", clock)
+    # the writer thread never flushes on its own during a test
+    monkeypatch.setattr(timings, "FLUSH_INTERVAL", 3600)
+    return clock
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "timings.db")
+
+
+def stored_rows(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT year, latency FROM fetch_timings ORDER BY id").fetchall()
+
+
+def test_fetches_are_written_in_batches(clock, path):
+    store = TimingStore(path)
+    store.record("rest", 2020, 3, 25, 1000, 0.5, "miss")
+    store.record("rest", 2021, 1, 5, 200, 0.1, "miss")
+
+    assert stored_rows(path) == []
+    store.flush()
+    assert stored_rows(path) == [(2020, 0.5), (2021, 0.1)]
+
+
+def test_year_summary_sees_the_queued_fetches(clock, path):
+    store = TimingStore(path)
+    for latency, cache in [(0.4, "miss"), (0.01, "hit"), (0.6, "miss"), (0.02, "stale")]:
+        store.record("rest", 2020, 3, 25, 1000, latency, cache)
+        clock.now += 1
+
+    summary = store.year_summary(2020)
+
+    assert summary["samples"] == 4 and summary["movie_count"] == 25
+    assert summary["upstream_latency"] == pytest.approx(0.5)
+    assert summary["cache_hit_ratio"] == 0.5
+    assert store.year_summary(2020, service="graphql") is None
+
+
+def test_summary_reads_the_most_recent_fetches_only(clock, path):
+    store = TimingStore(path)
+    for latency in range(10):
+        store.record("rest", 2020, 1, 5, 100, float(latency), "miss")
+        clock.now += 1
+
+    assert [row[5] for row in store._rows(2020, limit=3)] == [7.0, 8.0, 9.0]
+
+
+def test_rows_past_the_retention_are_pruned(clock, path):
+    store = TimingStore(path, retention=3600)
+    store.record("rest", 2020, 1, 5, 100, 0.1, "miss")
+    store.flush()
+    clock.now += 3601
+    store.record("rest", 2020, 1, 5, 100, 0.2, "miss")
+
+    assert store.year_summary(2020)["samples"] == 1
+    assert stored_rows(path) == [(2020, 0.2)]
+
+
+def test_version_changes_with_uncached_fetches_only(clock, path):
+    store = TimingStore(path)
+    assert store.version([2020]) == 0
+    store.record("rest", 2020, 1, 5, 100, 0.1, "miss")
+    version = store.version([2020, 2021])
+
+    store.record("rest", 2020, 1, 5, 0, 0.01, "hit")
+    assert store.version([2020, 2021]) == version
+    store.record("rest", 2021, 1, 5, 100, 0.1, "stale")
+    assert store.version([2020, 2021]) > version
+    assert store.version([2022]) == 0
+
+
+def test_page_lookups_are_counted_by_source():
+    with measure_fetch() as timing:
+        record_page("hit")
+        record_page("stale")
+        record_page("upstream", 500)
+        record_page("upstream", 300)
+    record_page("upstream", 100)  # outside of a measured fetch
+
+    assert (timing.pages, timing.bytes, timing.cache_status) == (4, 800, "miss")
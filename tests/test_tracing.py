@@ -0,0 +1,95 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from ariadne import QueryType, graphql_sync, make_executable_schema
+
+from common.resilience import in_context
+from common.tracing import begin_trace, end_trace, span
+
+
+@pytest.fixture
+def tracing(service):
+    return service("GraphQL_Service", "tracing")
+
+
+def traced_schema():
+    query = QueryType()
+
+    @query.field("movies")
+    def resolve_movies(*_):
+        with span("omdb.search_page", year="2020"):
+            pass
+        return [{"title": "Heat"}]
+
+    return make_executable_schema("type Query { movies: [Movie] } type Movie { title: String }", query)
+
+
+def fetch_page(page):
+    with span("omdb.search_page", page=page):
+        pass
+
+
+def test_spans_nest_across_worker_threads():
+    trace, token = begin_trace()
+    with span("graphql.resolve") as attributes:
+        attributes["extra"] = True
+        with ThreadPoolExecutor(2) as pool:
+            list(pool.map(in_context(fetch_page), [1]))
+    end_trace(token)
+
+    parent = next(record for record in trace.spans if record["name"] == "graphql.resolve")
+    child = next(record for record in trace.spans if record["name"] == "omdb.search_page")
+    assert child["parent_id"] == parent["span_id"] and parent["parent_id"] is None
+    assert parent["attributes"] == {"extra": True}
+    assert trace.end is not None
+
+
+def test_failing_block_records_its_error():
+    trace, token = begin_trace()
+    with pytest.raises(KeyError):
+        with span("cache.lookup"):
+            raise KeyError("k")
+    end_trace(token)
+
+    assert trace.spans[0]["attributes"]["error"] == "'k'"
+
+
+def test_nothing_is_recorded_outside_of_a_trace():
+    with span("omdb.request") as attributes:
+        assert attributes is None
+
+
+def test_resolvers_and_their_upstream_spans_are_returned(tracing):
+    ok, result = graphql_sync(traced_schema(), {"query": "{ movies { title } }"},
+                              extensions=[tracing.TracingExtension])
+
+    assert ok and result["data"] == {"movies": [{"title": "Heat"}]}
+    trace = result["extensions"]["tracing"]
+    [resolver] = trace["execution"]["resolvers"]  # `title` uses the default resolver
+    [upstream] = trace["spans"]
+    assert (resolver["path"], resolver["fieldName"]) == (["movies"], "movies")
+    assert upstream["parentId"] == resolver["spanId"]
+    assert trace["duration"] >= resolver["duration"] >= upstream["duration"]
+
+
+def test_spans_are_exported_as_json_lines(tracing, tmp_path):
+    path = tmp_path / "spans.jsonl"
+
+    graphql_sync(traced_schema(), {"query": "{ movies { title } }"},
+                 extensions=[lambda: tracing.TracingExtension(str(path))])
+
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert sorted(exported["name"] for exported in spans) == ["graphql.resolve", "omdb.search_page"]
+    assert len({exported["traceId"] for exported in spans}) == 1
+    assert all(exported["endTimeUnixNano"] >= exported["startTimeUnixNano"] for exported in spans)
+
+
+@pytest.mark.parametrize("mode, headers, traced", [
+    ("off", {"X-GraphQL-Tracing": "1"}, False),
+    ("on", {}, True),
+    ("header", {}, False),
+    ("header", {"X-GraphQL-Tracing": "true"}, True),
+])
+def test_tracing_mode(tracing, mode, headers, traced):
+    assert (tracing.tracing_extensions(headers, mode) is not None) is traced
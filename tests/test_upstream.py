@@ -0,0 +1,98 @@
+import threading
+
+import pytest
+import requests
+
+from common import omdb, upstream
+from common.settings import settings
+
+
+class FakeResponse:
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.content = b""
+
+
+# Stand-in for the shared requests.Session; `during_get` runs inside a request.
+class FakeSession:
+    def __init__(self, status_code=200, error=None, during_get=None):
+        self.calls = []
+        self.closed = False
+        self.status_code = status_code
+        self.error = error
+        self.during_get = during_get
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append((url, params, timeout))
+        if self.during_get is not None:
+            self.during_get()
+        if self.error is not None:
+            raise self.error
+        return FakeResponse(self.status_code)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool(monkeypatch):
+    monkeypatch.setattr(upstream, "_pool", None)
+
+
+def install_pool(monkeypatch, session, size=2):
+    bulkhead = threading.BoundedSemaphore(size)
+    monkeypatch.setattr(upstream, "_pool", (session, bulkhead))
+    return bulkhead
+
+
+def test_get_session_is_shared_by_every_thread():
+    sessions = []
+    threads = [threading.Thread(target=lambda: sessions.append(upstream.get_session())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(session) for session in sessions}) == 1
+
+
+def test_close_session_builds_a_new_session_and_bulkhead():
+    session, bulkhead = upstream._get_pool()
+
+    upstream.close_session()
+
+    new_session, new_bulkhead = upstream._get_pool()
+    assert new_session is not session and new_bulkhead is not bulkhead
+
+
+def test_omdb_get_adds_the_api_key_and_the_timeouts(monkeypatch):
+    session = FakeSession()
+    install_pool(monkeypatch, session)
+
+    upstream.omdb_get({"s": "movie", "y": 2020})
+
+    url, params, timeout = session.calls[0]
+    assert url == settings.OMDB_API_URL
+    assert params == {"s": "movie", "y": 2020, "apikey": settings.OMDB_API_KEY}
+    assert timeout == (settings.OMDB_CONNECT_TIMEOUT, settings.OMDB_READ_TIMEOUT)
+
+
+def test_request_in_flight_releases_the_bulkhead_it_acquired(monkeypatch):
+    session = FakeSession(during_get=upstream.close_session)
+    bulkhead = install_pool(monkeypatch, session)
+
+    upstream.omdb_get({"i": "tt0000001"})
+    _, new_bulkhead = upstream._get_pool()
+
+    assert session.closed
+    # both semaphores hold all their permits: a BoundedSemaphore raises on over-release
+    for semaphore in (bulkhead, new_bulkhead):
+        with pytest.raises(ValueError):
+            semaphore.release()
+
+
+@pytest.mark.parametrize("session", [FakeSession(status_code=503), FakeSession(error=requests.ConnectTimeout())])
+def test_failed_search_page_is_none(monkeypatch, session):
+    install_pool(monkeypatch, session)
+
+    assert omdb.fetch_search_page(2020, 1) is None
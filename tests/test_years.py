@@ -0,0 +1,60 @@
+import threading
+import time
+
+import pytest
+
+from common import omdb
+from common.columns import MovieColumns
+
+
+# Stand-in for `omdb.fetch_all_movies` whose years finish newest first, and
+# that tracks how many years run at once.
+class FakeYears:
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, year, concurrency=None, fields=None, detail_loader=None):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.002 * (2025 - year))
+        with self.lock:
+            self.running -= 1
+        return MovieColumns.from_records([{"imdbID": f"tt{year}", "Year": str(year)}], fields), 0.0
+
+
+@pytest.fixture
+def fake_years(monkeypatch):
+    fake = FakeYears()
+    monkeypatch.setattr(omdb, "fetch_all_movies", fake)
+    return fake
+
+
+@pytest.mark.parametrize("concurrency", [1, 2, 5])
+def test_iter_years_hands_out_years_in_the_order_given(fake_years, concurrency):
+    years = [2019, 2020, 2021, 2022, 2023]
+
+    assert [year for year, _, _ in omdb.iter_years(years, concurrency)] == years
+
+
+def test_iter_years_runs_at_most_concurrency_years(fake_years):
+    list(omdb.iter_years(range(2015, 2024), concurrency=3))
+
+    assert 1 < fake_years.max_running <= 3
+
+
+def test_fetch_movies_by_years_joins_the_years_oldest_first(fake_years):
+    movie_items = omdb.fetch_movies_by_years(2, fields=["id", "year"])
+
+    assert [movie_item.year for movie_item in movie_items] == ["2021", "2022", "2023"]
+
+
+def test_year_range_ends_with_the_last_year():
+    assert list(omdb.year_range("2")) == [omdb.LAST_YEAR - 2, omdb.LAST_YEAR - 1, omdb.LAST_YEAR]
+
+
+def test_year_range_rejects_a_non_number():
+    with pytest.raises(ValueError):
+        omdb.year_range("abc")